@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+여러 머신의 알림 집계 서버
+
+머신마다 Slack/Discord 웹훅으로 따로 보내면 머신 수만큼 웹훅 한도를 나눠 쓰고,
+같은 시간에 끝난 세션들이 채널을 도배합니다. 집계 서버 모드에서는 각 머신이
+메시지를 직접 보내지 않고 이벤트 레코드를 HTTP로 집계 서버에 보내며(aggregator 채널),
+공유 웹훅 설정은 집계 서버에만 둡니다. 집계 서버는 머신 전체를 대상으로:
+
+- 중복 확인: 레코드 ID(머신 + 세션 + 이벤트 + 턴 + 메시지 지문)가 대기 중이거나 TTL 안에
+  처리된 적 있으면 무시
+- 묶음: 묶음 창이 있는 채널의 Stop/SessionEnd를 머신 구분 없이 모아 한 메시지로
+  (각 줄에 머신 이름 표시)
+- 전송: 웹훅 URL별 속도 제한, 실패시 보관함 재시도 (notifier.py와 같은 전송 코드)
+
+메시지는 transcript가 있는 각 머신에서 만들어 보내므로, 집계 서버는 레코드만 다룹니다.
+레코드의 structured(구조화된 메시지)를 채널별 형식(Block Kit, embed)으로 렌더링합니다.
+
+API:
+  POST /events   이벤트 레코드 JSON (notifier.encode_aggregator_record)
+                 → 202 {"ok": true, "duplicate": false}
+  GET  /health   {"ok": true, "queued": 대기 중인 레코드 수}
+
+설정 (집계 서버):
+  SLACK_WEBHOOK_URL, DISCORD_WEBHOOK_URL 등: 공유 웹훅 (notifier.py와 같음)
+  NOTIFICATION_AGGREGATOR_TOKEN: 설정하면 "Authorization: Bearer <토큰>" 요청만 받음
+  NOTIFICATION_DIGEST_WINDOW, <CHANNEL>_DIGEST_WINDOW: 묶음 창 (digest.py)
+
+설정 (각 머신):
+  NOTIFICATION_AGGREGATOR_URL: 집계 서버 URL (예: http://notify.internal:8780/events)
+  NOTIFICATION_AGGREGATOR_TOKEN: 집계 서버와 같은 토큰
+
+사용법:
+    python aggregator.py serve [--bind 0.0.0.0] [--port 8780]
+
+    # 가짜 머신 여러 대 + 대체 웹훅 서버로 로컬에서 확인
+    python bench.py aggregator --hosts 5 --events 10
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+import dedupe
+import stats
+from digest import DIGEST_EVENTS, DigestBuffer, DigestItem, digest_window
+
+if TYPE_CHECKING:
+    from message import Message
+
+
+DEFAULT_PORT = 8780
+
+# 요청 본문 최대 크기 (바이트)
+MAX_RECORD_BYTES = 1024 * 1024
+
+# 레코드가 없을 때 묶음 창을 확인하는 주기 (초)
+AGGREGATOR_POLL_INTERVAL = 0.2
+
+# 보관함(outbox) 재시도 확인 주기 (초)
+OUTBOX_POLL_INTERVAL = 5.0
+
+
+def _log(message: str) -> None:
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+
+def validate_record(record: object) -> Optional[str]:
+    """레코드 형식 확인 (문제가 있으면 이유, 정상이면 None)"""
+    if not isinstance(record, dict):
+        return "record must be a JSON object"
+    for field in ('id', 'host', 'message'):
+        if not isinstance(record.get(field), str) or not record[field]:
+            return f"missing field: {field}"
+    if record.get('line') is not None and not isinstance(record['line'], str):
+        return "line must be a string"
+    return None
+
+
+def record_message(record: dict) -> Message:
+    """레코드의 메시지 (structured가 있으면 채널별로 렌더링되는 Message, 없으면 일반 텍스트)"""
+    from message import Message
+
+    structured = record.get('structured')
+    if isinstance(structured, dict):
+        try:
+            return Message.from_dict(structured)
+        except (TypeError, ValueError) as e:
+            _log(f"[Aggregator] Invalid structured message from {record['host']}: {e}")
+    return Message.from_text(record['message'])
+
+
+class Aggregator:
+    """받은 레코드를 중복 확인 후 채널별로 바로 보내거나 묶음 버퍼에 모으는 전송 루프"""
+
+    def __init__(self):
+        self.records: queue.Queue = queue.Queue()
+        self.digests = DigestBuffer()
+        self.hosts: dict[str, str] = {}      # 묶음에 들어간 레코드 ID → 머신
+        self.stopping = threading.Event()
+        self.server = None
+        self.received = 0
+        self.duplicates = 0
+        # 대기열에 있거나 전송 중인 레코드 ID (전송을 마친 뒤에야 dedupe 저장소에 기록하므로
+        # 그 사이에 같은 레코드가 다시 들어오면 여기서 거름)
+        self.pending: set[str] = set()
+        self._pending_lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # 받기 (HTTP 스레드)
+    # ------------------------------------------------------------
+
+    def submit(self, record: dict) -> bool:
+        """
+        레코드를 전송 대기열에 추가
+
+        Returns:
+            새 레코드면 True, TTL 안에 받은 적 있는 레코드면 False
+        """
+        # 확인과 등록을 한 잠금 안에서 해 동시에 들어온 같은 레코드도 한 번만 처리
+        with self._pending_lock:
+            if record['id'] in self.pending or dedupe.is_recent(record['id']):
+                self.duplicates += 1
+                return False
+            self.pending.add(record['id'])
+            self.received += 1
+        self.records.put(record)
+        return True
+
+    # ------------------------------------------------------------
+    # 전송 (전송 스레드 하나)
+    # ------------------------------------------------------------
+
+    def deliver(self, record: dict) -> None:
+        """
+        레코드 하나 전송 (묶음 창이 있는 채널은 버퍼에 추가)
+
+        전송(실패분은 보관함으로)이나 묶음 버퍼 추가까지 마친 레코드만 dedupe 저장소에
+        기록합니다. 도중에 예외로 버려진 레코드는 같은 레코드가 다시 오면 처리됩니다.
+        """
+        import notifier
+
+        event_name = record.get('event') or 'unknown'
+        stats.start_run(event_name, mode='aggregator')
+        stats.note('host', record['host'])
+        stats.note('queued_ms', round(max(0.0, time.time() - float(record.get('ts') or time.time())) * 1000, 3))
+        try:
+            active = [name for name, _, _ in notifier.get_active_channels()
+                      if notifier._channel_config(name).get("sender") is not notifier.send_aggregator]
+            windows = {}
+            if event_name in DIGEST_EVENTS and record.get('line'):
+                windows = {name: digest_window(notifier.channel_type(name)) for name in active}
+                windows = {name: window for name, window in windows.items() if window > 0}
+
+            message = record_message(record)
+            immediate = set(active) - set(windows)
+            if immediate:
+                results = notifier.send_to_all_channels(message, deadline=self._deadline(), channels=immediate)
+                _log(f"[Aggregator] {event_name} from {record['host']}: {results}")
+
+            line = "• " + f"`{record['host']}` · " + record['line'].removeprefix("• ") if windows else ''
+            for name, window in windows.items():
+                item = DigestItem(message, line, record.get('kind') or event_name, record['id'])
+                self.digests.add(name, item, window)
+                self.hosts[record['id']] = record['host']
+            if windows:
+                _log(f"[Aggregator] {event_name} from {record['host']}: buffered for {sorted(windows)}")
+            dedupe.remember(record['id'])
+        except Exception as e:
+            _log(f"[Aggregator] Delivery error ({event_name} from {record['host']}): {e}")
+        finally:
+            with self._pending_lock:
+                self.pending.discard(record['id'])
+            stats.finish_run()
+
+    def flush_digests(self, force: bool = False) -> None:
+        """창이 끝났거나 가득 찬 묶음 전송 (머신 목록을 묶음 제목에 표시)"""
+        import notifier
+
+        for channel, items in self.digests.pop_due(force):
+            hosts = sorted({self.hosts.get(item.key, '?') for item in items})
+            if len(items) == 1:
+                message = items[0].message
+            else:
+                machine = hosts[0] if len(hosts) == 1 else f"{len(hosts)}대 ({', '.join(hosts)})"
+                message = notifier.build_digest_message([item.line for item in items],
+                                                        [item.kind for item in items], machine=machine)
+            stats.start_run('digest', mode='aggregator')
+            stats.note('digest_events', len(items))
+            try:
+                results = notifier.send_to_all_channels(message, deadline=self._deadline(), channels={channel})
+                _log(f"[Aggregator] Digest of {len(items)} event(s) from {len(hosts)} host(s): {results}")
+            except Exception as e:
+                _log(f"[Aggregator] Digest delivery error ({channel}): {e}")
+            finally:
+                stats.finish_run()
+
+        # 아직 버퍼에 남은 레코드의 머신만 유지
+        buffered = {item.key for _, (_, items) in self.digests._buffers.items() for item in items}
+        self.hosts = {key: host for key, host in self.hosts.items() if key in buffered}
+
+    def flush_outbox(self) -> None:
+        import notifier
+
+        stats.start_run('outbox', mode='aggregator')
+        results = {}
+        try:
+            results = notifier.flush_outbox(self._deadline())
+        finally:
+            if results:
+                stats.finish_run()
+            else:
+                stats.discard_run()
+        if results:
+            _log(f"[Aggregator] Outbox retries: {sum(results.values())}/{len(results)} sent")
+
+    @staticmethod
+    def _deadline() -> float:
+        import notifier
+
+        return time.monotonic() + notifier.SEND_TIMEOUT + notifier.DEADLINE_MARGIN
+
+    def run_delivery(self) -> None:
+        """전송 루프 (stop() 뒤에는 남은 레코드와 묶음을 모두 보내고 종료)"""
+        last_outbox_check = 0.0
+        while True:
+            try:
+                record = self.records.get(timeout=AGGREGATOR_POLL_INTERVAL)
+                self.deliver(record)
+            except queue.Empty:
+                if self.stopping.is_set():
+                    break
+
+            if self.digests:
+                self.flush_digests()
+            if time.monotonic() - last_outbox_check >= OUTBOX_POLL_INTERVAL:
+                last_outbox_check = time.monotonic()
+                try:
+                    self.flush_outbox()
+                except Exception as e:
+                    _log(f"[Aggregator] Outbox error: {e}")
+
+        self.flush_digests(force=True)
+
+    # ------------------------------------------------------------
+    # HTTP 서버
+    # ------------------------------------------------------------
+
+    def start(self, bind: str = '127.0.0.1', port: int = DEFAULT_PORT) -> tuple[str, int]:
+        """HTTP 서버와 전송 스레드 시작 (백그라운드) - 실제 주소 반환 (port=0이면 임의 포트)"""
+        import http.server
+
+        self.server = http.server.ThreadingHTTPServer((bind, port), _make_handler(self))
+        self.server.daemon_threads = True
+        self._threads = [
+            threading.Thread(target=self.server.serve_forever, name='aggregator-http', daemon=True),
+            threading.Thread(target=self.run_delivery, name='aggregator-delivery', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self.server.server_address[:2]
+
+    def stop(self) -> None:
+        """새 요청을 받지 않고, 받은 레코드와 묶음을 모두 보낸 뒤 종료"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.stopping.set()
+        self._threads[1].join()
+
+
+def _make_handler(aggregator: Aggregator):
+    import hmac
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        server_version = 'ClaudeNotificationAggregator'
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            token = os.environ.get("NOTIFICATION_AGGREGATOR_TOKEN")
+            if not token:
+                return True
+            expected = f"Bearer {token}".encode('utf-8')
+            return hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'), expected)
+
+        def do_GET(self) -> None:
+            if self.path != '/health':
+                self._reply(404, {"ok": False, "error": "not found"})
+                return
+            self._reply(200, {"ok": True, "queued": aggregator.records.qsize(),
+                              "received": aggregator.received, "duplicates": aggregator.duplicates})
+
+        def do_POST(self) -> None:
+            if self.path != '/events':
+                self._reply(404, {"ok": False, "error": "not found"})
+                return
+            if not self._authorized():
+                self._reply(401, {"ok": False, "error": "unauthorized"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                length = -1
+            if not 0 < length <= MAX_RECORD_BYTES:
+                self._reply(413 if length > MAX_RECORD_BYTES else 400, {"ok": False, "error": "bad length"})
+                self.close_connection = True
+                return
+            try:
+                record = json.loads(self.rfile.read(length))
+            except ValueError:
+                self._reply(400, {"ok": False, "error": "invalid JSON"})
+                return
+            error = validate_record(record)
+            if error:
+                self._reply(400, {"ok": False, "error": error})
+                return
+            if aggregator.stopping.is_set():
+                self._reply(503, {"ok": False, "error": "shutting down"})
+                return
+            accepted = aggregator.submit(record)
+            self._reply(202, {"ok": True, "duplicate": not accepted})
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return Handler
+
+
+def serve(bind: str, port: int) -> int:
+    """집계 서버 메인 (포그라운드, SIGTERM/SIGINT에 남은 전송을 마치고 종료)"""
+    import signal
+
+    if os.environ.get("NOTIFICATION_AGGREGATOR_URL"):
+        # 집계 서버가 자기 자신에게 보내지 않도록 aggregator 채널은 전송에서 제외됨
+        _log("[Aggregator] NOTIFICATION_AGGREGATOR_URL is ignored in server mode")
+
+    aggregator = Aggregator()
+    host, actual_port = aggregator.start(bind, port)
+    _log(f"[Aggregator] Listening on http://{host}:{actual_port}/events (pid {os.getpid()})")
+    if bind not in ('127.0.0.1', 'localhost', '::1') and not os.environ.get("NOTIFICATION_AGGREGATOR_TOKEN"):
+        _log("[Aggregator] Warning: listening beyond localhost without NOTIFICATION_AGGREGATOR_TOKEN")
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    stop.wait()
+
+    _log(f"[Aggregator] Stopping - delivering {aggregator.records.qsize()} queued record(s)")
+    aggregator.stop()
+    import transport
+    transport.close_all()
+    _log("[Aggregator] Stopped")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Multi-machine notification aggregator')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help='run the aggregator HTTP server')
+    serve_parser.add_argument('--bind', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'port (default: {DEFAULT_PORT})')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        return serve(args.bind, args.port)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
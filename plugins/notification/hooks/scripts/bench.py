@@ -0,0 +1,976 @@
+#!/usr/bin/env python3
+"""
+알림 훅 벤치마크
+
+실제 transcript를 대상으로 훅 성능을 측정합니다.
+
+사용법:
+    # 바이트 프리필터: 디코딩을 건너뛴 줄 비율 + 스캔 시간
+    python bench.py prefilter [transcript.jsonl ...]
+
+    # 오프셋 인덱스: 인덱스 생성/갱신 시간 + 마지막 사용자 메시지/미답변 질문 조회를 역방향 탐색과 비교
+    python bench.py index [transcript.jsonl ...]
+
+    # 마크다운 섹션 추출: 이전 정규식 구현과 결과 비교 + 병적 입력으로 바이트당 시간이 일정한지 확인
+    python bench.py markdown [--fuzz 2000] [--legacy]
+
+    # 섹션 마커 매처: 마커 수를 늘려도 텍스트당 시간이 일정한지 확인 (substring 반복과 비교)
+    python bench.py markers [transcript.jsonl ...]
+
+    # 훅 시작 시간: 이벤트별 실행 시간 + 최상위 import 비용 (목표를 넘으면 종료 코드 1)
+    python bench.py startup [--runs 10] [transcript.jsonl]
+
+    # 웹훅 전송: 요청마다 새 연결(urllib) vs 호스트별 keep-alive 연결의 핸드셰이크 수와 시간
+    # (URL을 지정하지 않으면 연결마다 --handshake-ms만큼 지연하는 로컬 서버 사용)
+    python bench.py transport [--events 20] [--urls 3] [--handshake-ms 50] [--url URL ...]
+
+    # 집계 서버: 가짜 머신 여러 대의 이벤트를 받아 중복 제거 + 묶음 후 로컬 웹훅 서버로 전송
+    python bench.py aggregator [--hosts 5] [--events 10] [--window 2]
+
+    # 긴 메시지 나누기: Slack/Discord 한도 안이고 빈 블록/필드가 없는지 (실패하면 종료 코드 1)
+    python bench.py pack [--fuzz 300]
+
+transcript를 지정하지 않으면 ~/.claude/projects/*/*.jsonl 중
+가장 큰 파일들을 사용합니다.
+"""
+from __future__ import annotations
+import argparse
+import glob
+import os
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import experience_extractor
+import markers
+import transcript
+import transcript_index
+
+
+def _default_transcripts(limit: int = 10) -> list[str]:
+    """~/.claude/projects 아래의 가장 큰 transcript 목록"""
+    pattern = os.path.join(os.path.expanduser('~'), '.claude', 'projects', '*', '*.jsonl')
+    paths = sorted(glob.glob(pattern), key=os.path.getsize, reverse=True)
+    return paths[:limit]
+
+
+def _measure(func, *args) -> tuple[float, int, int]:
+    """func 실행 시간(초)과 SCAN_STATS (읽은 줄, 디코딩한 줄) 측정"""
+    transcript.SCAN_STATS.update(lines=0, decoded=0)
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    return elapsed, transcript.SCAN_STATS['lines'], transcript.SCAN_STATS['decoded']
+
+
+def bench_prefilter(paths: list[str]) -> None:
+    """프리필터 on/off로 전체 스캔과 tail 스캔 비교"""
+    print(f"JSON backend: {transcript.JSON_BACKEND}")
+    print(f"{'transcript':<40} {'size':>9} {'mode':<5} {'lines':>8} {'decoded':>8} "
+          f"{'skipped':>8} {'off(ms)':>9} {'on(ms)':>9}")
+
+    total_lines = total_decoded = 0
+    for path in paths:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        name = os.path.basename(path)
+        if len(name) > 40:
+            name = name[:37] + '...'
+
+        for mode, func in (('full', transcript.scan_transcript), ('tail', transcript.scan_transcript_tail)):
+            transcript.PREFILTER_ENABLED = False
+            off_time, _, _ = _measure(func, path)
+            transcript.PREFILTER_ENABLED = True
+            on_time, lines, decoded = _measure(func, path)
+
+            skipped = 1 - decoded / lines if lines else 0.0
+            if mode == 'full':
+                total_lines += lines
+                total_decoded += decoded
+            print(f"{name:<40} {size_mb:>8.1f}M {mode:<5} {lines:>8} {decoded:>8} "
+                  f"{skipped:>7.1%} {off_time * 1000:>9.1f} {on_time * 1000:>9.1f}")
+
+    if total_lines:
+        print(f"\nFull scan: {total_lines - total_decoded}/{total_lines} lines skipped "
+              f"({1 - total_decoded / total_lines:.1%}) before json decoding")
+
+
+def bench_index(paths: list[str], runs: int = 5) -> bool:
+    """
+    인덱스 생성(첫 실행)/갱신(변경 없음) 시간과 Notification 조회(scan_transcript_tail)를
+    역방향 탐색과 비교
+
+    Returns:
+        모든 transcript에서 두 방법의 결과가 같으면 True
+    """
+    print(f"{'transcript':<40} {'size':>9} {'entries':>8} {'build(ms)':>10} {'reopen(ms)':>11} "
+          f"{'tail(ms)':>9} {'reverse(ms)':>12}")
+
+    mismatches = 0
+    for path in paths:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        name = os.path.basename(path)
+        if len(name) > 40:
+            name = name[:37] + '...'
+
+        try:
+            os.unlink(transcript_index.index_path(path))
+        except FileNotFoundError:
+            pass
+
+        start = time.perf_counter()
+        with transcript_index.TranscriptIndex(path) as index:
+            entries = len(index.entries)
+        build_time = time.perf_counter() - start
+
+        reopen_times, tail_times, reverse_times = [], [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            with transcript_index.TranscriptIndex(path):
+                pass
+            reopen_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            with transcript_index.TranscriptIndex(path) as index:
+                found = index.tail()
+            tail_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            expected = transcript._scan_tail_reversed(path)
+            reverse_times.append(time.perf_counter() - start)
+
+        if found != expected:
+            mismatches += 1
+            print(f"  warning: index and reverse scan disagree on {name}", file=sys.stderr)
+        print(f"{name:<40} {size_mb:>8.1f}M {entries:>8} {build_time * 1000:>10.1f} "
+              f"{statistics.median(reopen_times) * 1000:>11.1f} {statistics.median(tail_times) * 1000:>9.1f} "
+              f"{statistics.median(reverse_times) * 1000:>12.1f}")
+    return not mismatches
+
+
+# 마크다운 벤치마크 입력 크기 (바이트)
+MARKDOWN_SIZES = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024)
+
+# 가장 작은 입력 대비 바이트당 시간이 이 배수를 넘으면 실패 (선형이 아님)
+MARKDOWN_MAX_SLOWDOWN = 4.0
+
+# 이전 정규식 구현 (--legacy 비교용, 중첩 수량자로 역추적 발생)
+LEGACY_MARKDOWN_PATTERNS = [
+    r'##\s*완료.*?\n((?:[-*]\s*.+\n?)+)',
+    r'###?\s*(?:생성|수정|변경)[된\s]*파일.*?\n((?:[-*]\s*`?.+`?\n?)+)',
+    r'([가-힣\w\s]+(?:구현|추가|생성|수정|완료)[했습니다되었습니다\.]+)',
+    r'((?:Added|Created|Implemented|Modified|Updated)\s+[^.]+\.)',
+    r'###?\s*(?:사용법|사용\s*방법|테스트|실행\s*방법).*?\n((?:\d+\.\s*.+\n?)+)',
+]
+
+# 무작위 마크다운 조각 (퍼징용)
+_MARKDOWN_FRAGMENTS = [
+    '## 완료 요약\n', '### 구현 완료\n', '## ', '#', '- ', '* ', '+ ', '1. ', '12) ', '```', '```bash\n', '~~~\n',
+    '### 수정된 파일\n', '### Modified Files\n', '### 사용법\n', '`src/a.py`', '`', '구현', '추가했습니다', '완료',
+    '되었습니다.', 'Added ', 'Updated', '.', ' ', '\t', '\n', '\n\n', '가나다', 'word_', '123', 'http://localhost:3000/x',
+]
+
+
+# 줄 단위 마크다운 조각 (이전 구현과 결과 비교용 - 의도한 차이가 생기는 입력은 만들지 않음)
+_MARKDOWN_LINES = [
+    '## 완료 요약\n', '## 작업 완료\n', '### 구현 완료\n', '- 로그인 기능 구현 완료\n', '- `src/app.py` 수정\n',
+    '* 테스트 추가함\n', '### 수정된 파일\n', '### Modified Files\n', '### 사용법\n', '### 테스트 방법\n',
+    '1. 서버 실행하기\n', '2. 브라우저 열기\n', '```bash\nnpm run dev\n```\n', '```\n# 주석\npytest -q\n```\n',
+    '로그인 기능을 구현했습니다.\n', '버그를 수정하였습니다.\n', 'Added a new endpoint for users.\n',
+    'Updated the config.\n', '설명 문단입니다.\n', '\n', 'http://localhost:3000/login\n', '파일을 생성했습니다.\n',
+]
+
+
+def _intentional_markdown_difference(text: str) -> bool:
+    """
+    이전 정규식 구현과 의도적으로 결과가 다른 입력인지
+
+    제목 바로 다음의 빈 줄: 이전 구현은 목록으로 보지 않았지만 지금은 제목의 목록으로 봄.
+    (줄 중간의 제목/펜스, '**굵게**'/'---' 줄도 의도한 차이지만 _MARKDOWN_LINES로는 생기지 않음)
+    """
+    lines = text.split('\n')
+    return any(line.startswith('#') and i + 1 < len(lines) and not lines[i + 1].strip()
+               for i, line in enumerate(lines))
+
+
+def _legacy_completion_summary(text: str) -> Optional[str]:
+    """
+    이전 experience_extractor._parse_completion_summary (정규식 구현, 비교용 그대로 보존)
+
+    추출 대상:
+    - 기능/변경사항 설명
+    - 생성/수정된 파일 목록
+    - 주요 구현 내용
+
+    Returns:
+        요약된 완료 내용 (최대 5줄)
+    """
+    if not text:
+        return None
+
+    lines = []
+
+    # 1. ## 완료 섹션 내용 추출
+    completion_patterns = [
+        r'##\s*완료.*?\n((?:[-*]\s*.+\n?)+)',  # ## 완료 아래 불릿 리스트
+        r'##\s*구현\s*완료.*?\n((?:[-*]\s*.+\n?)+)',
+        r'##\s*작업\s*완료.*?\n((?:[-*]\s*.+\n?)+)',
+    ]
+
+    for pattern in completion_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            bullet_content = match.group(1)
+            for line in bullet_content.strip().split('\n'):
+                line = line.strip()
+                if line.startswith(('-', '*')):
+                    # 불릿 제거하고 내용만
+                    content = re.sub(r'^[-*]\s*', '', line).strip()
+                    if content and len(content) > 5:
+                        lines.append(f"• {content}")
+            break
+
+    # 2. 생성/수정된 파일 섹션 추출
+    file_patterns = [
+        r'###?\s*(?:생성|수정|변경)[된\s]*파일.*?\n((?:[-*]\s*`?.+`?\n?)+)',
+        r'###?\s*(?:Created|Modified)\s*Files.*?\n((?:[-*]\s*`?.+`?\n?)+)',
+    ]
+
+    for pattern in file_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            file_content = match.group(1)
+            files = []
+            for line in file_content.strip().split('\n'):
+                line = line.strip()
+                if line.startswith(('-', '*')):
+                    # 파일명 추출 (백틱 포함 또는 미포함)
+                    content = re.sub(r'^[-*]\s*', '', line).strip()
+                    # 백틱 안의 내용 또는 전체 라인
+                    file_match = re.search(r'`([^`]+)`', content)
+                    if file_match:
+                        files.append(file_match.group(1))
+                    elif content:
+                        files.append(content.split()[0])  # 첫 단어만
+            if files:
+                # 파일명만 추출하여 간결하게
+                file_names = [os.path.basename(f) for f in files[:5]]
+                lines.append(f"• 파일: {', '.join(file_names)}")
+            break
+
+    # 3. 주요 기능 설명 추출 (첫 문단에서)
+    if not lines:
+        # "구현", "추가", "생성" 등의 동사로 시작하는 문장 찾기
+        action_patterns = [
+            r'([가-힣\w\s]+(?:구현|추가|생성|수정|완료)[했습니다되었습니다\.]+)',
+            r'((?:Added|Created|Implemented|Modified|Updated)\s+[^.]+\.)',
+        ]
+
+        for pattern in action_patterns:
+            matches = re.findall(pattern, text)
+            for m in matches[:3]:  # 최대 3개
+                content = m.strip()
+                if len(content) > 10 and len(content) < 100:
+                    lines.append(f"• {content}")
+
+    if not lines:
+        return None
+
+    return '\n'.join(lines[:5])  # 최대 5줄
+
+
+
+def _legacy_usage_guide(text: str) -> Optional[str]:
+    """
+    이전 experience_extractor._parse_usage_guide (정규식 구현, 비교용 그대로 보존)
+
+    추출 대상:
+    - 코드 블록 (bash, shell 명령어)
+    - 순서가 있는 설명 (1., 2., 3.)
+    - 불릿 리스트
+
+    Returns:
+        사용 가이드 (최대 5줄)
+    """
+    if not text:
+        return None
+
+    lines = []
+
+    # 1. 코드 블록에서 bash/shell 명령어 추출
+    code_pattern = r'```(?:bash|shell|sh)?\n([\s\S]*?)```'
+    code_matches = re.findall(code_pattern, text)
+
+    for code in code_matches:
+        code_lines = code.strip().split('\n')
+        for line in code_lines:
+            line = line.strip()
+            # 주석이나 빈 줄 제외
+            if line and not line.startswith('#'):
+                lines.append(f"`{line}`")
+                if len(lines) >= 3:
+                    break
+        if len(lines) >= 3:
+            break
+
+    # 2. 사용법 섹션 아래 불릿/번호 리스트 추출
+    usage_patterns = [
+        r'###?\s*(?:사용법|사용\s*방법|테스트|실행\s*방법).*?\n((?:\d+\.\s*.+\n?)+)',
+        r'###?\s*(?:사용법|사용\s*방법|테스트|실행\s*방법).*?\n((?:[-*]\s*.+\n?)+)',
+    ]
+
+    for pattern in usage_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            list_content = match.group(1)
+            for line in list_content.strip().split('\n'):
+                line = line.strip()
+                if line:
+                    # 번호 또는 불릿 제거
+                    content = re.sub(r'^(\d+\.|-|\*)\s*', '', line).strip()
+                    if content and len(content) > 5:
+                        lines.append(content)
+                        if len(lines) >= 5:
+                            break
+            break
+
+    # 3. URL 추출 (localhost, 127.0.0.1 등)
+    url_pattern = r'(https?://(?:localhost|127\.0\.0\.1)[:\d]*[^\s\)\"\']*)'
+    url_matches = re.findall(url_pattern, text)
+    for url in url_matches[:2]:  # 최대 2개
+        if url not in '\n'.join(lines):
+            lines.append(f"접속: {url}")
+
+    if not lines:
+        return None
+
+    # 중복 제거 및 최대 5줄
+    seen = set()
+    unique_lines = []
+    for line in lines:
+        if line not in seen:
+            seen.add(line)
+            unique_lines.append(line)
+
+    return '\n'.join(unique_lines[:5])
+
+
+def _adversarial_inputs(size: int) -> dict[str, str]:
+    """이전 정규식이 역추적으로 폭주하는 입력들"""
+    return {
+        'word-run': '가' * size,
+        'keywords-no-suffix': ('구현 ' * (size // 3 + 1))[:size],
+        'english-no-period': ('Added  ' * (size // 7 + 1))[:size],
+        'bullets-one-line': '## 완료\n-' + ' ' * size,
+        'bullet-lines': '## 완료\n' + '- 항목 내용입니다\n' * (size // 12),
+        'headings': '### 수정된 파일\n' * (size // 10),
+        'open-fence': '```\n' + 'echo hi\n' * (size // 8),
+    }
+
+
+def _random_markdown(rng: random.Random, size: int) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        part = rng.choice(_MARKDOWN_FRAGMENTS)
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)[:size]
+
+
+def _extract_sections(text: str) -> None:
+    experience_extractor._parse_completion_summary(text)
+    experience_extractor._parse_usage_guide(text)
+
+
+def _ns_per_byte(func, text: str, repeat: int = 3) -> float:
+    """func(text)의 바이트당 처리 시간 (여러 번 중 최솟값, ns)"""
+    size = max(1, len(text.encode('utf-8')))
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e9 / size
+
+
+def bench_markdown(fuzz_count: int, legacy: bool) -> bool:
+    """
+    마크다운 섹션 추출의 바이트당 시간이 입력 크기와 관계없이 일정한지 확인
+
+    Returns:
+        모든 입력이 MARKDOWN_MAX_SLOWDOWN 이내면 True
+    """
+    ok = True
+    rng = random.Random(0)
+
+    # 1. 무작위 퍼징: 임의 조각으로 만든 문서에서 예외 없이 끝나야 함
+    start = time.perf_counter()
+    for _ in range(fuzz_count):
+        _extract_sections(_random_markdown(rng, rng.randint(0, 2048)))
+    print(f"Fuzz: {fuzz_count} random documents in {time.perf_counter() - start:.2f}s")
+
+    # 2. 이전 정규식 구현과 비교: 줄 단위 문서에서 의도한 차이가 없는 입력은 결과가 같아야 함
+    compared = skipped = 0
+    mismatches: list[tuple[str, str]] = []
+    for _ in range(fuzz_count):
+        text = ''.join(rng.choice(_MARKDOWN_LINES) for _ in range(rng.randint(1, 12)))
+        if _intentional_markdown_difference(text):
+            skipped += 1
+            continue
+        compared += 1
+        for name, new, old in (
+            ('completion', experience_extractor._parse_completion_summary, _legacy_completion_summary),
+            ('usage', experience_extractor._parse_usage_guide, _legacy_usage_guide),
+        ):
+            if new(text) != old(text):
+                mismatches.append((name, text))
+    for name, text in mismatches[:3]:
+        print(f"FAIL: {name} differs from the legacy parser on {text!r}", file=sys.stderr)
+    ok = ok and not mismatches
+    print(f"Differential: {compared} documents vs. legacy regex parser, {len(mismatches)} mismatches "
+          f"({skipped} skipped: blank line after a heading)")
+
+    # 3. 병적 입력 + 큰 무작위 문서: 크기별 바이트당 시간
+    header = ''.join(f"{size // 1024:>8}K" for size in MARKDOWN_SIZES)
+    print(f"\n{'input (ns/byte)':<22}{header} {'slowdown':>9}")
+    cases = list(_adversarial_inputs(MARKDOWN_SIZES[0]))
+    cases.append('random-markdown')
+    for name in cases:
+        timings = []
+        for size in MARKDOWN_SIZES:
+            if name == 'random-markdown':
+                text = _random_markdown(random.Random(size), size)
+            else:
+                text = _adversarial_inputs(size)[name]
+            timings.append(_ns_per_byte(_extract_sections, text))
+        slowdown = max(timings) / max(min(timings), 1e-9)
+        status = 'ok' if slowdown <= MARKDOWN_MAX_SLOWDOWN else 'FAIL'
+        ok = ok and status == 'ok'
+        cells = ''.join(f"{t:>9.1f}" for t in timings)
+        print(f"{name:<22}{cells} {slowdown:>8.1f}x {status}")
+
+    # 4. (선택) 이전 정규식 구현과 비교 - 작은 입력에서만 (큰 입력은 수 분 이상 걸림)
+    if legacy:
+        print(f"\n{'legacy regex (ns/byte)':<22}{'4K':>9}{'16K':>9}")
+        patterns = [re.compile(pattern, re.IGNORECASE) for pattern in LEGACY_MARKDOWN_PATTERNS]
+
+        def run_legacy(text: str) -> None:
+            for pattern in patterns:
+                pattern.findall(text)
+
+        for name in _adversarial_inputs(MARKDOWN_SIZES[0]):
+            timings = [_ns_per_byte(run_legacy, _adversarial_inputs(size)[name], repeat=1)
+                       for size in (4 * 1024, 16 * 1024)]
+            print(f"{name:<22}" + ''.join(f"{t:>9.1f}" for t in timings))
+
+    print(f"\n{'PASS' if ok else 'FAIL'}: per-byte cost stays within {MARKDOWN_MAX_SLOWDOWN:.0f}x "
+          f"from {MARKDOWN_SIZES[0] // 1024}K to {MARKDOWN_SIZES[-1] // 1024}K")
+    return ok
+
+
+# 마커 벤치마크: 기본 마커에 추가할 합성 마커 수
+MARKER_COUNTS = (0, 100, 1000)
+
+
+def _synthetic_markers(count: int) -> list[str]:
+    """실제 마커처럼 '## ', '### '로 시작하는 합성 마커"""
+    rng = random.Random(count)
+    words = ['구현', '설정', '확인', '배포', 'Setup', 'Deploy', 'Notes', '결과', '요약', 'Step']
+    return [f"{'#' * rng.choice((2, 3))} {rng.choice(words)} {i}" for i in range(count)]
+
+
+def bench_markers(paths: list[str]) -> None:
+    """기본 + 합성 마커로 substring 반복(이전 방식)과 매처의 텍스트당 시간 비교"""
+    texts: list[str] = []
+    for path in paths:
+        texts.extend(transcript.scan_transcript(path)['assistant_texts'])
+    if not texts:
+        # 마커가 드문 일반 문단 (마커가 없는 텍스트가 가장 비싼 경우)
+        rng = random.Random(0)
+        words = ['구현', '설정', '파일', 'the', 'config', '테스트', 'value', '함수', '#', '-', '`code`']
+        texts = [' '.join(rng.choice(words) for _ in range(800)) for _ in range(500)]
+    total_kb = sum(len(text) for text in texts) / 1024
+    print(f"{len(texts)} assistant texts ({total_kb:.0f} KB)")
+    print(f"{'markers':>8} {'substring(us/text)':>19} {'matcher(us/text)':>17}")
+
+    base = markers.load_marker_config()
+    for extra in MARKER_COUNTS:
+        config = {kind: list(items) for kind, items in base.items()}
+        config.setdefault('usage', []).extend(_synthetic_markers(extra))
+        marker_count = sum(len(items) for items in config.values())
+
+        start = time.perf_counter()
+        for text in texts:
+            [kind for kind, items in config.items() if any(marker in text for marker in items)]
+        substring_time = time.perf_counter() - start
+
+        matcher = markers.MarkerMatcher(config)
+        start = time.perf_counter()
+        for text in texts:
+            matcher.kinds(text)
+        matcher_time = time.perf_counter() - start
+
+        print(f"{marker_count:>8} {substring_time * 1e6 / len(texts):>19.1f} "
+              f"{matcher_time * 1e6 / len(texts):>17.1f}")
+
+
+# 훅 실행 시간 목표 (python -c pass 대비 추가 시간, 중앙값 ms)
+STARTUP_TARGETS_MS = {
+    'SessionEnd': 40,
+    'Notification': 80,
+    'Stop': 150,
+}
+
+# 실제 전송/스풀 없이 메시지 생성까지만 측정하도록 지우는 환경변수
+_DELIVERY_ENV_VARS = ('SLACK_WEBHOOK_URL', 'DISCORD_WEBHOOK_URL', 'ENABLE_DESKTOP_NOTIFICATION', 'ENABLE_SPOOL')
+
+
+def _synthetic_transcript(directory: str) -> str:
+    """transcript가 없을 때 쓸 작은 합성 transcript"""
+    path = os.path.join(directory, 'synthetic.jsonl')
+    records = [
+        {'type': 'user', 'message': {'role': 'user', 'content': '로그인 기능 구현해줘'}},
+        {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+            {'type': 'tool_use', 'id': 'toolu_1', 'name': 'Write', 'input': {'file_path': 'auth.ts', 'content': 'x'}},
+        ]}},
+        {'type': 'user', 'message': {'role': 'user', 'content': [
+            {'type': 'tool_result', 'tool_use_id': 'toolu_1', 'content': 'ok'},
+        ]}},
+        {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+            {'type': 'text', 'text': '## 완료 요약\n- JWT 인증 구현\n\n### 사용법\n```bash\nnpm run dev\n```'},
+        ]}},
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return path
+
+
+def _run_hook(event: dict, env: dict, extra_args: tuple = ()) -> tuple[float, str]:
+    """hook.py 한 번 실행 → (실행 시간(초), stderr)"""
+    hook = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hook.py')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *extra_args, hook], input=json.dumps(event),
+                            capture_output=True, text=True, env=env)
+    return time.perf_counter() - start, result.stderr
+
+
+def _top_level_imports(importtime_log: str, limit: int = 6) -> list[tuple[str, float]]:
+    """-X importtime 출력에서 훅 모듈 바로 아래 단계의 import별 누적 시간 (ms)"""
+    modules = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # notifier의 직접 import + 함수 안에서 지연 import한 모듈
+        if name.startswith('   ') and not name.startswith('    ') and cumulative.strip().isdigit():
+            modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def bench_startup(paths: list[str], runs: int) -> bool:
+    """
+    이벤트별 훅 실행 시간 (채널 없이 메시지 생성까지) + import 비용
+
+    Returns:
+        모든 이벤트가 STARTUP_TARGETS_MS 안이면 True
+    """
+    if sys.flags.dont_write_bytecode or os.environ.get('PYTHONDONTWRITEBYTECODE'):
+        print("Note: bytecode caching is disabled (PYTHONDONTWRITEBYTECODE); times include compilation\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        transcript_path = paths[0] if paths else _synthetic_transcript(directory)
+        env = {name: value for name, value in os.environ.items() if name not in _DELIVERY_ENV_VARS}
+        env.update(NOTIFICATION_CACHE_DIR=os.path.join(directory, 'cache'), ENABLE_DEDUPE='false')
+
+        baseline = statistics.median(
+            _measure_command([sys.executable, '-c', 'pass']) for _ in range(runs)
+        )
+        print(f"transcript: {transcript_path}")
+        print(f"python -c pass: {baseline * 1000:.1f} ms (median of {runs})\n")
+        print(f"{'event':<14} {'median':>9} {'max':>9} {'overhead':>9} {'target':>7}  top-level imports (cumulative ms)")
+
+        passed = True
+        for event_name, target in STARTUP_TARGETS_MS.items():
+            event = {
+                'hook_event_name': event_name,
+                'session_id': 'bench',
+                'cwd': os.getcwd(),
+                'transcript_path': transcript_path,
+                'stop_reason': 'end_turn',
+                'message': 'Claude is waiting for your input',
+            }
+            _run_hook(event, env)  # 바이트코드/환경 정보 캐시 준비
+            times = [_run_hook(event, env)[0] for _ in range(runs)]
+            _, importtime_log = _run_hook(event, env, ('-X', 'importtime'))
+
+            median = statistics.median(times)
+            overhead = (median - baseline) * 1000
+            ok = overhead <= target
+            passed = passed and ok
+            imports = ', '.join(f"{name} {ms:.1f}" for name, ms in _top_level_imports(importtime_log))
+            print(f"{event_name:<14} {median * 1000:>7.1f}ms {max(times) * 1000:>7.1f}ms "
+                  f"{overhead:>7.1f}ms {target:>5}ms  {'PASS' if ok else 'FAIL'}  {imports}")
+
+    return passed
+
+
+def _local_webhook_server(handshake_ms: float):
+    """HTTP/1.1 keep-alive 로컬 웹훅 서버 (새 연결마다 handshake_ms 지연 - DNS/TCP/TLS 대신)"""
+    import http.server
+    import threading
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            time.sleep(handshake_ms / 1000)
+            super().setup()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            server.posts += 1
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.posts = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _send_urllib(url: str, payload: dict) -> None:
+    """변경 전 전송 방식 (요청마다 urlopen)"""
+    import urllib.request
+
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
+
+
+def bench_transport(urls: list[str], events: int, url_count: int, handshake_ms: float) -> None:
+    """
+    이벤트마다 모든 URL로 동시에 전송 (notifier의 전송과 같은 방식)하며
+    urllib / transport(keep-alive 끔) / transport(keep-alive) 비교
+    """
+    import threading
+    import transport
+
+    server = None
+    if not urls:
+        server = _local_webhook_server(handshake_ms)
+        host, port = server.server_address[:2]
+        urls = [f"http://{host}:{port}/hooks/{i}" for i in range(url_count)]
+        print(f"local server, {handshake_ms:.0f} ms per new connection, {len(urls)} URLs on one host")
+    print(f"{events} events x {len(urls)} URLs\n")
+    print(f"{'transport':<28} {'total':>9} {'per event':>10} {'handshakes':>11} {'reused':>7}")
+
+    payload = {'text': 'notification transport benchmark'}
+
+    def dispatch(send) -> None:
+        threads = [threading.Thread(target=send, args=(url, payload)) for url in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    modes = [
+        ('urllib (one-shot)', _send_urllib, None),
+        ('transport, keep-alive off', lambda url, body: transport.post_json(url, body), 'false'),
+        ('transport, keep-alive', lambda url, body: transport.post_json(url, body), 'true'),
+    ]
+    previous = os.environ.get('ENABLE_HTTP_KEEPALIVE')
+    try:
+        for name, send, keepalive in modes:
+            if keepalive is not None:
+                os.environ['ENABLE_HTTP_KEEPALIVE'] = keepalive
+            transport.close_all()
+            before = transport.counters()
+            start = time.perf_counter()
+            for _ in range(events):
+                dispatch(send)
+            elapsed = time.perf_counter() - start
+            after = transport.counters()
+            if keepalive is None:
+                handshakes, reused = events * len(urls), 0
+            else:
+                handshakes = after['handshakes'] - before['handshakes']
+                reused = after['reused'] - before['reused']
+            print(f"{name:<28} {elapsed * 1000:>7.1f}ms {elapsed * 1000 / events:>8.1f}ms "
+                  f"{handshakes:>11} {reused:>7}")
+    finally:
+        if previous is None:
+            os.environ.pop('ENABLE_HTTP_KEEPALIVE', None)
+        else:
+            os.environ['ENABLE_HTTP_KEEPALIVE'] = previous
+        transport.close_all()
+        if server is not None:
+            server.shutdown()
+
+
+def bench_aggregator(hosts: int, events: int, window: float) -> None:
+    """
+    가짜 머신 여러 대가 Stop 레코드를 집계 서버로 보낼 때 (재시도로 한 번씩 더 보냄)
+    머신마다 웹훅으로 직접 보내는 경우와 웹훅 전송 수 비교
+    """
+    import threading
+    import urllib.request
+
+    server = _local_webhook_server(0)
+    webhook = "http://%s:%d/slack" % server.server_address[:2]
+    overrides = {
+        'NOTIFICATION_CACHE_DIR': tempfile.mkdtemp(prefix='notification-bench-'),
+        'SLACK_WEBHOOK_URL': webhook,
+        'NOTIFICATION_DIGEST_WINDOW': str(window),
+        'NOTIFICATION_AGGREGATOR_URL': '',
+        'NOTIFICATION_AGGREGATOR_TOKEN': '',
+    }
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+
+    import aggregator
+
+    agg = aggregator.Aggregator()
+    host, port = agg.start('127.0.0.1', 0)
+    url = f"http://{host}:{port}/events"
+
+    def post(record: dict) -> None:
+        request = urllib.request.Request(url, data=json.dumps(record).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+    def run_host(index: int) -> None:
+        name = f"host-{index:02d}"
+        for event in range(events):
+            record = {
+                'id': f"{name}-{event}", 'host': name, 'event': 'Stop', 'session_id': f"s{event}",
+                'kind': 'end_turn', 'line': f"• 12:00:00 ✅ 작업 완료 · `/work/{event}` · \"요청 {event}\"",
+                'message': f"✅ 작업 완료 ({name}, 요청 {event})", 'ts': time.time(),
+            }
+            post(record)
+            post(record)    # 보관함 재시도/훅 재실행으로 같은 레코드가 다시 온 경우
+
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run_host, args=(i,)) for i in range(hosts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        accepted = time.perf_counter() - start
+        agg.stop()
+        elapsed = time.perf_counter() - start
+
+        print(f"{hosts} hosts x {events} Stop events (each sent twice), digest window {window:g}s\n")
+        print(f"records posted to aggregator   {hosts * events * 2:>6}  ({accepted * 1000:.0f} ms)")
+        print(f"duplicates dropped             {agg.duplicates:>6}")
+        print(f"webhook posts without it       {hosts * events:>6}  (one per event per host)")
+        print(f"webhook posts with aggregator  {server.posts:>6}  ({elapsed * 1000:.0f} ms incl. final flush)")
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        server.shutdown()
+
+
+def _random_section_body(rng: random.Random, size: int) -> str:
+    """무작위 섹션 본문 (목록 줄, 빈 줄, 한도 근처 길이의 긴 줄 포함)"""
+    lines: list[str] = []
+    while sum(len(line) + 1 for line in lines) < size:
+        kind = rng.random()
+        if kind < 0.15:
+            lines.append('')
+        elif kind < 0.25:
+            lines.append('x' * rng.choice((1023, 1024, 1025, 2999, 3000, 3001, 4096, 5000)))
+        else:
+            lines.append('• ' + ' '.join(f"word{rng.randint(0, 999)}" for _ in range(rng.randint(1, 30))))
+    return '\n'.join(lines)
+
+
+def _pack_errors(slack_posts: list[dict], discord_posts: list[dict]) -> list[str]:
+    """채널 한도를 넘거나 비어 있는 (API가 400으로 거부하는) 부분"""
+    import message as m
+
+    errors = []
+    for post in slack_posts:
+        blocks = post.get('blocks')
+        if blocks is None:
+            if not post['text'].strip() or len(post['text']) > m.SLACK_TEXT_FIELD_LIMIT:
+                errors.append(f"slack text: {len(post['text'])} chars")
+            continue
+        if len(blocks) > m.SLACK_MAX_BLOCKS:
+            errors.append(f"slack blocks: {len(blocks)}")
+        for block in blocks:
+            if block['type'] == 'section' and 'text' in block:
+                text = block['text']['text']
+                if not text.strip() or len(text) > m.SLACK_TEXT_LIMIT:
+                    errors.append(f"slack section text: {len(text)} chars")
+            for field in block.get('fields', ()):
+                if not field['text'].strip() or len(field['text']) > m.SLACK_FIELD_LIMIT:
+                    errors.append(f"slack field: {len(field['text'])} chars")
+    for post in discord_posts:
+        embed = post['embeds'][0]
+        if len(embed['title']) > m.DISCORD_TITLE_LIMIT or len(embed.get('description', '')) > m.DISCORD_DESCRIPTION_LIMIT:
+            errors.append("discord title/description over limit")
+        if 'description' in embed and not embed['description'].strip():
+            errors.append("discord empty description")
+        if len(embed.get('fields', ())) > m.DISCORD_MAX_FIELDS:
+            errors.append(f"discord fields: {len(embed['fields'])}")
+        for field in embed.get('fields', ()):
+            if not field['value'].strip() or len(field['value']) > m.DISCORD_FIELD_VALUE_LIMIT:
+                errors.append(f"discord field value: {len(field['value'])} chars")
+        if m._embed_size(embed) > m.DISCORD_EMBED_LIMIT:
+            errors.append(f"discord embed: {m._embed_size(embed)} chars")
+    return errors
+
+
+def bench_pack(fuzz_count: int) -> bool:
+    """
+    긴 메시지를 Slack/Discord 한도에 맞춰 나눈 결과가 한도 안이고 빈 블록/필드가 없는지 확인
+
+    Returns:
+        모든 입력이 통과하면 True
+    """
+    import message as m
+
+    previous = os.environ.get('NOTIFICATION_MAX_POSTS')
+    rng = random.Random(0)
+    failures = 0
+
+    def check(name: str, msg) -> None:
+        nonlocal failures
+        errors = _pack_errors(m.pack_slack(msg).posts, m.pack_discord(msg).posts)
+        if errors:
+            failures += 1
+            if failures <= 10:
+                print(f"FAIL: {name}: {'; '.join(errors[:3])}", file=sys.stderr)
+
+    try:
+        # 1. 한도를 정확히 채운 조각 뒤의 빈 줄 (빈 조각이 생기면 안 됨)
+        os.environ['NOTIFICATION_MAX_POSTS'] = '10'
+        for limit in (m.DISCORD_FIELD_VALUE_LIMIT, m.SLACK_TEXT_LIMIT, m.DISCORD_DESCRIPTION_LIMIT):
+            text = 'a' * limit + '\n\n' + 'b' * limit
+            if any(not chunk for chunk in m.split_text(text, limit)):
+                failures += 1
+                print(f"FAIL: split_text returned an empty chunk at limit {limit}", file=sys.stderr)
+            check(f"full chunk + blank line ({limit})",
+                  m.Message(title='t', sections=(m.Section('완료된 작업', text), m.Section(None, text))))
+
+        # 2. 무작위 메시지: 섹션/필드 수와 길이, 최대 글 수를 바꿔가며
+        start = time.perf_counter()
+        for i in range(fuzz_count):
+            sections = []
+            for _ in range(rng.randint(0, 6)):
+                style = rng.choice(('text', 'text', 'quote', 'code', 'question'))
+                title = rng.choice((None, '완료된 작업', '사용 방법')) if style == 'text' else '사용자 요청'
+                body = _random_section_body(rng, rng.choice((10, 500, 1500, 3500, 9000, 30000)))
+                sections.append(m.Section(title, body, icon='🎯', style=style))
+            fields = tuple(m.Field(f"f{n}", 'v' * rng.choice((3, 50, 3000))) for n in range(rng.randint(0, 30)))
+            msg = m.Message(title='T' * rng.choice((10, 300)), icon='✅', severity='success',
+                            timestamp=1.0, fields=fields, sections=tuple(sections))
+            os.environ['NOTIFICATION_MAX_POSTS'] = rng.choice(('1', '3', '10'))
+            check(f"message {i}", msg)
+            check(f"text {i}", m.Message.from_text(_random_section_body(rng, rng.choice((100, 5000, 50000)))))
+        print(f"Fuzz: {fuzz_count} random messages in {time.perf_counter() - start:.2f}s")
+    finally:
+        if previous is None:
+            os.environ.pop('NOTIFICATION_MAX_POSTS', None)
+        else:
+            os.environ['NOTIFICATION_MAX_POSTS'] = previous
+
+    print(f"{'PASS' if not failures else 'FAIL'}: every Slack block/Discord field is non-empty and "
+          f"within channel limits ({failures} failing input(s))")
+    return not failures
+
+
+def _measure_command(command: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Notification hook benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    prefilter = subparsers.add_parser('prefilter', help='share of transcript lines skipped by the byte prefilter')
+    prefilter.add_argument('transcripts', nargs='*', help='transcript JSONL files (default: ~/.claude/projects)')
+
+    index = subparsers.add_parser('index', help='offset index build time and Notification lookup vs. reverse scan')
+    index.add_argument('transcripts', nargs='*', help='transcript JSONL files (default: ~/.claude/projects)')
+
+    markdown = subparsers.add_parser('markdown', help='compare the markdown section extractor with the legacy '
+                                                      'regexes and check linear time')
+    markdown.add_argument('--fuzz', type=int, default=2000, help='number of random documents')
+    markdown.add_argument('--legacy', action='store_true', help='also time the previous regex patterns (slow)')
+
+    marker_parser = subparsers.add_parser('markers', help='marker matcher cost vs. number of markers')
+    marker_parser.add_argument('transcripts', nargs='*', help='transcript JSONL files (default: ~/.claude/projects)')
+
+    startup = subparsers.add_parser('startup', help='hook wall-clock time per event type and import cost')
+    startup.add_argument('--runs', type=int, default=10, help='runs per event type')
+    startup.add_argument('transcripts', nargs='*', help='transcript for Stop/Notification (default: synthetic)')
+
+    transport_parser = subparsers.add_parser('transport', help='webhook handshakes and time: urllib vs. keep-alive pool')
+    transport_parser.add_argument('--events', type=int, default=20, help='number of dispatches')
+    transport_parser.add_argument('--urls', type=int, default=3, help='local server URLs per dispatch')
+    transport_parser.add_argument('--handshake-ms', type=float, default=50.0,
+                                  help='local server delay per new connection')
+    transport_parser.add_argument('--url', action='append', default=[],
+                                  help='send to this webhook instead of the local server (posts real messages)')
+
+    aggregator_parser = subparsers.add_parser('aggregator', help='webhook posts: per-host sends vs. central aggregator')
+    aggregator_parser.add_argument('--hosts', type=int, default=5, help='number of fake hosts')
+    aggregator_parser.add_argument('--events', type=int, default=10, help='Stop events per host')
+    aggregator_parser.add_argument('--window', type=float, default=2.0, help='digest window (seconds)')
+
+    pack = subparsers.add_parser('pack', help='check long messages split into non-empty parts within channel limits')
+    pack.add_argument('--fuzz', type=int, default=300, help='number of random messages')
+
+    args = parser.parse_args()
+
+    if args.command == 'markdown':
+        sys.exit(0 if bench_markdown(args.fuzz, args.legacy) else 1)
+    if args.command == 'pack':
+        sys.exit(0 if bench_pack(args.fuzz) else 1)
+    if args.command == 'transport':
+        bench_transport(args.url, args.events, args.urls, args.handshake_ms)
+        return
+    if args.command == 'aggregator':
+        bench_aggregator(args.hosts, args.events, args.window)
+        return
+    if args.command == 'startup':
+        # 합성 transcript로 재현 가능하게 측정 (지정한 경우만 실제 transcript 사용)
+        sys.exit(0 if bench_startup(args.transcripts[:1], args.runs) else 1)
+
+    paths = args.transcripts or _default_transcripts()
+    if args.command == 'markers':
+        # transcript가 없으면 합성 텍스트로 측정
+        bench_markers(paths)
+        return
+    if not paths:
+        print("No transcripts found", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'prefilter':
+        bench_prefilter(paths)
+    if args.command == 'index':
+        sys.exit(0 if bench_index(paths) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+알림 플러그인 로컬 상태 저장소
+
+훅 실행 사이에 유지해야 하는 상태(transcript 커서 등)를
+사용자 캐시 디렉토리 아래에 JSON 파일로 저장합니다.
+
+경로:
+  $NOTIFICATION_CACHE_DIR (설정된 경우)
+  또는 $XDG_CACHE_HOME/claude-notification (기본: ~/.cache/claude-notification)
+
+사용법:
+    from cache import get_cache_dir, read_json, write_json_atomic
+
+    path = os.path.join(get_cache_dir('cursors'), 'abc.json')
+    write_json_atomic(path, {'offset': 123})
+    data = read_json(path)
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+from typing import Any, Optional
+
+
+def get_cache_dir(*parts: str) -> str:
+    """캐시 디렉토리 경로 반환 (없으면 생성)"""
+    base = os.environ.get('NOTIFICATION_CACHE_DIR')
+    if not base:
+        xdg = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        base = os.path.join(xdg, 'claude-notification')
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def safe_filename(name: str) -> str:
+    """세션 ID 등을 파일명으로 쓸 수 있게 정리 (경로 구분자 등 제거)"""
+    import re
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)[:128] or '_'
+
+
+def read_json(path: str) -> Optional[Any]:
+    """JSON 파일 읽기 (없거나 손상되었으면 None)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError) as e:
+        print(f"[Cache] Read error ({path}): {e}", file=sys.stderr)
+        return None
+
+
+def write_json_atomic(path: str, data: Any) -> bool:
+    """임시 파일에 쓴 뒤 rename하여 원자적으로 JSON 저장"""
+    directory = os.path.dirname(path)
+    # tempfile.mkstemp와 같은 방식 (O_EXCL, 권한 600) - tempfile import 비용을 피함
+    tmp_path = os.path.join(directory, f".tmp-{os.getpid()}-{os.urandom(6).hex()}.json")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return True
+    except OSError as e:
+        print(f"[Cache] Write error ({path}): {e}", file=sys.stderr)
+        return False
+
+
+def prune_stale_files(directory: str, max_age: float) -> None:
+    """max_age(초) 동안 갱신되지 않은 파일 정리"""
+    now = time.time()
+    try:
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if now - os.path.getmtime(path) > max_age:
+                os.unlink(path)
+    except OSError:
+        pass
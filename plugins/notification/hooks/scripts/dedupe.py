@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+중복 알림 방지 (지문 + TTL 저장소)
+
+같은 턴에 Stop이 다시 호출되거나(stop_hook_active, 훅 재진입) 사용자가 자리를
+비운 동안 같은 AskUserQuestion에 대한 Notification이 반복되면 똑같은 알림이
+여러 번 전송됩니다. 보낸 알림의 지문을 TTL 동안 디스크에 기억해 두고 같은
+지문이면 건너뜁니다.
+
+지문은 두 단계입니다:
+- 이벤트 지문: 세션/이벤트 필드 + transcript 상태(inode, 크기, 수정 시각).
+  transcript가 그대로면 메시지도 같으므로 메시지를 만들기 전에 건너뜀
+- 메시지 지문: 세션/이벤트 + 현재 턴(마지막 사용자 요청) + 렌더링된 메시지 (시각처럼
+  매번 바뀌는 줄 제외). transcript에 무관한 레코드만 추가되어 내용이 같은 경우를 잡음.
+  같은 요청을 다시 입력한 새 턴은 턴이 달라 중복으로 보지 않음
+
+경로: $NOTIFICATION_CACHE_DIR/dedupe.json ({지문: 만료 시각})
+
+사용법:
+    from dedupe import event_fingerprint, message_fingerprint, is_recent, remember
+
+    keys = [event_fingerprint(event_data)]
+    if is_recent(*keys):
+        return
+"""
+from __future__ import annotations
+import os
+import time
+from typing import Optional
+
+from cache import get_cache_dir, read_json, write_json_atomic
+
+# 파일 잠금 (Unix만 - 없으면 잠금 없이 저장, 동시 실행시 일부 지문을 잃을 수 있음)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# 지문을 기억하는 시간 (초)
+DEDUPE_TTL = _env_float("NOTIFICATION_DEDUPE_TTL", 600.0)
+
+# 저장소 최대 지문 수 (넘으면 먼저 만료되는 것부터 정리)
+DEDUPE_MAX_ENTRIES = 1000
+
+
+def is_dedupe_enabled() -> bool:
+    return os.environ.get("ENABLE_DEDUPE", "true").lower() == "true" and DEDUPE_TTL > 0
+
+
+def _store_path() -> str:
+    return os.path.join(get_cache_dir(), 'dedupe.json')
+
+
+def _hash(*parts: object) -> str:
+    import hashlib
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8', 'replace'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:32]
+
+
+def event_fingerprint(event_data: dict, transcript_path: Optional[str] = None) -> Optional[str]:
+    """
+    이벤트 필드 + transcript 상태 지문 (메시지 생성 전에 계산)
+
+    Returns:
+        지문 또는 None (중복 방지가 꺼져 있거나 transcript를 확인할 수 없음)
+    """
+    path = transcript_path or event_data.get('transcript_path')
+    if not path or not is_dedupe_enabled():
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _hash(
+        'event',
+        event_data.get('session_id'),
+        event_data.get('hook_event_name'),
+        event_data.get('stop_reason'),
+        event_data.get('message'),
+        event_data.get('reason'),
+        st.st_ino, st.st_size, st.st_mtime_ns,
+    )
+
+
+def message_fingerprint(event_data: dict, message: str, transcript_path: Optional[str] = None) -> Optional[str]:
+    """
+    세션/이벤트 + 현재 턴 + 메시지 내용 지문
+
+    Args:
+        message: 매번 바뀌는 줄을 뺀 메시지 텍스트
+        transcript_path: 현재 턴을 찾을 transcript (기본값: event_data의 transcript_path)
+
+    Returns:
+        지문 또는 None (중복 방지가 꺼져 있음)
+    """
+    if not is_dedupe_enabled():
+        return None
+    turn = turn_id(transcript_path or event_data.get('transcript_path'))
+    return _hash('message', event_data.get('session_id'), event_data.get('hook_event_name'), turn, message)
+
+
+# transcript 상태 → 턴 식별자 (메시지 지문과 집계 서버 레코드 ID가 한 번 찾은 값을 같이 씀)
+_turn_cache: dict[tuple, Optional[str]] = {}
+
+
+def turn_id(transcript_path: Optional[str]) -> Optional[str]:
+    """transcript의 현재 턴 식별자 (transcript.find_turn_id - transcript가 그대로면 다시 찾지 않음)"""
+    if not transcript_path:
+        return None
+    try:
+        st = os.stat(transcript_path)
+    except OSError:
+        return None
+    key = (transcript_path, st.st_ino, st.st_size, st.st_mtime_ns)
+    if key not in _turn_cache:
+        from transcript import find_turn_id
+
+        _turn_cache.clear()
+        _turn_cache[key] = find_turn_id(transcript_path)
+    return _turn_cache[key]
+
+
+def _load(now: float) -> dict[str, float]:
+    data = read_json(_store_path())
+    if not isinstance(data, dict):
+        return {}
+    return {key: expires for key, expires in data.items()
+            if isinstance(expires, (int, float)) and expires > now}
+
+
+def is_recent(*fingerprints: Optional[str]) -> bool:
+    """지문 중 하나라도 TTL 안에 전송된 적이 있으면 True"""
+    keys = [key for key in fingerprints if key]
+    if not keys or not is_dedupe_enabled():
+        return False
+    store = _load(time.time())
+    return any(key in store for key in keys)
+
+
+def remember(*fingerprints: Optional[str]) -> None:
+    """전송한 알림의 지문 기록 (만료된 지문은 정리)"""
+    keys = [key for key in fingerprints if key]
+    if not keys or not is_dedupe_enabled():
+        return
+
+    lock = None
+    try:
+        if FCNTL_AVAILABLE:
+            lock = open(os.path.join(get_cache_dir(), 'dedupe.lock'), 'a')
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+        now = time.time()
+        store = _load(now)
+        for key in keys:
+            store[key] = now + DEDUPE_TTL
+        if len(store) > DEDUPE_MAX_ENTRIES:
+            store = dict(sorted(store.items(), key=lambda item: item[1])[-DEDUPE_MAX_ENTRIES:])
+        write_json_atomic(_store_path(), store)
+    except OSError:
+        pass
+    finally:
+        if lock is not None:
+            lock.close()
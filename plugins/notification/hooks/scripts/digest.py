@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+알림 묶음 (digest)
+
+여러 세션이 몇 초 간격으로 끝나면 Stop마다 Slack/Discord 글이 따로 올라가서
+웹훅 한도를 쓰고 채널을 도배합니다. 스풀 데몬은 묶음 창(window)이 설정된
+채널의 Stop/SessionEnd 메시지를 채널별로 모았다가, 창이 끝나거나 최대 개수가
+차면 세션별 한 줄짜리 묶음 메시지 하나로 보냅니다 (한 건뿐이면 원래 메시지).
+
+Notification(응답 대기)은 바로 확인해야 하므로 묶지 않습니다.
+
+설정:
+  NOTIFICATION_DIGEST_WINDOW: 묶음 창 (초, 기본값: 0 = 묶지 않음)
+  <CHANNEL>_DIGEST_WINDOW: 채널별 창 (예: SLACK_DIGEST_WINDOW, DISCORD_DIGEST_WINDOW)
+  NOTIFICATION_DIGEST_MAX_EVENTS: 이만큼 모이면 창이 끝나기 전에 전송 (기본값: 10)
+
+사용법:
+    from digest import DigestBuffer, digest_window
+
+    buffer = DigestBuffer()
+    buffer.add('slack', DigestItem(message, line, kind, key), window=digest_window('slack'))
+    for channel, items in buffer.pop_due():
+        ...
+"""
+from __future__ import annotations
+import os
+import time
+from typing import NamedTuple, Optional
+
+from message import Message
+
+
+# 묶을 수 있는 이벤트
+DIGEST_EVENTS = ('Stop', 'SessionEnd')
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def digest_window(channel: str) -> float:
+    """채널(CHANNELS 키)의 묶음 창 (초, 0이면 묶지 않음)"""
+    default = _env_float("NOTIFICATION_DIGEST_WINDOW", 0.0)
+    return max(0.0, _env_float(f"{channel.upper()}_DIGEST_WINDOW", default))
+
+
+def digest_max_events() -> int:
+    return max(1, int(_env_float("NOTIFICATION_DIGEST_MAX_EVENTS", 10)))
+
+
+class DigestItem(NamedTuple):
+    """묶음에 들어갈 이벤트 하나"""
+    message: Message    # 단독으로 보낼 때의 원래 메시지
+    line: str           # 묶음 메시지의 한 줄 요약
+    kind: str           # 묶음 제목용 이벤트 종류 (end_turn, SessionEnd 등)
+    key: str            # 이벤트 식별자 (스풀 파일 경로 - 모든 묶음이 전송되면 삭제)
+
+
+class DigestBuffer:
+    """채널별로 이벤트를 모아 창이 끝나거나 가득 차면 내보내는 버퍼"""
+
+    def __init__(self, max_events: Optional[int] = None):
+        self.max_events = max_events or digest_max_events()
+        # 채널 표시 이름 → (창이 끝나는 시각, [DigestItem, ...])
+        self._buffers: dict[str, tuple[float, list[DigestItem]]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._buffers)
+
+    def add(self, channel: str, item: DigestItem, window: float) -> None:
+        """채널 버퍼에 추가 (첫 이벤트가 창을 시작)"""
+        if channel not in self._buffers:
+            self._buffers[channel] = (time.monotonic() + window, [])
+        self._buffers[channel][1].append(item)
+
+    def pop_due(self, force: bool = False) -> list[tuple[str, list[DigestItem]]]:
+        """창이 끝났거나 가득 찬 채널의 이벤트를 꺼냄 (force면 전부)"""
+        now = time.monotonic()
+        due = [
+            channel for channel, (flush_at, items) in self._buffers.items()
+            if force or now >= flush_at or len(items) >= self.max_events
+        ]
+        return [(channel, self._buffers.pop(channel)[1]) for channel in due]
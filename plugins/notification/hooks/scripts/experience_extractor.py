@@ -13,94 +13,194 @@ Claude Code Stop 훅에서 Claude의 응답을 분석하여:
     completion_summary, usage_guide = generate_experience_summary(event_data)
 """
 from __future__ import annotations
-import json
 import os
 import re
-from typing import Optional
+from typing import Callable, Optional
 
+from markdown_sections import Block, tokenize_markdown, list_after_heading
+from markers import MarkerMatcher, load_marker_config
+from transcript import find_latest_marked_texts, resolve_transcript_path
 
-def _get_transcript_path(event_data: dict) -> Optional[str]:
-    """이벤트 데이터에서 transcript 경로 구성"""
-    transcript_path = event_data.get('transcript_path')
 
-    if not transcript_path:
-        cwd = event_data.get('cwd', '')
-        session_id = event_data.get('session_id', '')
-        if cwd and session_id:
-            project_path = cwd.replace('/', '-')
-            if not project_path.startswith('-'):
-                project_path = '-' + project_path
-            home = os.path.expanduser('~')
-            transcript_path = os.path.join(
-                home, '.claude', 'projects', project_path, f'{session_id}.jsonl'
-            )
+# 섹션 마커 (markers.json, EXPERIENCE_MARKERS_FILE 환경변수로 변경 가능)
+MARKER_CONFIG: dict[str, list[str]] = load_marker_config()
+COMPLETION_MARKERS: list[str] = MARKER_CONFIG.get('completion', [])
+USAGE_MARKERS: list[str] = MARKER_CONFIG.get('usage', [])
+
+# 모든 종류의 마커를 한 번에 찾는 매처
+_MARKER_MATCHER = MarkerMatcher(MARKER_CONFIG)
+
+EXPERIENCE_KINDS: tuple[str, ...] = ('completion', 'usage')
+
+
+def classify_experience_text(text: str) -> list[str]:
+    """
+    assistant text가 포함한 섹션 종류 반환 ('completion', 'usage')
+
+    transcript 증분 스캔의 text_classifier로 사용하여
+    종류별 최신 텍스트만 보관하게 합니다.
+    """
+    kinds = _MARKER_MATCHER.kinds(text)
+    return [kind for kind in EXPERIENCE_KINDS if kind in kinds]
 
-    return transcript_path if transcript_path and os.path.exists(transcript_path) else None
 
+def _get_transcript_path(event_data: dict) -> Optional[str]:
+    """이벤트 데이터에서 transcript 경로 구성"""
+    return resolve_transcript_path(
+        event_data.get('transcript_path'),
+        event_data.get('cwd', ''),
+        event_data.get('session_id', ''),
+    )
 
-def _extract_assistant_texts(transcript_path: str) -> list[str]:
+
+def _find_marked_texts(transcript_path: str) -> dict[str, str]:
     """
-    Transcript에서 모든 assistant text 응답 추출 (역순 아님, 원래 순서)
+    파일 끝에서부터 완료/사용법 마커가 있는 가장 최근 assistant text 탐색
+
+    두 종류를 모두 찾으면 멈추므로 세션 전체의 텍스트를 모으지 않습니다.
 
     Returns:
-        assistant text 응답 목록
+        {'completion': 텍스트, 'usage': 텍스트} (찾지 못한 종류는 없음)
     """
-    texts = []
-
-    try:
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                    if obj.get('type') == 'assistant':
-                        content = obj.get('message', {}).get('content', [])
-                        if isinstance(content, list):
-                            for item in content:
-                                if isinstance(item, dict) and item.get('type') == 'text':
-                                    text = item.get('text', '')
-                                    if text:
-                                        texts.append(text)
-                except json.JSONDecodeError:
-                    continue
-    except (FileNotFoundError, PermissionError, IOError):
-        pass
-
-    return texts
-
-
-def _find_completion_section(texts: list[str]) -> Optional[str]:
+    return find_latest_marked_texts(transcript_path, classify_experience_text, EXPERIENCE_KINDS)
+
+
+def _find_marked_sections(texts: list[str]) -> dict[str, str]:
     """
-    마지막부터 '완료' 관련 섹션 포함하는 텍스트 찾기
-
-    완료 마커 패턴:
-    - ## 완료 요약
-    - ## 완료
-    - ## Phase 7:  (보통 마지막 단계)
-    - ## 구현 완료
-    - ## 작업 완료
+    마지막부터 완료/사용법 마커를 포함하는 텍스트 찾기 (텍스트마다 한 번만 스캔)
+
+    Returns:
+        {'completion': 텍스트, 'usage': 텍스트} (찾지 못한 종류는 없음)
     """
-    completion_markers = [
-        '## 완료 요약',
-        '## 완료',
-        '## 구현 완료',
-        '## 작업 완료',
-        '## Phase 7',  # 계획 마지막 단계
-        '작업이 완료되었습니다',
-        '구현이 완료되었습니다',
-    ]
-
-    # 마지막부터 탐색
+    found: dict[str, str] = {}
     for text in reversed(texts):
-        for marker in completion_markers:
-            if marker in text:
-                return text
+        for kind in classify_experience_text(text):
+            found.setdefault(kind, text)
+        if len(found) == len(EXPERIENCE_KINDS):
+            break
+    return found
+
+
+def _heading_key(text: str) -> str:
+    """제목 비교용: 공백 제거 + 소문자 ('구현 완료' → '구현완료')"""
+    return ''.join(text.split()).lower()
+
+
+# 완료 섹션 제목 (우선순위 순서, 공백 무시)
+COMPLETION_HEADINGS: tuple[str, ...] = ('완료', '구현완료', '작업완료')
+
+# 파일 목록 섹션 제목: (접두어, 접두어와 '파일' 사이에 올 수 있는 글자)
+FILE_HEADING_PREFIXES: tuple[str, ...] = ('생성', '수정', '변경')
+FILE_HEADINGS_EN: tuple[str, ...] = ('createdfiles', 'modifiedfiles')
+
+# 작업 문장 키워드 / 어미 (예: "로그인 기능을 구현했습니다.")
+ACTION_KEYWORDS: tuple[str, ...] = ('구현', '추가', '생성', '수정', '완료')
+_ACTION_SUFFIX_CHARS = frozenset('했습니다되었.')
+_ACTION_EN_RE = re.compile(r'Added|Created|Implemented|Modified|Updated')
+
+
+def _is_file_heading(key: str) -> bool:
+    """'수정된 파일', '생성 파일', 'Modified Files' 등"""
+    for prefix in FILE_HEADING_PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):].lstrip('된').startswith('파일')
+    return False
 
+
+def _find_heading_list(blocks: list[Block], matches: Callable[[str], bool], kind: str) -> Optional[list[str]]:
+    """조건에 맞는 첫 제목(## 이상) 바로 아래의 리스트 항목"""
+    for index, block in enumerate(blocks):
+        if block.kind == 'heading' and block.level >= 2 and matches(_heading_key(block.text)):
+            items = list_after_heading(blocks, index, kind)
+            if items is not None:
+                return items
+    return None
+
+
+def _first_backtick_span(text: str) -> Optional[str]:
+    """`...` 안의 첫 번째 (비어있지 않은) 내용"""
+    start = text.find('`')
+    while start >= 0:
+        end = text.find('`', start + 1)
+        if end < 0:
+            return None
+        if end > start + 1:
+            return text[start + 1:end]
+        start = end
     return None
 
 
+def _is_word_or_space(ch: str) -> bool:
+    return ch.isalnum() or ch == '_' or ch.isspace()
+
+
+def _find_action_sentences(text: str, limit: int = 3) -> list[str]:
+    """
+    "…구현했습니다." 형태의 한국어 작업 문장 찾기 (입력 길이에 선형)
+
+    단어/공백으로 이어진 구간마다 가장 뒤에 있는 "키워드 + 어미"까지를
+    한 문장으로 봅니다. 각 구간은 키워드별로 한 번씩만 역방향 탐색합니다.
+    """
+    sentences: list[str] = []
+    length = len(text)
+    i = 0
+    while i < length and len(sentences) < limit:
+        if not _is_word_or_space(text[i]):
+            i += 1
+            continue
+
+        run_end = i
+        while run_end < length and _is_word_or_space(text[run_end]):
+            run_end += 1
+
+        # 구간 안에서 어미가 바로 뒤따르는 가장 뒤쪽 키워드 (구간 첫 글자는 제외)
+        best = -1
+        best_end = -1
+        for keyword in ACTION_KEYWORDS:
+            end = run_end
+            while True:
+                pos = text.rfind(keyword, i + 1, end)
+                if pos <= best:
+                    break
+                after = pos + len(keyword)
+                if after < length and text[after] in _ACTION_SUFFIX_CHARS:
+                    best, best_end = pos, after
+                    break
+                end = pos + len(keyword) - 1
+
+        if best < 0:
+            i = run_end
+            continue
+
+        while best_end < length and text[best_end] in _ACTION_SUFFIX_CHARS:
+            best_end += 1
+        sentences.append(text[i:best_end])
+        i = best_end
+
+    return sentences
+
+
+def _find_english_action_sentences(text: str, limit: int = 3) -> list[str]:
+    """"Added ... ." 형태의 영어 작업 문장 찾기 (입력 길이에 선형)"""
+    sentences: list[str] = []
+    pos = 0
+    while len(sentences) < limit:
+        match = _ACTION_EN_RE.search(text, pos)
+        if not match:
+            break
+        after = match.end()
+        # 키워드 뒤 공백 1개 이상 + 마침표 전에 한 글자 이상
+        dot = text.find('.', after)
+        if dot < 0:
+            break
+        if after < len(text) and text[after].isspace() and dot >= after + 2:
+            sentences.append(text[match.start():dot + 1])
+            pos = dot + 1
+        else:
+            pos = match.start() + 1
+    return sentences
+
+
 def _parse_completion_summary(text: str) -> Optional[str]:
     """
     완료 텍스트에서 주요 내용 추출
@@ -117,66 +217,39 @@ def _parse_completion_summary(text: str) -> Optional[str]:
         return None
 
     lines = []
-
-    # 1. ## 완료 섹션 내용 추출
-    completion_patterns = [
-        r'##\s*완료.*?\n((?:[-*]\s*.+\n?)+)',  # ## 완료 아래 불릿 리스트
-        r'##\s*구현\s*완료.*?\n((?:[-*]\s*.+\n?)+)',
-        r'##\s*작업\s*완료.*?\n((?:[-*]\s*.+\n?)+)',
-    ]
-
-    for pattern in completion_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            bullet_content = match.group(1)
-            for line in bullet_content.strip().split('\n'):
-                line = line.strip()
-                if line.startswith(('-', '*')):
-                    # 불릿 제거하고 내용만
-                    content = re.sub(r'^[-*]\s*', '', line).strip()
-                    if content and len(content) > 5:
-                        lines.append(f"• {content}")
+    blocks = tokenize_markdown(text)
+
+    # 1. ## 완료 섹션 아래 불릿 리스트
+    for heading in COMPLETION_HEADINGS:
+        items = _find_heading_list(blocks, lambda key: key.startswith(heading), 'bullet')
+        if items is not None:
+            for content in items:
+                if content and len(content) > 5:
+                    lines.append(f"• {content}")
             break
 
     # 2. 생성/수정된 파일 섹션 추출
-    file_patterns = [
-        r'###?\s*(?:생성|수정|변경)[된\s]*파일.*?\n((?:[-*]\s*`?.+`?\n?)+)',
-        r'###?\s*(?:Created|Modified)\s*Files.*?\n((?:[-*]\s*`?.+`?\n?)+)',
-    ]
-
-    for pattern in file_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            file_content = match.group(1)
+    for matches in (_is_file_heading, lambda key: key.startswith(FILE_HEADINGS_EN)):
+        items = _find_heading_list(blocks, matches, 'bullet')
+        if items is not None:
             files = []
-            for line in file_content.strip().split('\n'):
-                line = line.strip()
-                if line.startswith(('-', '*')):
-                    # 파일명 추출 (백틱 포함 또는 미포함)
-                    content = re.sub(r'^[-*]\s*', '', line).strip()
-                    # 백틱 안의 내용 또는 전체 라인
-                    file_match = re.search(r'`([^`]+)`', content)
-                    if file_match:
-                        files.append(file_match.group(1))
-                    elif content:
-                        files.append(content.split()[0])  # 첫 단어만
+            for content in items:
+                # 백틱 안의 내용 또는 첫 단어
+                file_name = _first_backtick_span(content)
+                if file_name:
+                    files.append(file_name)
+                elif content:
+                    files.append(content.split()[0])
             if files:
                 # 파일명만 추출하여 간결하게
                 file_names = [os.path.basename(f) for f in files[:5]]
                 lines.append(f"• 파일: {', '.join(file_names)}")
             break
 
-    # 3. 주요 기능 설명 추출 (첫 문단에서)
+    # 3. 주요 기능 설명 추출 ("구현", "추가", "생성" 등의 동사로 끝나는 문장)
     if not lines:
-        # "구현", "추가", "생성" 등의 동사로 시작하는 문장 찾기
-        action_patterns = [
-            r'([가-힣\w\s]+(?:구현|추가|생성|수정|완료)[했습니다되었습니다\.]+)',
-            r'((?:Added|Created|Implemented|Modified|Updated)\s+[^.]+\.)',
-        ]
-
-        for pattern in action_patterns:
-            matches = re.findall(pattern, text)
-            for m in matches[:3]:  # 최대 3개
+        for find_sentences in (_find_action_sentences, _find_english_action_sentences):
+            for m in find_sentences(text):
                 content = m.strip()
                 if len(content) > 10 and len(content) < 100:
                     lines.append(f"• {content}")
@@ -187,39 +260,13 @@ def _parse_completion_summary(text: str) -> Optional[str]:
     return '\n'.join(lines[:5])  # 최대 5줄
 
 
-def _find_usage_section(texts: list[str]) -> Optional[str]:
-    """
-    사용법/테스트 방법 포함하는 텍스트 찾기
-
-    사용법 마커:
-    - ### 사용법
-    - ### 사용 방법
-    - ### 테스트
-    - ### 테스트 방법
-    - ### 설정
-    - ### 환경변수
-    - ### 실행 방법
-    """
-    usage_markers = [
-        '### 사용법',
-        '### 사용 방법',
-        '### 테스트 방법',
-        '### 테스트',
-        '### 설정',
-        '### 환경변수',
-        '### 실행 방법',
-        '### How to use',
-        '### How to test',
-        '### Usage',
-    ]
-
-    # 마지막부터 탐색
-    for text in reversed(texts):
-        for marker in usage_markers:
-            if marker in text:
-                return text
+# 사용법 섹션 제목 (공백 무시)
+USAGE_HEADINGS: tuple[str, ...] = ('사용법', '사용방법', '테스트', '실행방법')
 
-    return None
+# 명령어로 취급할 코드 블록 언어 (빈 값: 언어 미지정)
+SHELL_CODE_LANGUAGES: tuple[str, ...] = ('', 'bash', 'shell', 'sh')
+
+_LOCAL_URL_RE = re.compile(r'https?://(?:localhost|127\.0\.0\.1)[:\d]*[^\s)"\']*')
 
 
 def _parse_usage_guide(text: str) -> Optional[str]:
@@ -238,14 +285,13 @@ def _parse_usage_guide(text: str) -> Optional[str]:
         return None
 
     lines = []
+    blocks = tokenize_markdown(text)
 
     # 1. 코드 블록에서 bash/shell 명령어 추출
-    code_pattern = r'```(?:bash|shell|sh)?\n([\s\S]*?)```'
-    code_matches = re.findall(code_pattern, text)
-
-    for code in code_matches:
-        code_lines = code.strip().split('\n')
-        for line in code_lines:
+    for block in blocks:
+        if block.kind != 'code' or block.text not in SHELL_CODE_LANGUAGES:
+            continue
+        for line in block.lines:
             line = line.strip()
             # 주석이나 빈 줄 제외
             if line and not line.startswith('#'):
@@ -255,30 +301,19 @@ def _parse_usage_guide(text: str) -> Optional[str]:
         if len(lines) >= 3:
             break
 
-    # 2. 사용법 섹션 아래 불릿/번호 리스트 추출
-    usage_patterns = [
-        r'###?\s*(?:사용법|사용\s*방법|테스트|실행\s*방법).*?\n((?:\d+\.\s*.+\n?)+)',
-        r'###?\s*(?:사용법|사용\s*방법|테스트|실행\s*방법).*?\n((?:[-*]\s*.+\n?)+)',
-    ]
-
-    for pattern in usage_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            list_content = match.group(1)
-            for line in list_content.strip().split('\n'):
-                line = line.strip()
-                if line:
-                    # 번호 또는 불릿 제거
-                    content = re.sub(r'^(\d+\.|-|\*)\s*', '', line).strip()
-                    if content and len(content) > 5:
-                        lines.append(content)
-                        if len(lines) >= 5:
-                            break
+    # 2. 사용법 섹션 아래 번호 리스트 (없으면 불릿 리스트) 추출
+    for kind in ('numbered', 'bullet'):
+        items = _find_heading_list(blocks, lambda key: key.startswith(USAGE_HEADINGS), kind)
+        if items is not None:
+            for content in items:
+                if content and len(content) > 5:
+                    lines.append(content)
+                    if len(lines) >= 5:
+                        break
             break
 
     # 3. URL 추출 (localhost, 127.0.0.1 등)
-    url_pattern = r'(https?://(?:localhost|127\.0\.0\.1)[:\d]*[^\s\)\"\']*)'
-    url_matches = re.findall(url_pattern, text)
+    url_matches = _LOCAL_URL_RE.findall(text)
     for url in url_matches[:2]:  # 최대 2개
         if url not in '\n'.join(lines):
             lines.append(f"접속: {url}")
@@ -297,6 +332,15 @@ def _parse_usage_guide(text: str) -> Optional[str]:
     return '\n'.join(unique_lines[:5])
 
 
+def _summaries_from_marked(marked: dict[str, str]) -> tuple[Optional[str], Optional[str]]:
+    """종류별 텍스트 → (완료 요약, 사용 가이드)"""
+    completion_text = marked.get('completion')
+    usage_text = marked.get('usage')
+    completion_summary = _parse_completion_summary(completion_text) if completion_text else None
+    usage_guide = _parse_usage_guide(usage_text) if usage_text else None
+    return completion_summary, usage_guide
+
+
 def extract_completion_summary(transcript_path: str) -> Optional[str]:
     """
     Claude 응답에서 '완료 요약' 섹션 추출
@@ -310,15 +354,8 @@ def extract_completion_summary(transcript_path: str) -> Optional[str]:
     if not transcript_path:
         return None
 
-    texts = _extract_assistant_texts(transcript_path)
-    if not texts:
-        return None
-
-    completion_text = _find_completion_section(texts)
-    if not completion_text:
-        return None
-
-    return _parse_completion_summary(completion_text)
+    completion_text = _find_marked_texts(transcript_path).get('completion')
+    return _parse_completion_summary(completion_text) if completion_text else None
 
 
 def extract_usage_guide(transcript_path: str) -> Optional[str]:
@@ -334,18 +371,14 @@ def extract_usage_guide(transcript_path: str) -> Optional[str]:
     if not transcript_path:
         return None
 
-    texts = _extract_assistant_texts(transcript_path)
-    if not texts:
-        return None
-
-    usage_text = _find_usage_section(texts)
-    if not usage_text:
-        return None
-
-    return _parse_usage_guide(usage_text)
+    usage_text = _find_marked_texts(transcript_path).get('usage')
+    return _parse_usage_guide(usage_text) if usage_text else None
 
 
-def generate_experience_summary(event_data: dict) -> tuple[Optional[str], Optional[str]]:
+def generate_experience_summary(
+    event_data: dict,
+    scan: Optional[dict] = None
+) -> tuple[Optional[str], Optional[str]]:
     """
     Stop 이벤트에서 호출할 메인 함수
 
@@ -353,20 +386,23 @@ def generate_experience_summary(event_data: dict) -> tuple[Optional[str], Option
 
     Args:
         event_data: Stop 훅으로 전달된 이벤트 데이터
+        scan: scan_transcript()의 반환값 (주어지면 transcript를 다시 읽지 않음)
 
     Returns:
         (completion_summary, usage_guide) 튜플
         - completion_summary: "어떤 기능이 추가/수정되었는지"
         - usage_guide: "어떻게 테스트/사용해볼 수 있는지"
     """
+    if scan is not None:
+        # 한 번 추출한 assistant text를 두 섹션이 공유
+        return _summaries_from_marked(_find_marked_sections(scan['assistant_texts']))
+
     transcript_path = _get_transcript_path(event_data)
     if not transcript_path:
         return None, None
 
-    completion_summary = extract_completion_summary(transcript_path)
-    usage_guide = extract_usage_guide(transcript_path)
-
-    return completion_summary, usage_guide
+    # 한 번의 역방향 탐색으로 두 섹션의 텍스트를 함께 찾음
+    return _summaries_from_marked(_find_marked_texts(transcript_path))
 
 
 # CLI로 직접 실행시 테스트
@@ -376,9 +412,9 @@ if __name__ == '__main__':
     if len(sys.argv) > 1:
         # 인자로 transcript 경로 전달
         path = sys.argv[1]
+        summary, guide = generate_experience_summary({'transcript_path': path})
 
         print("=== Completion Summary ===")
-        summary = extract_completion_summary(path)
         if summary:
             print(summary)
         else:
@@ -386,7 +422,6 @@ if __name__ == '__main__':
 
         print()
         print("=== Usage Guide ===")
-        guide = extract_usage_guide(path)
         if guide:
             print(guide)
         else:
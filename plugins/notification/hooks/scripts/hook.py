@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+훅 진입점 (hooks.json에서 실행)
+
+스크립트로 직접 실행한 파일은 바이트코드 캐시를 쓰지 못하고 매번 컴파일되므로,
+notifier.py(큰 모듈)를 import해서 __pycache__의 바이트코드로 실행합니다.
+"""
+from notifier import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+스트리밍 JSON 추출기
+
+한 줄이 수 MB에 이르는 transcript 레코드(Write의 content, Read 결과 등)를
+줄 전체를 메모리에 올리지 않고 청크 단위로 토큰화합니다.
+긴 문자열 값은 앞부분(max_string 바이트)만 남기고 나머지는 할당 없이 건너뛰므로,
+페이로드 크기와 관계없이 메모리 사용량이 일정합니다.
+
+필요한 키(name, command, file_path, type, id 등)는 짧은 문자열이라
+그대로 남고, 나머지 구조도 유지되므로 json.loads() 결과 대신 사용할 수 있습니다.
+
+사용법:
+    from jsonstream import StreamReader
+
+    f.seek(line_start)
+    reader = StreamReader(f.read, max_string=64 * 1024)
+    obj = reader.parse_value()       # 긴 문자열은 앞부분만 남은 dict
+    reader.skip_past(b'\\n')         # 줄 끝까지 건너뜀
+    next_offset = line_start + reader.consumed
+"""
+from __future__ import annotations
+import json
+import re
+from typing import Callable, Optional
+
+
+# 읽기 청크 크기
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 문자열 안에서 다음으로 확인할 바이트 (닫는 따옴표 또는 이스케이프)
+_STRING_STOP_RE = re.compile(rb'["\\]')
+
+# 숫자 토큰
+_NUMBER_RE = re.compile(rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?')
+
+_WHITESPACE = b' \t\r\n'
+
+# 중첩 깊이 제한 (재귀 파서 보호)
+MAX_DEPTH = 200
+
+# 객체 키에서 보관할 최대 바이트 수 (키는 max_string과 관계없이 보관)
+MAX_KEY = 1024
+
+
+class StreamReader:
+    """
+    청크 단위로 읽으면서 JSON 값을 하나 파싱하는 리더
+
+    Args:
+        read: read(n) → bytes 함수 (예: 파일 객체의 read)
+        max_string: 문자열 값에서 보관할 최대 바이트 수 (초과분은 건너뜀)
+        chunk_size: 한 번에 읽을 바이트 수
+    """
+
+    def __init__(self, read: Callable[[int], bytes], max_string: int = 64 * 1024,
+                 chunk_size: int = STREAM_CHUNK_SIZE):
+        self._read = read
+        self._chunk_size = chunk_size
+        self.max_string = max_string
+        self._buf = b''
+        self._pos = 0
+        # 버퍼에서 버린 바이트 수 (consumed 계산용)
+        self._dropped = 0
+        self._eof = False
+        # 잘린 문자열 개수
+        self.truncated = 0
+
+    @property
+    def consumed(self) -> int:
+        """지금까지 소비한 바이트 수"""
+        return self._dropped + self._pos
+
+    def _fill(self) -> bool:
+        """버퍼에 청크 하나 추가 (이미 소비한 부분은 버림). 더 읽을 게 없으면 False"""
+        if self._eof:
+            return False
+        chunk = self._read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos:
+            self._dropped += self._pos
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+        else:
+            self._buf += chunk
+        return True
+
+    def _peek(self) -> bytes:
+        """공백을 건너뛰고 다음 바이트 반환 (EOF면 b'')"""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos:pos + 1]
+            if not self._fill():
+                return b''
+
+    def _expect(self, token: bytes) -> None:
+        while len(self._buf) - self._pos < len(token):
+            if not self._fill():
+                break
+        if self._buf[self._pos:self._pos + len(token)] != token:
+            raise ValueError(f"Expected {token!r} at byte {self.consumed}")
+        self._pos += len(token)
+
+    # --------------------------------------------------------
+    # 값 파싱
+    # --------------------------------------------------------
+
+    def parse_value(self, depth: int = 0):
+        """JSON 값 하나 파싱 (긴 문자열은 앞부분만 보관)"""
+        if depth > MAX_DEPTH:
+            raise ValueError("JSON nesting too deep")
+
+        ch = self._peek()
+        if ch == b'{':
+            return self._parse_object(depth)
+        if ch == b'[':
+            return self._parse_array(depth)
+        if ch == b'"':
+            return self._parse_string(self.max_string)
+        if ch == b't':
+            self._expect(b'true')
+            return True
+        if ch == b'f':
+            self._expect(b'false')
+            return False
+        if ch == b'n':
+            self._expect(b'null')
+            return None
+        if ch:
+            return self._parse_number()
+        raise ValueError("Unexpected end of JSON")
+
+    def _parse_object(self, depth: int) -> dict:
+        self._pos += 1  # {
+        result = {}
+        if self._peek() == b'}':
+            self._pos += 1
+            return result
+        while True:
+            if self._peek() != b'"':
+                raise ValueError(f"Expected object key at byte {self.consumed}")
+            key = self._parse_string(max(self.max_string, MAX_KEY))
+            if self._peek() != b':':
+                raise ValueError(f"Expected ':' at byte {self.consumed}")
+            self._pos += 1
+            result[key] = self.parse_value(depth + 1)
+            ch = self._peek()
+            self._pos += 1
+            if ch == b'}':
+                return result
+            if ch != b',':
+                raise ValueError(f"Expected ',' or '}}' at byte {self.consumed}")
+
+    def _parse_array(self, depth: int) -> list:
+        self._pos += 1  # [
+        result = []
+        if self._peek() == b']':
+            self._pos += 1
+            return result
+        while True:
+            result.append(self.parse_value(depth + 1))
+            ch = self._peek()
+            self._pos += 1
+            if ch == b']':
+                return result
+            if ch != b',':
+                raise ValueError(f"Expected ',' or ']' at byte {self.consumed}")
+
+    def _parse_number(self):
+        # 숫자는 짧으므로 청크 경계에 걸리지 않도록 충분히 채움
+        while len(self._buf) - self._pos < 64 and self._fill():
+            pass
+        match = _NUMBER_RE.match(self._buf, self._pos)
+        if not match:
+            raise ValueError(f"Invalid JSON value at byte {self.consumed}")
+        self._pos = match.end()
+        return json.loads(match.group())
+
+    def _parse_string(self, limit: int) -> str:
+        """
+        문자열 파싱: limit 바이트까지만 보관하고 나머지는 건너뜀
+        """
+        self._pos += 1  # 여는 따옴표
+        kept: list[bytes] = []
+        kept_len = 0
+        truncated = False
+
+        while True:
+            match = _STRING_STOP_RE.search(self._buf, self._pos)
+            end = match.start() if match else len(self._buf)
+
+            # [pos, end) 구간은 일반 문자 - 한도 안에서만 보관
+            if kept_len < limit and end > self._pos:
+                take = min(end, self._pos + limit - kept_len)
+                kept.append(self._buf[self._pos:take])
+                kept_len += take - self._pos
+                truncated = truncated or take < end
+            elif end > self._pos:
+                truncated = True
+            self._pos = end
+
+            if not match:
+                if not self._fill():
+                    raise ValueError("Unterminated JSON string")
+                continue
+
+            if self._buf[end:end + 1] == b'"':
+                self._pos = end + 1
+                break
+
+            # 이스케이프: 백슬래시 + 다음 바이트 (\\uXXXX는 이어지는 4바이트도 일반 문자)
+            while len(self._buf) - end < 2:
+                if not self._fill():
+                    raise ValueError("Unterminated JSON string")
+                end = self._pos
+            if kept_len < limit:
+                kept.append(self._buf[end:end + 2])
+                kept_len += 2
+            else:
+                truncated = True
+            self._pos = end + 2
+
+        if truncated:
+            self.truncated += 1
+        return _decode_string(b''.join(kept), truncated)
+
+    # --------------------------------------------------------
+    # 줄 단위 이동
+    # --------------------------------------------------------
+
+    def skip_past(self, delimiter: bytes = b'\n') -> bool:
+        """delimiter 다음 위치까지 건너뜀 (찾지 못하고 EOF면 False)"""
+        while True:
+            index = self._buf.find(delimiter, self._pos)
+            if index >= 0:
+                self._pos = index + len(delimiter)
+                return True
+            self._pos = len(self._buf)
+            if not self._fill():
+                return False
+
+
+def _decode_string(raw: bytes, truncated: bool) -> str:
+    """
+    JSON 문자열 내용(따옴표 제외) 디코딩
+
+    잘린 문자열은 끝부분이 이스케이프나 UTF-8 문자 중간일 수 있으므로
+    디코딩될 때까지 끝에서부터 몇 바이트씩 버립니다.
+    """
+    for trim in range(0, 13 if truncated else 1):
+        candidate = raw[:len(raw) - trim] if trim else raw
+        try:
+            text = json.loads(b'"' + candidate + b'"')
+        except ValueError:
+            continue
+        # 서로게이트 쌍(\ud83d\ude00) 중간에서 잘린 경우 앞쪽 반도 버림
+        if truncated and text and '\ud800' <= text[-1] <= '\udbff':
+            text = text[:-1]
+        return text
+    return raw.decode('utf-8', 'ignore')
+
+
+def parse_stream(read: Callable[[int], bytes], max_string: int = 64 * 1024) -> Optional[object]:
+    """read 함수에서 JSON 값 하나를 파싱 (긴 문자열은 앞부분만 보관)"""
+    return StreamReader(read, max_string=max_string).parse_value()
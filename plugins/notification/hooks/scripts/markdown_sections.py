@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+줄 단위 마크다운 섹션 토크나이저
+
+assistant text(수십 KB)를 한 번의 패스로 블록 단위로 나눕니다:
+- heading:  "## 제목"
+- bullet:   "- 항목", "* 항목", "+ 항목"이 연속된 줄 (들여쓴 하위 항목 포함)
+- numbered: "1. 항목", "1) 항목"이 연속된 줄
+- code:     ``` 또는 ~~~ 펜스 코드 블록
+- text:     그 외 문단
+- blank:    빈 줄
+
+정규식을 쓰지 않고 줄마다 문자열 메서드만 고정 횟수 호출하므로
+(역추적 없음) 최악의 경우에도 처리 시간이 입력 길이에 비례합니다.
+
+사용법:
+    from markdown_sections import tokenize_markdown
+
+    for block in tokenize_markdown(text):
+        if block.kind == 'heading':
+            block.level, block.text
+        elif block.kind in ('bullet', 'numbered'):
+            block.lines   # 마커를 뗀 항목 내용
+        elif block.kind == 'code':
+            block.text, block.lines   # 언어, 코드 줄
+"""
+from __future__ import annotations
+from typing import NamedTuple, Optional
+
+
+class Block(NamedTuple):
+    """마크다운 블록 하나"""
+    kind: str          # heading / bullet / numbered / code / text / blank
+    text: str          # heading: 제목, code: 언어 (그 외 '')
+    level: int         # heading: '#' 개수 (그 외 0)
+    lines: list[str]   # 리스트: 항목 내용, code: 코드 줄, text: 원문 줄
+
+
+_FENCES = ('```', '~~~')
+
+
+def _bullet_item(stripped: str) -> Optional[str]:
+    """'- 항목' → '항목' (불릿이 아니면 None)"""
+    if stripped[:1] in ('-', '*', '+') and (len(stripped) == 1 or stripped[1] in ' \t'):
+        return stripped[1:].strip()
+    return None
+
+
+def _numbered_item(stripped: str) -> Optional[str]:
+    """'1. 항목' → '항목' (번호 목록이 아니면 None)"""
+    digits = 0
+    while digits < len(stripped) and stripped[digits].isdigit():
+        digits += 1
+    if (0 < digits < len(stripped) and stripped[digits] in '.)'
+            and (digits + 1 == len(stripped) or stripped[digits + 1] in ' \t')):
+        return stripped[digits + 1:].strip()
+    return None
+
+
+def tokenize_markdown(text: str) -> list[Block]:
+    """
+    텍스트를 마크다운 블록 목록으로 분리 (입력 길이에 선형)
+
+    Args:
+        text: 마크다운 텍스트
+
+    Returns:
+        원래 순서의 Block 목록
+    """
+    blocks: list[Block] = []
+    # 현재 쌓는 중인 블록 (kind, text, level, lines)
+    kind: Optional[str] = None
+    info = ''
+    lines: list[str] = []
+    fence = ''
+
+    def flush() -> None:
+        nonlocal kind, info, lines
+        if kind is not None:
+            blocks.append(Block(kind, info, 0, lines))
+        kind, info, lines = None, '', []
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+
+        # 코드 블록 내부: 닫는 펜스까지 그대로 보관
+        if fence:
+            if stripped.startswith(fence) and not stripped[len(fence):].strip(fence[0]).strip():
+                fence = ''
+                flush()
+            else:
+                lines.append(line)
+            continue
+
+        if stripped.startswith(_FENCES):
+            flush()
+            fence = stripped[:3]
+            words = stripped[3:].strip(fence[0]).split()
+            kind, info = 'code', (words[0].lower() if words else '')
+            continue
+
+        if not stripped:
+            if kind != 'blank':
+                flush()
+                kind = 'blank'
+            continue
+
+        if stripped.startswith('#'):
+            flush()
+            level = len(stripped) - len(stripped.lstrip('#'))
+            blocks.append(Block('heading', stripped[level:].strip(), level, []))
+            continue
+
+        item = _bullet_item(stripped)
+        if item is not None:
+            if kind != 'bullet':
+                flush()
+                kind = 'bullet'
+            lines.append(item)
+            continue
+
+        item = _numbered_item(stripped)
+        if item is not None:
+            if kind != 'numbered':
+                flush()
+                kind = 'numbered'
+            lines.append(item)
+            continue
+
+        if kind != 'text':
+            flush()
+            kind = 'text'
+        lines.append(line)
+
+    # 닫히지 않은 코드 블록도 그대로 반환 (잘린 텍스트)
+    flush()
+    return blocks
+
+
+def list_after_heading(blocks: list[Block], index: int, kind: str) -> Optional[list[str]]:
+    """
+    blocks[index](제목) 바로 아래의 리스트 항목 (빈 줄은 건너뜀)
+
+    Args:
+        kind: 'bullet' 또는 'numbered'
+
+    Returns:
+        항목 목록 또는 None (제목 다음 블록이 해당 리스트가 아님)
+    """
+    index += 1
+    if index < len(blocks) and blocks[index].kind == 'blank':
+        index += 1
+    if index < len(blocks) and blocks[index].kind == kind:
+        return blocks[index].lines
+    return None
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+섹션 마커 매처
+
+완료/사용법 같은 섹션 마커 목록을 하나의 정규식으로 컴파일해서
+텍스트 한 번 스캔으로 모든 종류의 마커 위치를 찾습니다.
+
+마커 목록은 트라이로 묶어 공통 접두어를 공유하는 정규식으로 만들므로
+('## 완료', '## 완료 요약', '## 구현 완료' → '\\#\\#\\ (?:완료(?:\\ 요약)?|구현\\ 완료)'),
+위치마다 비교하는 양은 마커 개수가 아니라 첫 글자 종류 수에 비례합니다.
+
+마커 목록은 markers.json (기본값)에서 읽고, EXPERIENCE_MARKERS_FILE 환경변수로
+지정한 JSON 파일이 있으면 그 파일에 정의된 종류를 대체합니다:
+    {"completion": ["## 완료", ...], "usage": ["### 사용법", ...]}
+
+사용법:
+    from markers import MarkerMatcher, load_marker_config
+
+    matcher = MarkerMatcher(load_marker_config())
+    matcher.kinds(text)     # {'completion', 'usage'}
+    matcher.find(text)      # [MarkerMatch(start=0, marker='## 완료', kind='completion'), ...]
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import sys
+from typing import NamedTuple, Optional
+
+
+# 기본 마커 목록 파일 (이 스크립트와 같은 디렉토리)
+DEFAULT_MARKERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'markers.json')
+
+
+class MarkerMatch(NamedTuple):
+    """텍스트에서 찾은 마커 하나"""
+    start: int
+    marker: str
+    kind: str
+
+
+def _read_marker_file(path: str) -> dict[str, list[str]]:
+    """{종류: [마커, ...]} 형식의 JSON 파일 읽기 (형식이 틀린 항목은 무시)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[Markers] Read error ({path}): {e}", file=sys.stderr)
+        return {}
+
+    if not isinstance(data, dict):
+        print(f"[Markers] Expected an object of marker lists: {path}", file=sys.stderr)
+        return {}
+
+    config = {}
+    for kind, markers in data.items():
+        if isinstance(markers, list):
+            config[kind] = [marker for marker in markers if isinstance(marker, str) and marker]
+    return config
+
+
+def load_marker_config(path: Optional[str] = None) -> dict[str, list[str]]:
+    """
+    마커 설정 읽기
+
+    기본 파일(markers.json)을 읽은 뒤 EXPERIENCE_MARKERS_FILE (또는 path)에
+    정의된 종류로 대체합니다.
+
+    Returns:
+        {종류: [마커, ...]}
+    """
+    config = _read_marker_file(DEFAULT_MARKERS_FILE)
+    override = path or os.environ.get('EXPERIENCE_MARKERS_FILE')
+    if override:
+        config.update(_read_marker_file(os.path.expanduser(override)))
+    return config
+
+
+def _trie_pattern(node: dict) -> str:
+    """트라이 노드 → 정규식 (끝 표시는 '' 키, 긴 마커를 우선 매칭)"""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # 여기서 끝나는 마커도 있음: 더 긴 마커는 선택적으로 (탐욕적) 매칭
+        return '(?:' + body + ')?'
+    return body
+
+
+class MarkerMatcher:
+    """
+    여러 종류의 마커를 한 번의 스캔으로 찾는 매처
+
+    Args:
+        config: {종류: [마커, ...]}
+    """
+
+    def __init__(self, config: dict[str, list[str]]):
+        self.config = config
+        # 마커 → 종류 목록 (같은 마커가 여러 종류에 있을 수 있음)
+        kinds_by_marker: dict[str, list[str]] = {}
+        for kind, markers in config.items():
+            for marker in markers:
+                kinds_by_marker.setdefault(marker, [])
+                if kind not in kinds_by_marker[marker]:
+                    kinds_by_marker[marker].append(kind)
+
+        trie: dict = {}
+        for marker in kinds_by_marker:
+            node = trie
+            for ch in marker:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+
+        # 한 위치에서는 가장 긴 마커만 매칭되므로, 그 마커의 접두어인 마커도 함께 기록
+        self._prefix_matches: dict[str, list[tuple[str, str]]] = {}
+        for marker in kinds_by_marker:
+            matches = []
+            for end in range(1, len(marker) + 1):
+                prefix = marker[:end]
+                for kind in kinds_by_marker.get(prefix, ()):
+                    matches.append((prefix, kind))
+            self._prefix_matches[marker] = matches
+
+        self._pattern = re.compile(_trie_pattern(trie)) if trie else None
+        self._kind_count = len({kind for kinds in kinds_by_marker.values() for kind in kinds})
+
+    def find(self, text: str) -> list[MarkerMatch]:
+        """텍스트의 모든 마커 위치 (겹치는 마커 포함, 위치 순서)"""
+        found: list[MarkerMatch] = []
+        if self._pattern is None or not text:
+            return found
+
+        search = self._pattern.search
+        match = search(text)
+        while match:
+            for marker, kind in self._prefix_matches[match.group()]:
+                found.append(MarkerMatch(match.start(), marker, kind))
+            # 다른 마커가 이 매치 안에서 시작할 수 있으므로 한 글자 뒤부터 다시 탐색
+            match = search(text, match.start() + 1)
+        return found
+
+    def kinds(self, text: str) -> set[str]:
+        """텍스트에 나타나는 마커 종류 (모든 종류를 찾으면 바로 멈춤)"""
+        found: set[str] = set()
+        if self._pattern is None or not text:
+            return found
+
+        search = self._pattern.search
+        match = search(text)
+        while match:
+            for _, kind in self._prefix_matches[match.group()]:
+                found.add(kind)
+            if len(found) == self._kind_count:
+                break
+            match = search(text, match.start() + 1)
+        return found
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+구조화된 알림 메시지 + 채널별 렌더러
+
+메시지 빌더는 완성된 문자열 대신 Message(제목, 심각도, 필드, 섹션)를 만들고,
+채널마다 자기 형식으로 렌더링합니다. 채널 함수가 문자열을 다시 줄로 나누고
+이모지를 찾아 색상을 고르는 일이 없어집니다.
+
+- text(): 기존 mrkdwn 텍스트 (중복 확인 지문, 집계 서버 레코드, render가 없는 채널)
+- render_slack(): Block Kit (header + 필드 + 섹션마다 section 블록)
+- render_discord(): embed (심각도 색상, inline 필드, 섹션마다 embed 필드, timestamp)
+- render_desktop(): 알림 제목/본문
+
+Slack/Discord는 블록, 필드, embed 글자 수 한도가 있어서 긴 섹션(완료된 작업, 질문)이
+그대로 들어가면 글 전체가 거부됩니다. pack_slack()/pack_discord()는 한도를 넘는 섹션을
+줄 경계에서 여러 블록/필드로 나누고, 글 하나에 다 들어가지 않으면 이어지는 글
+(최대 NOTIFICATION_MAX_POSTS개, 기본값 3)로 보냅니다. 그래도 남는 부분은 잘라내고
+마지막 글에 생략한 글자 수를 표시합니다.
+
+렌더러는 채널 함수가 그대로 보낼 문자열(JSON)을 반환하므로, 실패한 전송은 렌더링된
+그대로 보관함에 저장되어 재시도됩니다. 전송 한 번에 채널 종류마다 한 번씩만
+렌더링하고, 같은 종류의 URL(slack, slack_2...)은 결과를 함께 씁니다.
+
+사용법:
+    from message import Message, Field, Section
+
+    message = Message(title="Claude Code 작업 완료", icon="✅", severity="success",
+                      timestamp=time.time(),
+                      fields=(Field("머신", "my-desktop"), Field("상태", "작업 완료", code=False)),
+                      sections=(Section("사용자 요청", "로그인 버그 수정", icon="📝", style="quote"),))
+    message.text()              # Slack mrkdwn 텍스트
+    render_discord(message)     # Discord 웹훅 JSON (이어지는 글이 있으면 JSON 배열)
+    pack_discord(message)       # Packed(posts, truncated, oversized)
+"""
+from __future__ import annotations
+import json
+import os
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+
+# 알림 구분선 (텍스트 메시지 시작에 추가)
+MESSAGE_SEPARATOR = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+
+# 심각도 → Discord embed 색상
+SEVERITY_COLORS = {
+    "success": 5763719,   # 초록
+    "warning": 15548997,  # 빨강
+    "info": 3447003,      # 파랑
+    "neutral": 9807270,   # 회색
+}
+
+# 일반 텍스트 메시지의 심각도 (본문에서 처음 찾은 이모지 - 이전 Discord 색상 규칙)
+_TEXT_SEVERITY_EMOJIS = {"✅": "success", "⚠️": "warning", "💬": "info", "🔚": "neutral"}
+
+# 채널 한도 (Slack Block Kit / Discord embed 문서 기준)
+SLACK_HEADER_LIMIT = 150            # header 블록 텍스트
+SLACK_TEXT_LIMIT = 3000             # section 블록 텍스트
+SLACK_FIELD_LIMIT = 2000            # section 블록 필드 하나
+SLACK_FIELDS_PER_BLOCK = 10
+SLACK_MAX_BLOCKS = 50               # 글 하나의 블록 수
+SLACK_TEXT_FIELD_LIMIT = 40000      # 블록 없는 글의 text
+DISCORD_TITLE_LIMIT = 256
+DISCORD_DESCRIPTION_LIMIT = 4096
+DISCORD_FIELD_NAME_LIMIT = 256
+DISCORD_FIELD_VALUE_LIMIT = 1024
+DISCORD_MAX_FIELDS = 25
+DISCORD_EMBED_LIMIT = 6000          # 글 하나의 embed 글자 수 합
+
+# 메시지 하나를 나눠 보낼 최대 글 수 기본값 (NOTIFICATION_MAX_POSTS)
+DEFAULT_MAX_POSTS = 3
+
+# 나눈 섹션의 두 번째 조각부터 제목에 붙는 표시
+CONTINUED = "(계속)"
+
+
+class Field(NamedTuple):
+    """머신, 작업 폴더 같은 짧은 키-값 정보"""
+    label: str
+    value: str
+    code: bool = True   # 값을 `코드`로 표시
+
+
+class Section(NamedTuple):
+    """사용자 요청, 완료된 작업 같은 본문 섹션"""
+    title: Optional[str]    # None이면 제목 없는 본문 (묶음 메시지의 줄 목록)
+    body: str
+    icon: str = ""
+    style: str = "text"     # text | quote (사용자 요청) | code (커맨드) | question (Claude의 질문)
+
+
+class Message(NamedTuple):
+    """채널과 무관한 알림 메시지"""
+    title: str
+    icon: str = ""
+    severity: str = "info"              # SEVERITY_COLORS 키
+    timestamp: Optional[float] = None   # 있으면 "시간" 필드로 표시
+    fields: tuple[Field, ...] = ()
+    sections: tuple[Section, ...] = ()
+    raw: Optional[str] = None           # 일반 텍스트 메시지 (from_text) - 그대로 전송
+
+    @classmethod
+    def from_text(cls, text: str) -> Message:
+        """일반 텍스트를 메시지로 (첫 내용 줄을 제목으로, 본문은 그대로 전송)"""
+        lines = text.strip().split('\n')
+        title = next((line for line in lines if any(ch.isalnum() for ch in line)), "Claude Code")
+        severity = next((value for emoji, value in _TEXT_SEVERITY_EMOJIS.items() if emoji in text), "info")
+        return cls(title=title, severity=severity, raw=text)
+
+    def heading(self) -> str:
+        return f"{self.icon} {self.title}" if self.icon else self.title
+
+    def text(self, include_time: bool = True) -> str:
+        """
+        mrkdwn 텍스트
+
+        Args:
+            include_time: False면 시간 줄 제외 (같은 내용의 메시지를 알아보는 지문용)
+        """
+        if self.raw is not None:
+            return self.raw
+
+        lines = []
+        if include_time and self.timestamp is not None:
+            lines.append(f"- *시간*: {format_time(self.timestamp)}")
+        lines.extend(f"- *{field.label}*: {_code(field.value) if field.code else field.value}"
+                     for field in self.fields)
+
+        text = f"{MESSAGE_SEPARATOR}\n{_mrkdwn_heading(self.icon, self.title)}"
+        if lines:
+            text += "\n\n" + "\n".join(lines)
+        return text + "".join(_section_text(section) for section in self.sections)
+
+    def to_dict(self) -> dict:
+        """JSON으로 보낼 수 있는 dict (집계 서버 레코드)"""
+        data = self._asdict()
+        data["fields"] = [list(field) for field in self.fields]
+        data["sections"] = [list(section) for section in self.sections]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Message:
+        """to_dict() 결과 → Message"""
+        return cls(
+            title=str(data.get("title", "")),
+            icon=str(data.get("icon") or ""),
+            severity=str(data.get("severity") or "info"),
+            timestamp=data.get("timestamp"),
+            fields=tuple(Field(*field) for field in data.get("fields") or ()),
+            sections=tuple(Section(*section) for section in data.get("sections") or ()),
+            raw=data.get("raw"),
+        )
+
+
+def format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _code(value: str) -> str:
+    return f"`{value}`"
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _mrkdwn_heading(icon: str, title: str) -> str:
+    return f"{icon} *{title}*" if icon else f"*{title}*"
+
+
+def _section_text(section: Section) -> str:
+    """섹션 하나의 mrkdwn 텍스트 (앞 섹션과의 구분 포함)"""
+    if section.title is None:
+        return f"\n\n{section.body}"
+    heading = _mrkdwn_heading(section.icon, section.title)
+    if section.style == "quote":
+        return f"\n\n---\n{heading}\n\"{section.body}\"\n---"
+    if section.style == "code":
+        return f"\n\n---\n{heading}\n{_code(section.body)}\n---"
+    if section.style == "question":
+        return f"\n---\n{heading}\n\n{section.body}\n---"
+    return f"\n\n{heading}\n{section.body}"
+
+
+def _quote_lines(text: str) -> str:
+    return "\n".join(f"> {line}" for line in text.split("\n"))
+
+
+def _section_body(section: Section) -> str:
+    """Slack/Discord 블록 안에 넣을 섹션 본문"""
+    if section.style == "quote":
+        return _quote_lines(section.body)
+    if section.style == "code":
+        return _code(section.body)
+    return section.body
+
+
+def _all_fields(message: Message) -> list[tuple[str, str]]:
+    """(이름, 표시 값) 목록 (시간 포함)"""
+    fields = []
+    if message.timestamp is not None:
+        fields.append(("시간", format_time(message.timestamp)))
+    fields.extend((field.label, _code(field.value) if field.code else field.value) for field in message.fields)
+    return fields
+
+
+class Packed(NamedTuple):
+    """채널 한도에 맞춰 나눈 결과"""
+    posts: list[dict]       # 차례로 보낼 웹훅 본문 (2개 이상이면 이어지는 글)
+    truncated: int          # 최대 글 수를 넘어 잘라낸 글자 수
+    oversized: list[str]    # 블록/필드 한도를 넘어 나눈 섹션 이름
+
+
+def max_posts() -> int:
+    """메시지 하나를 나눠 보낼 최대 글 수 (넘는 부분은 잘라냄)"""
+    try:
+        return max(1, int(os.environ.get("NOTIFICATION_MAX_POSTS", DEFAULT_MAX_POSTS)))
+    except ValueError:
+        return DEFAULT_MAX_POSTS
+
+
+def section_name(section: Section) -> str:
+    """통계/로그에 쓰는 섹션 이름"""
+    return section.title if section.title is not None else "body"
+
+
+def section_sizes(message: Message) -> dict[str, int]:
+    """섹션별 본문 글자 수 (어떤 섹션이 한도를 넘기는지 확인용)"""
+    sizes: dict[str, int] = {}
+    for section in message.sections:
+        name = section_name(section)
+        sizes[name] = sizes.get(name, 0) + len(section.body)
+    return sizes
+
+
+def split_text(text: str, limit: int) -> list[str]:
+    """
+    줄 경계에서 limit 이하 조각으로 나눔 (한 줄이 limit보다 길면 그 줄을 잘라 나눔)
+
+    조각 경계에 걸린 빈 줄은 버립니다 (빈 text/value는 Slack/Discord가 400으로 거부).
+    """
+    if len(text) <= limit:
+        return [text]
+    chunks: list[str] = []
+    current: Optional[str] = None
+    for line in text.split("\n"):
+        if len(line) > limit:
+            if current:
+                chunks.append(current)
+            pieces = [line[i:i + limit] for i in range(0, len(line), limit)]
+            chunks.extend(pieces[:-1])
+            line = pieces[-1]
+            current = None
+        if current is None:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current += "\n" + line
+        else:
+            chunks.append(current)
+            current = line
+    if current is not None:
+        chunks.append(current)
+    chunks = [chunk.strip("\n") for chunk in chunks]
+    return [chunk for chunk in chunks if chunk.strip()] or [text[:limit]]
+
+
+def _truncation_note(chars: int) -> str:
+    return f"… 이하 {chars}자 생략 (채널 메시지 한도)"
+
+
+# ============================================================
+# 채널별 렌더러: Message → 채널 함수가 보낼 문자열
+# - event_data는 이벤트 정보를 함께 보내는 채널(집계 서버)용 - 여기서는 쓰지 않음
+# - Slack/Discord는 pack_*()으로 한도에 맞춰 나눈 뒤 encode_posts()로 문자열로
+# ============================================================
+
+def pack_slack(message: Message) -> Packed:
+    """
+    Slack 웹훅 본문 목록 (Block Kit)
+
+    SLACK_TEXT_LIMIT를 넘는 섹션은 줄 경계에서 여러 section 블록으로 나누고,
+    블록이 SLACK_MAX_BLOCKS를 넘으면 이어지는 글로 보냅니다.
+    """
+    limit = max_posts()
+    if message.raw is not None:
+        chunks = split_text(message.raw, SLACK_TEXT_FIELD_LIMIT)
+        truncated = sum(len(chunk) for chunk in chunks[limit:])
+        posts = [{"text": chunk} for chunk in chunks[:limit]]
+        if truncated:
+            posts[-1]["text"] = posts[-1]["text"][:SLACK_TEXT_FIELD_LIMIT - 100] + "\n" + _truncation_note(truncated)
+        return Packed(posts, truncated, ["body"] if len(chunks) > 1 else [])
+
+    heading = message.heading()
+    head: list[dict] = [{
+        "type": "header",
+        "text": {"type": "plain_text", "text": _clip(heading, SLACK_HEADER_LIMIT), "emoji": True},
+    }]
+    fields = [{"type": "mrkdwn", "text": _clip(f"*{label}*\n{value}", SLACK_FIELD_LIMIT)}
+              for label, value in _all_fields(message)]
+    for i in range(0, len(fields), SLACK_FIELDS_PER_BLOCK):
+        head.append({"type": "section", "fields": fields[i:i + SLACK_FIELDS_PER_BLOCK]})
+
+    # (블록, 글자 수) - 섹션 본문 블록
+    body: list[tuple[dict, int]] = []
+    oversized = []
+    for section in message.sections:
+        title = _mrkdwn_heading(section.icon, section.title) if section.title is not None else None
+        room = SLACK_TEXT_LIMIT - (len(title) + len(CONTINUED) + 2 if title else 0)
+        chunks = split_text(_section_body(section), room)
+        if len(chunks) > 1:
+            oversized.append(section_name(section))
+        if section.style in ("quote", "code", "question"):
+            body.append(({"type": "divider"}, 0))
+        for i, chunk in enumerate(chunks):
+            text = chunk if title is None else f"{title}{' ' + CONTINUED if i else ''}\n{chunk}"
+            body.append(({"type": "section", "text": {"type": "mrkdwn", "text": text}}, len(chunk)))
+
+    # 글마다 이어지는 글 표시 + 생략 안내 자리를 남기고 블록을 채움
+    groups: list[list[tuple[dict, int]]] = [[(block, 0) for block in head]]
+    for block, size in body:
+        if len(groups[-1]) >= SLACK_MAX_BLOCKS - 2:
+            groups.append([])
+        groups[-1].append((block, size))
+
+    truncated = sum(size for group in groups[limit:] for _, size in group)
+    groups = groups[:limit]
+    posts = []
+    for n, group in enumerate(groups, 1):
+        blocks = [block for block, _ in group]
+        text = heading
+        if len(groups) > 1:
+            text = f"{heading} ({n}/{len(groups)})"
+            if n > 1:
+                blocks.insert(0, {"type": "context", "elements": [{"type": "mrkdwn", "text": f"{text} {CONTINUED}"}]})
+        posts.append({"text": text, "blocks": blocks})
+    if truncated:
+        posts[-1]["blocks"].append({"type": "context", "elements": [{"type": "mrkdwn",
+                                                                     "text": _truncation_note(truncated)}]})
+    return Packed(posts, truncated, oversized)
+
+
+def _embed_size(embed: dict) -> int:
+    """Discord embed 글자 수 (title, description, 필드 이름/값, footer 합 - 메시지당 DISCORD_EMBED_LIMIT)"""
+    size = len(embed.get("title", "")) + len(embed.get("description", ""))
+    size += sum(len(field["name"]) + len(field["value"]) for field in embed.get("fields", ()))
+    return size + len(embed.get("footer", {}).get("text", ""))
+
+
+def pack_discord(message: Message) -> Packed:
+    """
+    Discord 웹훅 본문 목록 (글마다 embed 하나)
+
+    DISCORD_FIELD_VALUE_LIMIT를 넘는 섹션은 줄 경계에서 여러 필드로, 제목 없는 본문은
+    DISCORD_DESCRIPTION_LIMIT 단위로 나누고, embed 하나의 필드 수나 글자 수 합이
+    한도를 넘으면 이어지는 글로 보냅니다.
+    """
+    limit = max_posts()
+    color = SEVERITY_COLORS.get(message.severity, SEVERITY_COLORS["info"])
+
+    # 순서대로 embed에 넣을 조각: ("description", 텍스트) 또는 ("field", 필드)
+    units: list[tuple[str, object]] = []
+    oversized = []
+    if message.raw is not None:
+        # 일반 텍스트: 첫 줄은 제목, 나머지는 본문
+        lines = message.raw.strip().split('\n')
+        heading = lines[0] if lines else "Claude Code"
+        chunks = split_text('\n'.join(lines[1:]), DISCORD_DESCRIPTION_LIMIT)
+        if len(chunks) > 1:
+            oversized.append("body")
+        units = [("description", chunk) for chunk in chunks if chunk]
+    else:
+        heading = message.heading()
+        units = [("field", {"name": _clip(field.label, DISCORD_FIELD_NAME_LIMIT),
+                            "value": _clip(_code(field.value) if field.code else field.value,
+                                           DISCORD_FIELD_VALUE_LIMIT), "inline": True})
+                 for field in message.fields]
+        for section in message.sections:
+            body = _section_body(section) or "-"
+            if section.title is None:
+                chunks = split_text(body, DISCORD_DESCRIPTION_LIMIT)
+                units.extend(("description", chunk) for chunk in chunks)
+            else:
+                name = f"{section.icon} {section.title}" if section.icon else section.title
+                name = _clip(name, DISCORD_FIELD_NAME_LIMIT - len(CONTINUED) - 1)
+                chunks = split_text(body, DISCORD_FIELD_VALUE_LIMIT)
+                units.extend(("field", {"name": name if i == 0 else f"{name} {CONTINUED}",
+                                        "value": chunk, "inline": False})
+                             for i, chunk in enumerate(chunks))
+            if len(chunks) > 1:
+                oversized.append(section_name(section))
+
+    # 이어지는 글 번호와 생략 안내를 붙일 자리를 남기고 embed를 채움
+    budget = DISCORD_EMBED_LIMIT - len(" (99/99)") - len(_truncation_note(10 ** 6))
+    title = _clip(heading, DISCORD_TITLE_LIMIT - len(" (99/99)"))
+    embeds = [{"title": title, "fields": []}]
+    sizes: list[list[int]] = [[]]
+    for kind, unit in units:
+        embed = embeds[-1]
+        if kind == "description":
+            fits = "description" not in embed and not any(not f["inline"] for f in embed["fields"])
+            fits = fits and _embed_size(embed) + len(unit) <= budget
+        else:
+            fits = len(embed["fields"]) < DISCORD_MAX_FIELDS and _embed_size(embed) + len(unit["name"]) + len(unit["value"]) <= budget
+        if not fits:
+            embed = {"title": title, "fields": []}
+            embeds.append(embed)
+            sizes.append([])
+        if kind == "description":
+            embed["description"] = unit
+            sizes[-1].append(len(unit))
+        else:
+            embed["fields"].append(unit)
+            sizes[-1].append(len(unit["value"]))
+
+    truncated = sum(size for group in sizes[limit:] for size in group)
+    embeds = embeds[:limit]
+    posts = []
+    for n, embed in enumerate(embeds, 1):
+        if len(embeds) > 1:
+            embed["title"] = f"{title} ({n}/{len(embeds)})"
+        embed["color"] = color
+        if not embed["fields"]:
+            del embed["fields"]
+        posts.append({"embeds": [embed]})
+    if message.raw is None and message.timestamp is not None:
+        # Discord가 보는 사람의 시간대로 표시
+        posts[0]["embeds"][0]["timestamp"] = datetime.fromtimestamp(message.timestamp, timezone.utc).isoformat()
+    if truncated:
+        posts[-1]["embeds"][0]["footer"] = {"text": _truncation_note(truncated)}
+    return Packed(posts, truncated, oversized)
+
+
+def encode_posts(posts: list[dict]) -> str:
+    """웹훅 본문 목록 → 채널 함수에 넘길 문자열 (하나면 JSON 객체, 여럿이면 JSON 배열)"""
+    return json.dumps(posts[0] if len(posts) == 1 else posts, ensure_ascii=False)
+
+
+def render_slack(message: Message, event_data: Optional[dict] = None) -> str:
+    """Slack 웹훅 JSON (Block Kit, 한도를 넘으면 이어지는 글 배열)"""
+    return encode_posts(pack_slack(message).posts)
+
+
+def render_discord(message: Message, event_data: Optional[dict] = None) -> str:
+    """Discord 웹훅 JSON (embed, 한도를 넘으면 이어지는 글 배열)"""
+    return encode_posts(pack_discord(message).posts)
+
+
+def render_desktop(message: Message, event_data: Optional[dict] = None) -> str:
+    """데스크톱 알림 {"title", "body"} JSON (필드와 사용자 요청/질문만 짧게)"""
+    if message.raw is not None:
+        lines = message.raw.strip().split('\n')
+        title = lines[0] if lines else "Claude Code"
+        body = '\n'.join(lines[1:]) if len(lines) > 1 else ""
+        return json.dumps({"title": title, "body": body}, ensure_ascii=False)
+
+    lines = [f"{field.label}: {field.value}" for field in message.fields]
+    for section in message.sections:
+        if section.style in ("quote", "code", "question"):
+            lines.append(f"{section.title}: {_clip(section.body.replace(chr(10), ' '), 200)}")
+        elif section.title is None:
+            lines.append(section.body)
+    return json.dumps({"title": message.heading(), "body": "\n".join(lines)}, ensure_ascii=False)
+
+
+def decode_posts(payload: str) -> Optional[list[dict]]:
+    """
+    encode_posts() 결과 → 웹훅 본문 목록
+
+    보관함에 남아 있는 이전 형식의 메시지처럼 렌더링되지 않은 일반 텍스트면 None
+    """
+    if not payload.startswith(("{", "[")):
+        return None
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+    posts = [data] if isinstance(data, dict) else data
+    if not isinstance(posts, list) or not posts or not all(isinstance(post, dict) for post in posts):
+        return None
+    return posts
+
+
+def decode_payload(payload: str) -> Optional[dict]:
+    """
+    렌더러가 만든 JSON 페이로드 → dict
+
+    보관함에 남아 있는 이전 형식의 메시지처럼 렌더링되지 않은 일반 텍스트면 None
+    """
+    if not payload.startswith("{"):
+        return None
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
@@ -16,44 +16,105 @@ Claude Code 훅 이벤트(Stop, Notification, SessionEnd)를 수신하여
     예: "https://discord.com/api/webhooks/xxx,https://discord.com/api/webhooks/yyy"
   ENABLE_DESKTOP_NOTIFICATION: "true"로 설정하면 데스크톱 알림 활성화
   ENABLE_WORK_SUMMARY: "true"로 설정하면 작업 통계 포함 (기본값: true)
+  WORK_SUMMARY_SCOPE: "turn"이면 현재 턴(마지막 사용자 요청 이후)만 요약 (기본값: session)
   ENABLE_EXPERIENCE_SUMMARY: "true"로 설정하면 완료 요약 + 사용 가이드 포함 (기본값: true)
+  EXPERIENCE_MARKERS_FILE: 완료/사용법 섹션 마커 JSON 파일 (기본값: markers.json)
+  ENABLE_TRANSCRIPT_CURSOR: "true"로 설정하면 세션별 커서로 transcript 증분 스캔 (기본값: true)
+  ENABLE_TRANSCRIPT_INDEX: "true"로 설정하면 Notification 조회에 transcript 오프셋 인덱스 사용 (기본값: true)
+  NOTIFICATION_CACHE_DIR: 커서 등 로컬 상태 저장 경로 (기본값: ~/.cache/claude-notification)
+  NOTIFICATION_HOOK_TIMEOUT: 훅 타임아웃(초). 모든 채널 전송은 이 시간 안에 끝냄 (기본값: 15)
+  NOTIFICATION_RENDER_BUDGET: Stop 메시지 섹션(transcript 분석, 경험 요약, 다음 단계 제안)에 쓸 시간(초).
+    넘긴 섹션은 생략 (기본값: 훅 타임아웃의 절반)
+  NOTIFICATION_SKIPPED_SECTION_NOTE: "true"면 생략한 섹션 자리에 "(skipped: timeout)" 표시 (기본값: true)
+  ENABLE_OUTBOX: "true"로 설정하면 실패한 Slack/Discord 메시지를 보관 후 재시도 (기본값: true)
+  NOTIFICATION_OUTBOX_MAX_ATTEMPTS: 이 횟수만큼 실패하면 dead 상태로 보관 (기본값: 6)
+  NOTIFICATION_MAX_POSTS: Slack/Discord 한도를 넘는 메시지를 나눠 보낼 최대 글 수, 넘는 부분은 생략 (기본값: 3)
+  ENABLE_HTTP_KEEPALIVE: "true"로 설정하면 호스트별 keep-alive 연결을 재사용 (기본값: true)
+  ENABLE_RATE_LIMIT: "true"로 설정하면 웹훅 URL별 전송 속도 제한 (CHANNELS의 rate_limit, 기본값: true)
+  ENABLE_DEDUPE: "true"로 설정하면 최근에 보낸 알림과 같은 알림은 건너뜀 (기본값: true)
+  NOTIFICATION_DEDUPE_TTL: 보낸 알림을 기억하는 시간(초) (기본값: 600)
+  NOTIFICATION_AGGREGATOR_URL: 집계 서버 /events URL. 설정하면 이 머신은 이벤트 레코드를 집계 서버로 보냄
+    NOTIFICATION_AGGREGATOR_TOKEN: 집계 서버 인증 토큰 (서버와 같은 값)
+  NOTIFICATION_MACHINE_NAME: 알림에 표시할 머신 이름 (기본값: Tailscale 이름 또는 hostname)
+  ENABLE_RELAY: "true"면 릴레이 소켓(relay.py serve)이 있을 때 이벤트를 넘기고 종료 (기본값: true)
+    NOTIFICATION_RELAY_SOCKET: 릴레이 소켓 경로 (기본값: $NOTIFICATION_CACHE_DIR/relay.sock)
+  ENABLE_SPOOL: "true"로 설정하면 이벤트를 스풀에 저장하고 바로 종료, 전송은 데몬이 담당 (기본값: false)
+  NOTIFICATION_DIGEST_WINDOW: 스풀 모드에서 Stop/SessionEnd를 채널별로 묶어 보낼 창(초) (기본값: 0)
+    채널별: <CHANNEL>_DIGEST_WINDOW (예: SLACK_DIGEST_WINDOW), 최대 개수: NOTIFICATION_DIGEST_MAX_EVENTS
+  ENABLE_HOOK_STATS: "true"로 설정하면 실행마다 단계별 시간을 stats/runs.jsonl에 기록 (기본값: true)
+    NOTIFICATION_STATS_MAX_BYTES: 이 크기를 넘으면 runs.jsonl.1로 교체 (기본값: 2MB)
+    리포트: python3 notifier.py --stats [--since 24h] [--until ...] [--event Stop]
 
 새 채널 추가 방법:
-  1. send_xxx() 함수 작성
+  1. send_xxx() 함수 작성 (선택: Message를 채널 형식으로 바꾸는 render_xxx() 함수)
   2. CHANNELS 딕셔너리에 등록
   3. 환경변수 설정하면 자동 활성화
 """
+# 훅은 이벤트마다 새 프로세스로 실행되므로 모든 이벤트에 필요한 모듈만 여기서 import하고,
+# 특정 경로에서만 쓰는 무거운 모듈은 쓰는 함수 안에서 import합니다:
+#   transcript / summarizer / experience_extractor: Stop, Notification 메시지 생성
+#   transport (http.client, ssl): Slack/Discord 전송, subprocess / platform: 환경 정보 조회, 데스크톱 알림
+# (python bench.py startup 으로 이벤트별 시작 시간 확인)
 import json
 import sys
 import os
-import re
-import urllib.request
-import urllib.error
-import subprocess
-import platform
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from typing import Optional, Callable
 
-# 작업 요약 모듈 import
-try:
-    from summarizer import generate_stop_summary
-    SUMMARIZER_AVAILABLE = True
-except ImportError:
-    SUMMARIZER_AVAILABLE = False
+# 구조화된 메시지 + 채널별 렌더러 (Slack Block Kit, Discord embed, 데스크톱)
+from message import (
+    Message, Field, Section, pack_slack, pack_discord, render_desktop,
+    encode_posts, decode_posts, decode_payload, section_sizes,
+)
+
+# 로컬 상태 파일(cache), 스풀 모드(spool), 릴레이(relay), 전송 실패 메시지 보관함(outbox),
+# 웹훅 URL별 전송 속도 제한(ratelimit)은 쓰는 함수 안에서 import (훅 시작 시간 단축)
+
+# 단계별 시간 기록 (notifier.py --stats 로 확인)
+import stats
+
+# 중복 알림 방지 (지문 + TTL 저장소)
+import dedupe
+
+# transcript 모듈에서 옮겨간 이름 (하위 호환용 재노출 - 처음 접근할 때 import)
+_TRANSCRIPT_EXPORTS = {
+    "SYSTEM_MESSAGE_PATTERNS",
+    "is_system_message",
+    "extract_command_from_content",
+    "build_transcript_path",
+    "resolve_transcript_path",
+    "scan_transcript",
+    "scan_transcript_tail",
+    "scan_transcript_incremental",
+    "scan_transcript_turn",
+}
+
 
-# 경험 요약 모듈 import (완료 요약 + 사용 가이드)
-try:
-    from experience_extractor import generate_experience_summary
-    EXPERIENCE_EXTRACTOR_AVAILABLE = True
-except ImportError:
-    EXPERIENCE_EXTRACTOR_AVAILABLE = False
+def __getattr__(name: str):
+    if name in _TRANSCRIPT_EXPORTS:
+        import transcript
+        return getattr(transcript, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================================
 # 환경 정보 수집
 # ============================================================
 
-def get_machine_name() -> str:
-    """머신 이름 반환 (Tailscale 우선, hostname 폴백)"""
+# 머신/tmux 정보 캐시 유지 시간 (초)
+ENV_CACHE_TTL = 300.0
+
+# 프로세스 안 캐시 (캐시 키 → 환경 정보)
+_env_info: dict[str, dict] = {}
+
+
+def _probe_machine_name() -> str:
+    """머신 이름 조회 (Tailscale 우선, hostname 폴백)"""
+    import platform
+    import subprocess
+
     # Tailscale 시도
     try:
         result = subprocess.run(
@@ -77,26 +138,23 @@ def get_machine_name() -> str:
     return platform.node()
 
 
-def get_tmux_info() -> Optional[str]:
-    """tmux 세션:윈도우 정보 반환 (tmux 외부면 None)"""
+def _probe_tmux_info() -> Optional[str]:
+    """tmux 세션:윈도우 조회 (한 번의 tmux 호출, tmux 외부면 None)"""
     if not os.environ.get("TMUX"):
         return None
 
-    try:
-        session = subprocess.run(
-            ["tmux", "display-message", "-p", "#S"],
-            capture_output=True,
-            text=True,
-            timeout=1
-        ).stdout.strip()
+    import subprocess
 
-        window = subprocess.run(
-            ["tmux", "display-message", "-p", "#W"],
-            capture_output=True,
-            text=True,
-            timeout=1
-        ).stdout.strip()
+    command = ["tmux", "display-message", "-p"]
+    pane = os.environ.get("TMUX_PANE")
+    if pane:
+        command += ["-t", pane]
+    command.append("#{session_name}\t#{window_name}")
 
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=1).stdout.strip("\n")
+        session, _, window = output.partition("\t")
+        session, window = session.strip(), window.strip()
         if session and window:
             return f"{session}:{window}"
         return session or None
@@ -108,37 +166,52 @@ def get_tmux_info() -> Optional[str]:
     return None
 
 
+def get_environment_info() -> dict:
+    """
+    머신 이름과 tmux 정보 (호스트 + tmux 창별로 ENV_CACHE_TTL 동안 캐시)
+
+    캐시가 있으면 작은 파일 하나만 읽고 tailscale/tmux를 실행하지 않습니다.
+
+    Returns:
+        {"machine": 머신 이름, "tmux": "세션:윈도우" 또는 None}
+    """
+    from cache import get_cache_dir, safe_filename, read_json, write_json_atomic, prune_stale_files
+
+    host = os.uname().nodename if hasattr(os, "uname") else os.environ.get("COMPUTERNAME", "")
+    key = safe_filename("-".join([
+        host, os.environ.get("NOTIFICATION_MACHINE_NAME", ""), os.environ.get("TMUX", ""), os.environ.get("TMUX_PANE", "")
+    ]))
+
+    info = _env_info.get(key)
+    if info is None:
+        path = os.path.join(get_cache_dir("env"), f"{key}.json")
+        info = read_json(path)
+        if not isinstance(info, dict) or not 0 <= time.time() - info.get("probed_at", 0) < ENV_CACHE_TTL:
+            with stats.stage("probe:machine"):
+                machine = os.environ.get("NOTIFICATION_MACHINE_NAME") or _probe_machine_name()
+            with stats.stage("probe:tmux"):
+                tmux = _probe_tmux_info()
+            info = {"machine": machine, "tmux": tmux, "probed_at": time.time()}
+            write_json_atomic(path, info)
+            prune_stale_files(get_cache_dir("env"), 86400)
+        _env_info[key] = info
+    return info
+
+
+def get_machine_name() -> str:
+    """머신 이름 반환 (Tailscale 우선, hostname 폴백)"""
+    return get_environment_info()["machine"]
+
+
+def get_tmux_info() -> Optional[str]:
+    """tmux 세션:윈도우 정보 반환 (tmux 외부면 None)"""
+    return get_environment_info()["tmux"]
+
+
 # ============================================================
 # 상수 정의
 # ============================================================
 
-# 알림 구분선 (메시지 시작에 추가)
-MESSAGE_SEPARATOR = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
-
-# 시스템 메시지 패턴 (사용자 요청으로 표시하지 않을 메시지)
-SYSTEM_MESSAGE_PATTERNS: list[str] = [
-    'This session is being continued',
-    'Context compaction',
-    'Session resumed',
-    '<system-reminder>',
-    '<command-name>',
-]
-
-
-def is_system_message(text: str) -> bool:
-    """시스템 메시지 여부 판단"""
-    if not text:
-        return True
-    # 기존 필터: XML 태그나 슬래시 명령어
-    if text.startswith('<') or text.startswith('/') or text.startswith('# /'):
-        return True
-    # 새 필터: 특정 패턴으로 시작하는 시스템 메시지
-    for pattern in SYSTEM_MESSAGE_PATTERNS:
-        if text.startswith(pattern):
-            return True
-    return False
-
-
 STOP_REASON_MAP: dict[str, tuple[str, str]] = {
     # stop_reason: (한글 표시, 아이콘)
     "end_turn": ("작업 완료", "✅"),
@@ -146,11 +219,40 @@ STOP_REASON_MAP: dict[str, tuple[str, str]] = {
 }
 
 
+# 아이콘 → 메시지 심각도 (Discord embed 색상)
+ICON_SEVERITY: dict[str, str] = {
+    "✅": "success",
+    "⚠️": "warning",
+    "💬": "info",
+    "🔚": "neutral",
+}
+
+
 def get_stop_reason_display(stop_reason: str) -> tuple[str, str]:
     """stop_reason을 한글 표시와 아이콘으로 변환"""
     return STOP_REASON_MAP.get(stop_reason, (stop_reason, "❓"))
 
 
+def environment_fields(cwd: str) -> list[Field]:
+    """머신, tmux, 작업 폴더 필드 (모든 이벤트 메시지 공통)"""
+    fields = [Field("머신", get_machine_name())]
+    tmux = get_tmux_info()
+    if tmux:
+        fields.append(Field("tmux", tmux))
+    fields.append(Field("작업 폴더", cwd))
+    return fields
+
+
+def request_section(result: Optional[tuple[str, bool]]) -> Optional[Section]:
+    """extract_last_user_message() 결과 → 사용자 요청(또는 실행된 커맨드) 섹션"""
+    if not result:
+        return None
+    user_request, is_command = result
+    if is_command:
+        return Section("실행된 커맨드", user_request, icon="🔧", style="code")
+    return Section("사용자 요청", user_request, icon="📝", style="quote")
+
+
 # ============================================================
 # Transcript 파싱
 # ============================================================
@@ -162,29 +264,31 @@ def get_transcript_path(cwd: str, session_id: str) -> Optional[str]:
     경로 형식: ~/.claude/projects/{project-path}/{session-id}.jsonl
     project-path: cwd의 /를 -로 변환 (예: /home/user/dev → -home-user-dev)
     """
-    if not cwd or not session_id:
-        return None
-
-    # /home/user/dev/marketplace → -home-user-dev-marketplace
-    project_path = cwd.replace("/", "-")
-    if project_path.startswith("-"):
-        project_path = project_path  # 이미 -로 시작
-    else:
-        project_path = "-" + project_path
+    from transcript import build_transcript_path
 
-    home = os.path.expanduser("~")
-    transcript_path = os.path.join(home, ".claude", "projects", project_path, f"{session_id}.jsonl")
+    transcript_path = build_transcript_path(cwd, session_id)
+    return transcript_path if transcript_path and os.path.exists(transcript_path) else None
 
-    return transcript_path if os.path.exists(transcript_path) else None
 
+def _truncate_user_message(result: Optional[tuple[str, bool]], max_length: int) -> Optional[tuple[str, bool]]:
+    """(message, is_command)의 첫 줄만 추출하고 길이 제한"""
+    if not result:
+        return None
 
-def extract_command_from_content(content: str) -> Optional[str]:
-    """<command-name>/명령어</command-name> 패턴에서 커맨드 추출"""
-    match = re.search(r'<command-name>(/[^<]+)</command-name>', content)
-    return match.group(1) if match else None
+    last_user_text, is_command = result
+    first_line = last_user_text.split('\n')[0].strip()
+    if len(first_line) > max_length:
+        return (first_line[:max_length-3] + "...", is_command)
+    return (first_line, is_command)
 
 
-def extract_last_user_message(transcript_path: Optional[str], cwd: str, session_id: str, max_length: int = 500) -> Optional[tuple[str, bool]]:
+def extract_last_user_message(
+    transcript_path: Optional[str],
+    cwd: str,
+    session_id: str,
+    max_length: int = 500,
+    scan: Optional[dict] = None
+) -> Optional[tuple[str, bool]]:
     """
     Claude Code JSONL 파일에서 마지막 사용자 메시지 또는 커맨드 추출
 
@@ -193,82 +297,34 @@ def extract_last_user_message(transcript_path: Optional[str], cwd: str, session_
         cwd: 작업 디렉토리 (프로젝트 경로 구성용, 폴백)
         session_id: 세션 ID (폴백)
         max_length: 최대 문자 수 (기본 500자)
+        scan: scan_transcript() 또는 scan_transcript_tail()의 반환값
+              (주어지면 transcript를 다시 읽지 않음)
 
     Returns:
         (message, is_command) 튜플 또는 None
         - message: 사용자 메시지 또는 커맨드
         - is_command: True면 커맨드, False면 일반 메시지
     """
-    # 직접 제공된 transcript_path 우선 사용, 없으면 cwd/session_id로 폴백
-    if not transcript_path or not os.path.exists(transcript_path):
-        transcript_path = get_transcript_path(cwd, session_id)
-    if not transcript_path:
-        print(f"[Transcript] File not found for session: {session_id}", file=sys.stderr)
-        return None
+    if scan is None:
+        from transcript import resolve_transcript_path, scan_transcript_tail
 
-    try:
-        last_user_text = None
-        is_command = False
-
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                    if obj.get('type') == 'user':
-                        msg = obj.get('message', {})
-                        content = msg.get('content') if isinstance(msg, dict) else None
-
-                        # content가 문자열인 경우 (실제 사용자 입력)
-                        if isinstance(content, str):
-                            text = content.strip()
-
-                            # 1. 커맨드 감지 (우선)
-                            cmd = extract_command_from_content(text)
-                            if cmd:
-                                last_user_text = cmd
-                                is_command = True
-                                continue
-
-                            # 2. "❯" 기호 뒤의 사용자 입력 추출
-                            # 형식: "\n❯ 안녕\n\n● 안녕하세요..." → "안녕"
-                            if '❯' in text:
-                                after_prompt = text.split('❯', 1)[1]  # ❯ 이후
-                                # 첫 줄만 추출 (● 이전 또는 줄바꿈 이전)
-                                user_input = after_prompt.split('\n')[0].strip()
-                                if user_input:
-                                    text = user_input
-
-                            # 3. 필터링: 시스템 메시지 제외
-                            if not is_system_message(text):
-                                last_user_text = text
-                                is_command = False
-
-                        # content가 배열인 경우 (tool_result) - 무시
-                        # elif isinstance(content, list): pass
-                except json.JSONDecodeError:
-                    continue
-
-        if not last_user_text:
+        # 직접 제공된 transcript_path 우선 사용, 없으면 cwd/session_id로 폴백
+        transcript_path = resolve_transcript_path(transcript_path, cwd, session_id)
+        if not transcript_path:
+            print(f"[Transcript] File not found for session: {session_id}", file=sys.stderr)
             return None
+        # 최신 레코드만 필요 - 파일 끝에서부터 역방향 스캔
+        scan = scan_transcript_tail(transcript_path)
 
-        # 첫 줄만 추출하고 길이 제한
-        first_line = last_user_text.split('\n')[0].strip()
-        if len(first_line) > max_length:
-            return (first_line[:max_length-3] + "...", is_command)
-        return (first_line, is_command)
-
-    except (FileNotFoundError, PermissionError, IOError) as e:
-        print(f"[Transcript] Read error: {e}", file=sys.stderr)
-        return None
-    except Exception as e:
-        print(f"[Transcript] Parse error: {e}", file=sys.stderr)
-        return None
+    return _truncate_user_message(scan['last_user_message'], max_length)
 
 
-def extract_claude_question(transcript_path: Optional[str], cwd: str, session_id: str) -> Optional[dict]:
+def extract_claude_question(
+    transcript_path: Optional[str],
+    cwd: str,
+    session_id: str,
+    scan: Optional[dict] = None
+) -> Optional[dict]:
     """
     transcript에서 마지막 AskUserQuestion tool_use 추출 (미답변 질문만)
 
@@ -276,6 +332,8 @@ def extract_claude_question(transcript_path: Optional[str], cwd: str, session_id
         transcript_path: 이벤트에서 직접 제공된 transcript 경로 (우선 사용)
         cwd: 작업 디렉토리 (프로젝트 경로 구성용, 폴백)
         session_id: 세션 ID (폴백)
+        scan: scan_transcript() 또는 scan_transcript_tail()의 반환값
+              (주어지면 transcript를 다시 읽지 않음)
 
     Returns:
         질문 데이터 딕셔너리 또는 None (이미 답변된 경우 None)
@@ -290,72 +348,80 @@ def extract_claude_question(transcript_path: Optional[str], cwd: str, session_id
             ]
         }
     """
-    # 직접 제공된 transcript_path 우선 사용, 없으면 cwd/session_id로 폴백
-    if not transcript_path or not os.path.exists(transcript_path):
-        transcript_path = get_transcript_path(cwd, session_id)
-    if not transcript_path:
-        return None
+    if scan is None:
+        from transcript import resolve_transcript_path, scan_transcript_tail
 
-    try:
-        last_question = None
-        last_question_id = None
-        answered_ids: set[str] = set()
-
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-
-                    # assistant 메시지에서 AskUserQuestion tool_use 찾기
-                    if obj.get('type') == 'assistant':
-                        msg = obj.get('message', {})
-                        content = msg.get('content') if isinstance(msg, dict) else None
-
-                        if isinstance(content, list):
-                            for block in content:
-                                if isinstance(block, dict) and block.get('type') == 'tool_use':
-                                    if block.get('name') == 'AskUserQuestion':
-                                        input_data = block.get('input', {})
-                                        if 'questions' in input_data:
-                                            last_question = input_data
-                                            last_question_id = block.get('id')
-
-                    # user 메시지에서 tool_result 찾기 (답변된 질문)
-                    elif obj.get('type') == 'user':
-                        msg = obj.get('message', {})
-                        content = msg.get('content') if isinstance(msg, dict) else None
-
-                        if isinstance(content, list):
-                            for block in content:
-                                if isinstance(block, dict) and block.get('type') == 'tool_result':
-                                    tool_use_id = block.get('tool_use_id')
-                                    if tool_use_id:
-                                        answered_ids.add(tool_use_id)
-
-                except json.JSONDecodeError:
-                    continue
-
-        # 마지막 질문이 이미 답변되었으면 None 반환
-        if last_question_id and last_question_id in answered_ids:
-            print(f"[Transcript] AskUserQuestion {last_question_id} already answered - skipping", file=sys.stderr)
+        # 직접 제공된 transcript_path 우선 사용, 없으면 cwd/session_id로 폴백
+        transcript_path = resolve_transcript_path(transcript_path, cwd, session_id)
+        if not transcript_path:
             return None
+        # 최신 레코드만 필요 - 파일 끝에서부터 역방향 스캔
+        scan = scan_transcript_tail(transcript_path)
 
-        return last_question
+    return scan['question']
 
-    except (FileNotFoundError, PermissionError, IOError) as e:
-        print(f"[Transcript] Read error (question): {e}", file=sys.stderr)
-        return None
-    except Exception as e:
-        print(f"[Transcript] Parse error (question): {e}", file=sys.stderr)
-        return None
 
+def scan_event_transcript(
+    event_data: dict,
+    tail_only: bool = False,
+    incremental: bool = False,
+    turn_only: bool = False
+) -> dict:
+    """
+    이벤트의 transcript를 한 번만 스캔 (transcript_path 우선, 없으면 cwd + session_id로 폴백)
+
+    Args:
+        event_data: 훅 이벤트 데이터
+        tail_only: True면 마지막 사용자 메시지/미답변 질문만 역방향으로 탐색
+        incremental: True면 세션 커서로 지난 실행 이후 추가된 부분만 스캔
+                     (ENABLE_TRANSCRIPT_CURSOR 환경변수로 제어, 기본값: true)
+        turn_only: True면 현재 턴(마지막 사용자 요청 이후)만 스캔
 
-def format_question_section(question_data: dict, max_question_len: int = 80, max_options: int = 4) -> str:
+    Returns:
+        scan_transcript() 또는 scan_transcript_tail()의 반환값
+        (transcript가 없으면 빈 스캔 결과)
     """
-    질문과 선택지를 알림용 텍스트로 포맷팅
+    from transcript import (
+        resolve_transcript_path,
+        scan_transcript,
+        scan_transcript_tail,
+        scan_transcript_incremental,
+        scan_transcript_turn,
+    )
+
+    session_id = event_data.get("session_id", "unknown")
+    with stats.stage("resolve_transcript"):
+        transcript_path = resolve_transcript_path(
+            event_data.get("transcript_path"), event_data.get("cwd", "unknown"), session_id
+        )
+    if not transcript_path:
+        print(f"[Transcript] File not found for session: {session_id}", file=sys.stderr)
+    if tail_only:
+        with stats.stage("scan:tail"):
+            return scan_transcript_tail(transcript_path)
+
+    # 경험 요약 모듈 (완료 요약 + 사용 가이드)이 없으면 텍스트 분류 없이 스캔
+    try:
+        from experience_extractor import classify_experience_text
+        text_classifier = classify_experience_text
+    except ImportError:
+        text_classifier = lambda text: []
+    if turn_only:
+        with stats.stage("scan:turn"):
+            return scan_transcript_turn(transcript_path, text_classifier)
+
+    enable_cursor = os.environ.get("ENABLE_TRANSCRIPT_CURSOR", "true").lower() == "true"
+    if incremental and enable_cursor:
+        # 커서에는 완료/사용법 마커가 있는 최신 텍스트만 보관
+        with stats.stage("scan:incremental"):
+            return scan_transcript_incremental(transcript_path, event_data.get("session_id", ""), text_classifier)
+    with stats.stage("scan:full"):
+        return scan_transcript(transcript_path, text_classifier)
+
+
+def format_question_section(question_data: dict, max_question_len: int = 80, max_options: int = 4) -> Optional[Section]:
+    """
+    질문과 선택지를 알림용 섹션으로 포맷팅
 
     Args:
         question_data: extract_claude_question()의 반환값
@@ -363,14 +429,14 @@ def format_question_section(question_data: dict, max_question_len: int = 80, max
         max_options: 표시할 최대 선택지 수 (기본 4개)
 
     Returns:
-        포맷팅된 질문 섹션 문자열
+        질문 섹션 (질문이 없으면 None)
     """
     if not question_data or 'questions' not in question_data:
-        return ""
+        return None
 
     questions = question_data.get('questions', [])
     if not questions:
-        return ""
+        return None
 
     sections = []
 
@@ -402,153 +468,160 @@ def format_question_section(question_data: dict, max_question_len: int = 80, max
         sections.append('\n'.join(lines))
 
     # 여러 질문이 있으면 구분
-    content = '\n\n'.join(sections)
-
-    return f"""
----
-❓ *Claude의 질문*
-
-{content}
----"""
+    return Section("Claude의 질문", '\n\n'.join(sections), icon="❓", style="question")
 
 
 # ============================================================
-# 메시지 빌더 (이벤트 → 텍스트)
+# 메시지 빌더 (이벤트 → Message)
 # ============================================================
 
-def build_stop_message(event_data: dict) -> str:
-    """Stop 이벤트 메시지 생성"""
+def build_stop_message(event_data: dict, deadline: Optional[float] = None) -> Message:
+    """
+    Stop 이벤트 메시지 생성
+
+    transcript 스캔과 경험 요약/다음 단계 제안 섹션은 마감(기본값: render_deadline())
+    안에서만 기다리고, 못 끝낸 섹션은 생략 안내로 바꿔 나머지 메시지를 먼저 보냅니다.
+    """
     cwd = event_data.get("cwd", "unknown")
     session_id = event_data.get("session_id", "unknown")
     stop_reason = event_data.get("stop_reason", "end_turn")
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.time()
 
     # stop_reason 한글화
     reason_text, icon = get_stop_reason_display(stop_reason)
 
-    # 헤더 결정
+    # 제목 결정
     if stop_reason == "end_turn":
-        header = f"{icon} *Claude Code 작업 완료*"
+        title = "Claude Code 작업 완료"
     elif stop_reason == "interrupt_turn":
-        header = f"{icon} *Claude Code 작업 중단됨*"
+        title = "Claude Code 작업 중단됨"
     else:
-        header = f"{icon} *Claude Code 작업 종료*"
+        title = "Claude Code 작업 종료"
 
     # 환경 정보 수집
-    machine = get_machine_name()
-    tmux = get_tmux_info()
-    tmux_line = f"\n- *tmux*: `{tmux}`" if tmux else ""
+    fields = environment_fields(cwd) + [Field("Session ID", session_id), Field("상태", reason_text, code=False)]
 
-    # 작업 요약 추출 (transcript_path 우선 사용, 없으면 cwd + session_id로 폴백)
-    transcript_path = event_data.get("transcript_path")
-    result = extract_last_user_message(transcript_path, cwd, session_id)
-    if result:
-        user_request, is_command = result
-        if is_command:
-            request_line = f"\n\n---\n🔧 *실행된 커맨드*\n`{user_request}`\n---"
-        else:
-            request_line = f"\n\n---\n📝 *사용자 요청*\n\"{user_request}\"\n---"
-    else:
-        request_line = ""
+    # transcript 단일 패스 스캔 (모든 섹션이 결과를 공유)
+    # Stop은 매 턴마다 호출되므로 세션 커서로 새로 추가된 부분만 스캔
+    # WORK_SUMMARY_SCOPE=turn이면 현재 턴(마지막 사용자 요청 이후)만 요약
+    summary_scope = os.environ.get("WORK_SUMMARY_SCOPE", "session").lower()
+    if deadline is None:
+        deadline = render_deadline()
 
-    # 경험 요약 (완료된 작업 + 사용 방법) - ENABLE_EXPERIENCE_SUMMARY 환경변수로 제어, 기본값: true
     enable_experience = os.environ.get("ENABLE_EXPERIENCE_SUMMARY", "true").lower() == "true"
-    experience_section = ""
+    enable_summary = os.environ.get("ENABLE_WORK_SUMMARY", "true").lower() == "true"
+    # transcript 스캔이 마감을 넘기면 스캔 결과를 쓰는 섹션도 모두 생략
+    scan_sections = ["request"] + (["experience"] if enable_experience else []) + (["workflow"] if enable_summary else [])
+
+    scanned, skipped = render_sections({
+        "transcript": lambda: scan_event_transcript(
+            event_data, incremental=True, turn_only=summary_scope == "turn"
+        ),
+    }, deadline)
+    scan = scanned.get("transcript")
+    if "transcript" in skipped:
+        skipped = scan_sections
+
+    # 작업 요약 추출
+    result = extract_last_user_message(None, cwd, session_id, scan=scan) if scan is not None else None
+    request = request_section(result)
 
-    if enable_experience and EXPERIENCE_EXTRACTOR_AVAILABLE:
+    # 경험 요약 (완료된 작업 + 사용 방법) - ENABLE_EXPERIENCE_SUMMARY 환경변수로 제어, 기본값: true
+    def render_experience() -> list[Section]:
+        found = []
         try:
-            completion_summary, usage_guide = generate_experience_summary(event_data)
+            from experience_extractor import generate_experience_summary
+            completion_summary, usage_guide = generate_experience_summary(event_data, scan=scan)
             if completion_summary:
-                experience_section += f"\n\n🎯 *완료된 작업*\n{completion_summary}"
+                found.append(Section("완료된 작업", completion_summary, icon="🎯"))
             if usage_guide:
-                experience_section += f"\n\n🚀 *사용 방법*\n{usage_guide}"
+                found.append(Section("사용 방법", usage_guide, icon="🚀"))
+        except ImportError:
+            pass
         except Exception as e:
             print(f"[ExperienceExtractor] Error: {e}", file=sys.stderr)
+        return found
 
     # 작업 통계 및 다음 workflow 제안 (ENABLE_WORK_SUMMARY 환경변수로 제어, 기본값: true)
-    enable_summary = os.environ.get("ENABLE_WORK_SUMMARY", "true").lower() == "true"
-    summary_section = ""
-    workflow_section = ""
-
-    if enable_summary and SUMMARIZER_AVAILABLE:
+    def render_workflow() -> list[Section]:
         try:
-            summary_msg, workflow_msg = generate_stop_summary(event_data)
+            from summarizer import generate_stop_summary
+            summary_msg, workflow_msg = generate_stop_summary(event_data, scan=scan)
             # 작업 통계는 너무 길어서 비활성화 (사용한 도구, 총 도구 호출, 수정된 파일, 실행한 명령어)
             # if summary_msg:
-            #     summary_section = f"\n\n{summary_msg}"
+            #     return [Section(None, summary_msg)]
             if workflow_msg:
-                workflow_section = f"\n\n{workflow_msg}"
+                # 첫 줄("💡 *다음 단계 제안*")은 섹션 제목으로
+                _, _, suggestions = workflow_msg.partition("\n")
+                return [Section("다음 단계 제안", suggestions, icon="💡")]
+        except ImportError:
+            pass
         except Exception as e:
             print(f"[Summarizer] Error: {e}", file=sys.stderr)
+        return []
+
+    renderers = {}
+    if scan is not None:
+        if enable_experience:
+            renderers["experience"] = render_experience
+        if enable_summary:
+            renderers["workflow"] = render_workflow
+    sections, timed_out = render_sections(renderers, deadline)
+    skipped = skipped + timed_out
+    log_skipped_sections("Stop", skipped)
+    if skipped:
+        stats.note("skipped_sections", skipped)
+
+    body: list[Section] = []
+    for name in ("request", "experience", "workflow"):
+        if name in skipped:
+            body.extend(skipped_section(name))
+        elif name == "request":
+            body.extend([request] if request else [])
+        else:
+            body.extend(sections.get(name, []))
 
-    return f"""{MESSAGE_SEPARATOR}
-{header}
-
-- *시간*: {timestamp}
-- *머신*: `{machine}`{tmux_line}
-- *작업 폴더*: `{cwd}`
-- *Session ID*: `{session_id}`
-- *상태*: {reason_text}{request_line}{experience_section}{summary_section}{workflow_section}"""
+    return Message(title=title, icon=icon, severity=ICON_SEVERITY.get(icon, "info"), timestamp=timestamp,
+                   fields=tuple(fields), sections=tuple(body))
 
 
-def build_notification_message(event_data: dict) -> str:
+def build_notification_message(event_data: dict) -> Message:
     """Notification 이벤트 메시지 생성"""
     cwd = event_data.get("cwd", "unknown")
     session_id = event_data.get("session_id", "unknown")
-    message = event_data.get("message", "응답이 필요합니다")
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.time()
 
     # 환경 정보 수집
-    machine = get_machine_name()
-    tmux = get_tmux_info()
-    tmux_line = f"\n- *tmux*: `{tmux}`" if tmux else ""
+    fields = environment_fields(cwd) + [Field("Session ID", session_id)]
 
-    # 사용자 요청 추출 (transcript_path 우선 사용)
-    transcript_path = event_data.get("transcript_path")
-    result = extract_last_user_message(transcript_path, cwd, session_id)
-    if result:
-        user_request, is_command = result
-        if is_command:
-            request_line = f"\n\n---\n🔧 *실행된 커맨드*\n`{user_request}`\n---"
-        else:
-            request_line = f"\n\n---\n📝 *사용자 요청*\n\"{user_request}\"\n---"
-    else:
-        request_line = ""
+    # 파일 끝에서부터 역방향 스캔 (사용자 요청 + 질문 공유)
+    # 비용이 transcript 크기가 아니라 마지막 턴의 길이에 비례
+    scan = scan_event_transcript(event_data, tail_only=True)
 
-    # Claude 질문 추출 (AskUserQuestion tool_use에서)
-    question_section = ""
-    question_data = extract_claude_question(transcript_path, cwd, session_id)
-    if question_data:
-        question_section = format_question_section(question_data)
+    # 사용자 요청 추출
+    body = []
+    request = request_section(extract_last_user_message(None, cwd, session_id, scan=scan))
+    if request:
+        body.append(request)
 
-    return f"""{MESSAGE_SEPARATOR}
-💬 *Claude가 응답을 기다립니다*
+    # Claude 질문 추출 (AskUserQuestion tool_use에서)
+    question_data = extract_claude_question(None, cwd, session_id, scan=scan)
+    question = format_question_section(question_data) if question_data else None
+    if question:
+        body.append(question)
 
-- *시간*: {timestamp}
-- *머신*: `{machine}`{tmux_line}
-- *작업 폴더*: `{cwd}`
-- *Session ID*: `{session_id}`{request_line}{question_section}"""
+    return Message(title="Claude가 응답을 기다립니다", icon="💬", severity="info", timestamp=timestamp,
+                   fields=tuple(fields), sections=tuple(body))
 
 
-def build_session_end_message(event_data: dict) -> str:
+def build_session_end_message(event_data: dict) -> Message:
     """SessionEnd 이벤트 메시지 생성"""
     cwd = event_data.get("cwd", "unknown")
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # 환경 정보 수집
-    machine = get_machine_name()
-    tmux = get_tmux_info()
-    tmux_line = f"\n- *tmux*: `{tmux}`" if tmux else ""
+    return Message(title="Claude Code 세션 종료", icon="🔚", severity="neutral", timestamp=time.time(),
+                   fields=tuple(environment_fields(cwd)))
 
-    return f"""{MESSAGE_SEPARATOR}
-🔚 *Claude Code 세션 종료*
 
-- *시간*: {timestamp}
-- *머신*: `{machine}`{tmux_line}
-- *작업 폴더*: `{cwd}`"""
-
-
-def build_message(event_data: dict) -> str:
+def build_message(event_data: dict, deadline: Optional[float] = None) -> Message:
     """이벤트 타입에 따라 적절한 메시지 생성"""
     event_name = event_data.get("hook_event_name", "")
 
@@ -559,73 +632,399 @@ def build_message(event_data: dict) -> str:
     }
 
     builder = builders.get(event_name)
+    if builder is build_stop_message:
+        # 섹션별 마감은 transcript 전체를 분석하는 Stop 메시지에만 적용
+        return builder(event_data, deadline)
     if builder:
         return builder(event_data)
-    return f"📢 Claude Code 이벤트: {event_name}"
+    return Message.from_text(f"📢 Claude Code 이벤트: {event_name}")
+
+
+def event_transcript_path(event_data: dict) -> Optional[str]:
+    """이벤트의 transcript 경로 (없거나 옮겨졌으면 cwd/session_id로 찾음)"""
+    transcript_path = event_data.get("transcript_path")
+    if not transcript_path or not os.path.exists(transcript_path):
+        from transcript import resolve_transcript_path
+        transcript_path = resolve_transcript_path(
+            transcript_path, event_data.get("cwd", ""), event_data.get("session_id", "")
+        )
+    return transcript_path
+
+
+def build_new_message(event_data: dict, deadline: Optional[float] = None) -> tuple[Optional[Message], list[Optional[str]]]:
+    """
+    최근(NOTIFICATION_DEDUPE_TTL 안)에 보낸 알림과 같지 않을 때만 메시지 생성
+
+    transcript가 그대로인 같은 이벤트는 메시지를 만들기 전에, 내용이 같은
+    메시지는 만든 뒤에 걸러냅니다. deadline은 build_message()에 그대로 전달합니다.
+
+    Returns:
+        (메시지 또는 None(중복), 전송 후 dedupe.remember()에 넘길 지문 목록)
+    """
+    with stats.stage("resolve_transcript"):
+        transcript_path = event_transcript_path(event_data)
+    if transcript_path:
+        try:
+            stats.note("transcript_bytes", os.path.getsize(transcript_path))
+        except OSError:
+            pass
+    event_key = dedupe.event_fingerprint(event_data, transcript_path)
+    if dedupe.is_recent(event_key):
+        return None, []
+
+    with stats.stage("render"):
+        message = build_message(event_data, deadline)
+    # 전송 시각처럼 매번 바뀌는 값은 지문에서 제외
+    message_key = dedupe.message_fingerprint(event_data, message.text(include_time=False), transcript_path)
+    if dedupe.is_recent(message_key):
+        # 다음에는 메시지를 만들기 전에 걸러지도록 이벤트 지문도 기록
+        dedupe.remember(event_key)
+        return None, []
+
+    return message, [event_key, message_key]
+
+
+def build_digest_line(event_data: dict, event_time: Optional[float] = None) -> str:
+    """묶음 메시지에 들어갈 이벤트 한 줄 요약 (시각, 상태, tmux, 작업 폴더, 사용자 요청)"""
+    event_name = event_data.get("hook_event_name", "")
+    cwd = event_data.get("cwd", "unknown")
+    timestamp = datetime.fromtimestamp(event_time or time.time()).strftime("%H:%M:%S")
+
+    if event_name == "Stop":
+        reason_text, icon = get_stop_reason_display(event_data.get("stop_reason", "end_turn"))
+        status = f"{icon} {reason_text}"
+    elif event_name == "SessionEnd":
+        status = "🔚 세션 종료"
+    else:
+        status = f"📢 {event_name}"
+
+    parts = [f"{timestamp} {status}"]
+    tmux = get_tmux_info()
+    if tmux:
+        parts.append(f"`{tmux}`")
+    parts.append(f"`{cwd}`")
+
+    if event_name == "Stop":
+        result = extract_last_user_message(
+            event_data.get("transcript_path"), cwd, event_data.get("session_id", "unknown"), max_length=60
+        )
+        if result:
+            user_request, is_command = result
+            parts.append(f"`{user_request}`" if is_command else f"\"{user_request}\"")
+
+    return "• " + " · ".join(parts)
+
+
+def digest_kind(event_data: dict) -> str:
+    """묶음 제목을 고르기 위한 이벤트 종류 (Stop은 stop_reason)"""
+    if event_data.get("hook_event_name") == "Stop":
+        return event_data.get("stop_reason", "end_turn")
+    return event_data.get("hook_event_name", "")
+
+
+def build_digest_message(lines: list[str], kinds: list[str], machine: Optional[str] = None) -> Message:
+    """
+    여러 이벤트의 한 줄 요약을 묶음 메시지 하나로
+
+    Args:
+        lines: build_digest_line() 결과
+        kinds: 각 이벤트의 digest_kind() 결과
+        machine: 머신 표시 (기본값: 이 머신, 집계 서버는 이벤트를 보낸 머신 목록)
+    """
+    machine = machine or get_machine_name()
+    if all(kind == "end_turn" for kind in kinds):
+        icon, title = "✅", f"Claude Code 세션 {len(lines)}개 작업 완료"
+    elif all(kind == "SessionEnd" for kind in kinds):
+        icon, title = "🔚", f"Claude Code 세션 {len(lines)}개 종료"
+    else:
+        icon, title = "📦", f"Claude Code 알림 {len(lines)}건"
+
+    return Message(title=title, icon=icon, severity=ICON_SEVERITY.get(icon, "info"),
+                   fields=(Field("머신", machine),), sections=(Section(None, "\n".join(lines)),))
 
 
 # ============================================================
-# 채널별 전송 함수
+# 전송 마감 시간
 # ============================================================
 
-def send_slack(message: str, webhook_url: str) -> bool:
-    """Slack으로 메시지 전송 (mrkdwn 텍스트)"""
+def _env_float(name: str, default: float) -> float:
     try:
-        payload = {"text": message}
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(
-            webhook_url,
-            data=data,
-            headers={'Content-Type': 'application/json'}
-        )
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return resp.status == 200
-    except Exception as e:
-        print(f"[Slack] Error: {e}", file=sys.stderr)
-        return False
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# 훅 타임아웃 (hooks.json의 timeout과 같게 유지)
+HOOK_TIMEOUT = _env_float("NOTIFICATION_HOOK_TIMEOUT", 15.0)
+
+# 마감 후 응답 출력과 종료에 남겨둘 여유 시간 (초)
+DEADLINE_MARGIN = 1.5
+
+# 채널별 요청 타임아웃 (마감까지 남은 시간이 더 짧으면 그 시간 사용)
+SEND_TIMEOUT = 10.0
+
+# 동시에 전송할 최대 채널 수
+MAX_SEND_WORKERS = 8
+
+# 훅이 자기 알림을 보낸 뒤 보관함 재시도에 쓸 시간 (초)과 최대 메시지 수
+# 훅(Stop)은 Claude Code를 막으므로 조금만 보내고, 나머지는 다음 훅이나
+# 스풀 데몬, 릴레이, 집계 서버가 이어서 보냄
+HOOK_OUTBOX_BUDGET = 1.0
+HOOK_OUTBOX_ENTRIES = 3
+
+# 메시지 섹션(transcript 분석, 경험 요약, 다음 단계 제안)을 만드는 데 쓸 시간 (초)
+# 나머지 시간은 전송에 남겨둠 (기본값: 훅 타임아웃의 절반)
+RENDER_BUDGET = _env_float("NOTIFICATION_RENDER_BUDGET", HOOK_TIMEOUT / 2)
+
+_HOOK_START = time.monotonic()
+_send_deadline: Optional[float] = None
+
+
+def hook_deadline() -> float:
+    """훅 시작 시각 기준 전체 마감 시각 (time.monotonic 기준)"""
+    return _HOOK_START + HOOK_TIMEOUT - DEADLINE_MARGIN
+
+
+def render_deadline(start: Optional[float] = None) -> float:
+    """
+    섹션 렌더링 마감 시각 (time.monotonic 기준)
+
+    Args:
+        start: 기준 시각 (기본값: 훅 시작 시각, 스풀 데몬은 이벤트 처리 시작 시각)
+
+    Returns:
+        start + RENDER_BUDGET (훅에서는 최소 전송 시간을 남기도록 hook_deadline()보다 앞당김)
+    """
+    if start is None:
+        return min(_HOOK_START + RENDER_BUDGET, hook_deadline() - MIN_REQUEST_TIME)
+    return start + RENDER_BUDGET
+
+
+# 마감을 넘겨 생략한 섹션 자리에 넣을 (아이콘, 제목) (NOTIFICATION_SKIPPED_SECTION_NOTE=false면 섹션째 생략)
+SKIPPED_SECTION_TITLES = {
+    "request": ("📝", "사용자 요청"),
+    "experience": ("🎯", "완료된 작업"),
+    "workflow": ("💡", "다음 단계 제안"),
+}
+
+
+# 섹션 이름 → 실행 중인 렌더 스레드 (마감을 넘겨 남은 스레드 포함)
+_render_threads: dict[str, threading.Thread] = {}
+_render_threads_lock = threading.Lock()
+
+
+def render_sections(renderers: dict[str, Callable[[], object]], deadline: float) -> tuple[dict, list[str]]:
+    """
+    섹션 렌더러를 스레드로 동시에 실행하고 마감까지 끝난 결과만 수집
+
+    마감을 넘긴 렌더러는 기다리지 않습니다 (데몬 스레드라 프로세스 종료를 막지 않음).
+    스풀 데몬과 릴레이처럼 계속 실행되는 프로세스에서 남은 스레드가 쌓이거나 다음
+    이벤트의 렌더링과 겹치지 않도록, 이전 렌더가 아직 실행 중인 섹션은 시작하지 않고
+    마감을 넘긴 섹션으로 보고합니다. 그래서 섹션 이름마다 스레드는 최대 하나입니다.
+    렌더러는 이벤트마다 바뀌는 os.environ 값(tmux 등)에 의존하지 않아야 합니다.
+    렌더러에서 난 예외는 로그만 남기고 해당 섹션을 비웁니다. 렌더러의 단계 시간은 이
+    호출의 실행 기록에만 남고, 이벤트가 끝난 뒤 마친 스레드의 시간은 버립니다.
+
+    Args:
+        renderers: 섹션 이름 → 인자 없는 렌더 함수
+        deadline: 마감 시각 (time.monotonic 기준)
+
+    Returns:
+        (섹션 이름 → 결과, 마감을 넘긴 섹션 이름 목록)
+    """
+    results = {}
+    if not renderers:
+        return results, []
+
+    lock = threading.Lock()
+    all_done = threading.Event()
+    busy = []
+    started = {}
+    run = stats.current_run()
+
+    def worker(name: str, render: Callable[[], object]) -> None:
+        stats.bind_run(run)
+        try:
+            value = render()
+        except Exception as e:
+            print(f"[notifier.py] Section '{name}' failed: {e}", file=sys.stderr)
+            value = None
+        with _render_threads_lock:
+            if _render_threads.get(name) is threading.current_thread():
+                del _render_threads[name]
+        with lock:
+            results[name] = value
+            if len(results) == len(started):
+                all_done.set()
+
+    with _render_threads_lock:
+        for name, render in renderers.items():
+            previous = _render_threads.get(name)
+            if previous is not None and previous.is_alive():
+                busy.append(name)
+                continue
+            thread = threading.Thread(target=worker, args=(name, render), name=f"notifier-render-{name}", daemon=True)
+            _render_threads[name] = thread
+            started[name] = thread
+        # 모두 등록한 뒤 시작 (먼저 끝난 스레드가 all_done을 일찍 설정하지 않도록)
+        for thread in started.values():
+            thread.start()
+    if busy:
+        print(f"[notifier.py] Previous render still running - skipping: {', '.join(busy)}", file=sys.stderr)
+
+    if started:
+        all_done.wait(timeout=max(0.0, deadline - time.monotonic()))
+
+    with lock:
+        finished = {name: value for name, value in results.items() if value is not None}
+        timed_out = [name for name in renderers if name not in results]
+    return finished, timed_out
+
+
+def skipped_section(name: str) -> list[Section]:
+    """마감을 넘겨 생략한 섹션 자리에 넣을 안내 (NOTIFICATION_SKIPPED_SECTION_NOTE=false면 빈 목록)"""
+    if os.environ.get("NOTIFICATION_SKIPPED_SECTION_NOTE", "true").lower() != "true":
+        return []
+    icon, title = SKIPPED_SECTION_TITLES.get(name, ("", name))
+    return [Section(title, "(skipped: timeout)", icon=icon)]
+
+
+def log_skipped_sections(event_name: str, skipped: list[str]) -> None:
+    """마감을 넘겨 생략한 섹션 로그"""
+    if skipped:
+        print(f"[notifier.py] {event_name}: sections skipped (render budget {RENDER_BUDGET:g}s exceeded): "
+              f"{', '.join(skipped)}", file=sys.stderr)
+
+
+def request_timeout() -> float:
+    """HTTP 요청 타임아웃: SEND_TIMEOUT과 전송 마감까지 남은 시간 중 짧은 쪽"""
+    if _send_deadline is None:
+        return SEND_TIMEOUT
+    return max(0.1, min(SEND_TIMEOUT, _send_deadline - time.monotonic()))
+
+
+# 채널 함수가 남기는 마지막 실패 정보와 HTTP 상태 코드 (전송 스레드별)
+_send_failure = threading.local()
+_send_status = threading.local()
+
+
+def note_send_failure(error: str, retry_after: Optional[float] = None, permanent: bool = False) -> None:
+    """채널 함수에서 실패 원인 기록 (보관함 재시도 판단에 사용)"""
+    _send_failure.info = {"error": error, "retry_after": retry_after, "permanent": permanent}
+
+
+def note_http_status(status: int, reused: Optional[bool] = None) -> None:
+    """채널 함수에서 HTTP 응답 상태 코드와 연결 재사용 여부 기록 (전송 통계에 사용)"""
+    _send_status.code = status
+    _send_status.reused = reused
+
+
+def note_http_failure(e: Exception) -> None:
+    """예외에서 실패 원인 기록 (429/5xx는 재시도, 그 외 4xx는 재시도하지 않음)"""
+    import outbox
+    import transport
+
+    if isinstance(e, transport.HTTPStatusError):
+        note_http_status(e.code, e.reused)
+        retry_after = outbox.parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+        permanent = 400 <= e.code < 500 and e.code not in (408, 429)
+        note_send_failure(f"HTTP {e.code}", retry_after, permanent)
+    else:
+        note_send_failure(str(e) or type(e).__name__)
+
+
+def _send_posts(label: str, posts: list[dict], webhook_url: str, ok_status: int) -> bool:
+    """
+    웹훅 본문(이어지는 글)을 차례로 전송
+
+    중간 글에서 실패하면 보내지 못한 글만 실패 정보의 remaining에 남겨
+    보관함 재시도 때 이미 올라간 글을 다시 보내지 않게 합니다.
+    """
+    import transport
+
+    for i, payload in enumerate(posts):
+        try:
+            resp = transport.post_json(webhook_url, payload, timeout=request_timeout())
+            note_http_status(resp.status, resp.reused)
+            ok = resp.status == ok_status
+            if not ok:
+                note_send_failure(f"HTTP {resp.status}")
+        except Exception as e:
+            print(f"[{label}] Error: {e}", file=sys.stderr)
+            note_http_failure(e)
+            ok = False
+        if not ok:
+            if i > 0:
+                print(f"[{label}] Sent {i}/{len(posts)} posts - keeping the rest for retry", file=sys.stderr)
+                _send_failure.info["remaining"] = encode_posts(posts[i:])
+            return False
+    return True
+
+
+def send_slack(message: str, webhook_url: str) -> bool:
+    """Slack으로 메시지 전송 (pack_slack() 결과, 또는 일반 텍스트는 한도에 맞춰 나눈 텍스트 글)"""
+    posts = decode_posts(message) or pack_slack(Message.from_text(message)).posts
+    return _send_posts("Slack", posts, webhook_url, 200)
 
 
 def send_discord(message: str, webhook_url: str) -> bool:
-    """Discord로 메시지 전송"""
-    try:
-        # Discord embed 색상
-        event_colors = {
-            "✅": 5763719,   # 초록
-            "⚠️": 15548997,  # 빨강
-            "💬": 3447003,   # 파랑
-            "🔚": 9807270,   # 회색
-        }
+    """Discord로 메시지 전송 (pack_discord() 결과, 또는 일반 텍스트는 embed로)"""
+    posts = decode_posts(message) or pack_discord(Message.from_text(message)).posts
+    return _send_posts("Discord", posts, webhook_url, 204)  # Discord returns 204
 
-        # 첫 이모지로 색상 결정
-        color = 3447003  # 기본 파랑
-        for emoji, c in event_colors.items():
-            if emoji in message:
-                color = c
-                break
-
-        # 첫 줄을 제목으로
-        lines = message.strip().split('\n')
-        title = lines[0] if lines else "Claude Code"
-        description = '\n'.join(lines[1:]) if len(lines) > 1 else ""
-
-        payload = {
-            "embeds": [{
-                "title": title,
-                "description": description,
-                "color": color
-            }]
-        }
 
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(
-            webhook_url,
-            data=data,
-            headers={'Content-Type': 'application/json'}
-        )
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return resp.status == 204  # Discord returns 204
+def encode_aggregator_record(message: Message, event_data: Optional[dict] = None) -> str:
+    """
+    집계 서버로 보낼 이벤트 레코드 (JSON 문자열 - 보관함에 그대로 저장되어 재시도에도 쓰임)
+
+    메시지는 transcript가 있는 이 머신에서 만들고, 집계 서버는 레코드만으로
+    중복 확인, 묶음, 전송을 합니다. structured(Message.to_dict())가 있으면 집계 서버도
+    채널별 형식으로 렌더링합니다.
+
+    Returns:
+        {"id", "host", "event", "session_id", "kind", "line", "message", "structured", "ts"} JSON
+    """
+    import hashlib
+
+    event_data = event_data or {}
+    host = get_machine_name()
+    event_name = event_data.get("hook_event_name")
+    # 같은 알림을 다시 보내도(보관함 재시도, 훅 재실행) 같은 ID
+    # 턴을 넣어 같은 요청을 다시 입력한 새 턴의 알림은 다른 ID
+    turn = dedupe.turn_id(event_transcript_path(event_data)) if event_name else None
+    record_id = hashlib.sha256("\0".join([
+        host, str(event_data.get("session_id")), str(event_name), str(turn), message.text(include_time=False)
+    ]).encode("utf-8", "replace")).hexdigest()[:32]
+
+    record = {
+        "id": record_id,
+        "host": host,
+        "event": event_name,
+        "session_id": event_data.get("session_id"),
+        "kind": digest_kind(event_data) if event_name else None,
+        "line": build_digest_line(event_data) if event_name in ("Stop", "SessionEnd") else None,
+        "message": message.text(),
+        "structured": message.to_dict(),
+        "ts": time.time(),
+    }
+    return json.dumps(record, ensure_ascii=False)
+
+
+def send_aggregator(record: str, url: str) -> bool:
+    """집계 서버로 이벤트 레코드 전송 (record는 encode_aggregator_record() 결과)"""
+    import transport
+
+    headers = {'Content-Type': 'application/json'}
+    token = os.environ.get("NOTIFICATION_AGGREGATOR_TOKEN")
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    try:
+        resp = transport.post(url, record.encode('utf-8'), headers, timeout=request_timeout())
+        note_http_status(resp.status, resp.reused)
+        return 200 <= resp.status < 300
     except Exception as e:
-        print(f"[Discord] Error: {e}", file=sys.stderr)
+        print(f"[Aggregator] Error: {e}", file=sys.stderr)
+        note_http_failure(e)
         return False
 
 
@@ -641,12 +1040,14 @@ def _escape_applescript(text: str) -> str:
 
 
 def send_desktop(message: str, _: str = None) -> bool:
-    """데스크톱 알림 전송 (Linux/Windows/Mac)"""
+    """데스크톱 알림 전송 (Linux/Windows/Mac) - render_desktop() 결과 또는 일반 텍스트"""
+    import platform
+    import subprocess
+
     try:
-        # 첫 줄을 제목으로
-        lines = message.strip().split('\n')
-        title = lines[0] if lines else "Claude Code"
-        body = '\n'.join(lines[1:]) if len(lines) > 1 else ""
+        payload = decode_payload(message) or json.loads(render_desktop(Message.from_text(message)))
+        title = str(payload.get("title") or "Claude Code")
+        body = str(payload.get("body") or "")
 
         system = platform.system()
 
@@ -705,19 +1106,36 @@ CHANNELS: dict[str, dict] = {
     "slack": {
         "env_var": "SLACK_WEBHOOK_URL",
         "sender": send_slack,
+        "pack": pack_slack,  # Message → 한도에 맞춘 Block Kit 글 목록
+        "durable": True,  # 실패시 보관함에 저장 후 재시도
+        "rate_limit": {"rate": 1.0, "burst": 3},  # 웹훅 URL별 초당 1건, 연속 3건
     },
     "discord": {
         "env_var": "DISCORD_WEBHOOK_URL",
         "sender": send_discord,
+        "pack": pack_discord,  # Message → 한도에 맞춘 embed 글 목록
+        "durable": True,
+        "rate_limit": {"rate": 0.5, "burst": 5},  # 웹훅별 버킷 (분당 30건)
     },
     "desktop": {
         "env_var": "ENABLE_DESKTOP_NOTIFICATION",  # "true"로 설정하면 활성화
         "sender": send_desktop,
+        "render": render_desktop,
+    },
+    "aggregator": {
+        "env_var": "NOTIFICATION_AGGREGATOR_URL",  # 집계 서버 (aggregator.py serve)의 /events URL
+        "sender": send_aggregator,
+        "durable": True,
+        "render": encode_aggregator_record,  # 메시지 대신 이벤트 레코드를 전송
     },
     # 새 채널 추가 예시:
     # "teams": {
     #     "env_var": "TEAMS_WEBHOOK_URL",
     #     "sender": send_teams,
+    #     "durable": True,                          # 선택: 실패시 보관 후 재시도
+    #     "rate_limit": {"rate": 1.0, "burst": 1},  # 선택: 웹훅 URL별 속도 제한
+    #     "render": render_teams,                   # 선택: (Message, 이벤트) → 채널로 보낼 문자열 (없으면 text())
+    #     "pack": pack_teams,                       # 선택: Message → Packed (글 크기 한도가 있는 채널)
     # },
 }
 
@@ -741,26 +1159,268 @@ def get_active_channels() -> list[tuple[str, str, Callable]]:
     return active
 
 
-def send_to_all_channels(message: str) -> dict[str, bool]:
-    """모든 활성 채널로 메시지 전송"""
+# 속도 제한으로 기다린 뒤에도 요청에 남겨둘 최소 시간 (초)
+# 기다리지 않아도 되는 자리는 남은 시간이 이보다 짧아도 씀 (훅의 짧은 보관함 재시도 등)
+MIN_REQUEST_TIME = 2.0
+
+
+def _wait_for_send_slot(label: str, target: str, rate_limit: dict, deadline: float) -> bool:
+    """
+    같은 웹훅으로 보내는 모든 프로세스가 공유하는 버킷에서 자리를 예약하고 차례까지 대기
+
+    Returns:
+        False면 마감 전에 차례가 오지 않음 (보관함 재시도용 대기 시간 기록)
+    """
+    from ratelimit import reserve as reserve_send_slot
+
+    max_wait = max(0.0, deadline - time.monotonic() - MIN_REQUEST_TIME)
+    granted, wait = reserve_send_slot(target, rate_limit["rate"], rate_limit["burst"], max_wait)
+    if not granted:
+        print(f"[{label}] Rate limited (next slot in {wait:.1f}s)", file=sys.stderr)
+        note_send_failure("rate limited", retry_after=wait)
+        return False
+    if wait > 0:
+        time.sleep(wait)
+    return True
+
+
+def sender_channel(sender: Callable) -> str:
+    """채널 함수의 채널 종류 (CHANNELS 키, 전송 통계에 사용)"""
+    for name, config in CHANNELS.items():
+        if config["sender"] is sender:
+            return name
+    return getattr(sender, "__name__", "unknown")
+
+
+def channel_type(name: str) -> str:
+    """채널 이름(slack, slack_2...) → CHANNELS 키"""
+    return name if name in CHANNELS else name.rsplit("_", 1)[0]
+
+
+def _channel_config(name: str) -> dict:
+    """채널 이름(slack, slack_2...) → CHANNELS 설정"""
+    return CHANNELS.get(channel_type(name), {})
+
+
+def _deliver_concurrently(jobs: list[tuple], deadline: float) -> dict:
+    """
+    전송 작업을 동시에 실행하고 마감 시각까지만 기다림
+
+    작업마다 데몬 스레드(최대 MAX_SEND_WORKERS개)에서 전송합니다. 마감까지 끝나지
+    않은 작업은 실패로 보고하며, 남은 스레드는 데몬이라 훅 종료를 막지 않습니다.
+
+    Args:
+        jobs: [(키, 표시 이름, 대상, 채널 함수, 메시지, 속도 제한 설정 또는 None), ...]
+        deadline: 마감 시각 (time.monotonic 기준)
+
+    Returns:
+        {키: (성공 여부, 실패 정보 dict 또는 None)}
+    """
+    global _send_deadline
+
+    if not jobs:
+        return {}
+
+    _send_deadline = deadline
+    pending = deque(jobs)
+    finished: dict = {}
+    lock = threading.Lock()
+    all_done = threading.Event()
+    started_at = time.monotonic()
+    expired = [False]
+
+    def worker() -> None:
+        while True:
+            try:
+                key, label, target, sender, message, rate_limit = pending.popleft()
+            except IndexError:
+                return
+            _send_failure.info = None
+            _send_status.code = None
+            _send_status.reused = None
+            started = time.monotonic()
+            sent_at = started
+            try:
+                if rate_limit and not _wait_for_send_slot(label, target, rate_limit, deadline):
+                    ok = False
+                else:
+                    sent_at = time.monotonic()
+                    ok = bool(sender(message, target))
+            except Exception as e:
+                print(f"[{label}] Error: {e}", file=sys.stderr)
+                note_send_failure(str(e))
+                ok = False
+            failure = None if ok else (_send_failure.info or {"error": "send failed"})
+            with lock:
+                # 마감 뒤에 끝난 전송은 이미 마감 초과로 기록됨
+                if not expired[0]:
+                    stats.record_send(
+                        sender_channel(sender), label, ok, _send_status.code,
+                        time.monotonic() - sent_at, sent_at - started,
+                        outbox_id=getattr(key, "id", None), reused=_send_status.reused,
+                    )
+                print(f"[{label}] {'✓' if ok else '✗'}", file=sys.stderr)
+                finished[key] = (ok, failure)
+                if len(finished) == len(jobs):
+                    all_done.set()
+
+    for i in range(min(MAX_SEND_WORKERS, len(jobs))):
+        threading.Thread(target=worker, name=f"notifier-send-{i}", daemon=True).start()
+
+    all_done.wait(timeout=max(0.0, deadline - time.monotonic()))
+
     results = {}
+    with lock:
+        expired[0] = True
+        for key, label, _, sender, *_ in jobs:
+            if key in finished:
+                results[key] = finished[key]
+            else:
+                results[key] = (False, {"error": "deadline exceeded"})
+                print(f"[{label}] ✗ deadline exceeded", file=sys.stderr)
+                stats.record_send(sender_channel(sender), label, False, None,
+                                  time.monotonic() - started_at, outbox_id=getattr(key, "id", None))
+    return results
+
+
+def send_to_all_channels(message: Message | str, deadline: Optional[float] = None,
+                         channels: Optional[set[str]] = None,
+                         event_data: Optional[dict] = None) -> dict[str, bool]:
+    """
+    모든 활성 채널로 메시지를 동시에 전송
+
+    메시지는 채널 종류마다 한 번씩 렌더링하고(CHANNELS의 pack 또는 render), 같은 종류의
+    URL들은 결과를 함께 씁니다. pack이 있는 채널은 글 크기 한도에 맞춰 이어지는 글로
+    나누며, 섹션별 크기와 나눈/잘라낸 결과를 실행 통계에 남깁니다. 전체 마감 시각까지만 기다리며, 실패한 채널 중
+    durable 채널(Slack, Discord)의 렌더링 결과는 보관함에 저장해 나중에 다시 보냅니다.
+
+    Args:
+        message: 전송할 메시지 (문자열이면 일반 텍스트 메시지)
+        deadline: 전체 마감 시각 (time.monotonic 기준, 기본값: hook_deadline())
+        channels: 이 이름(slack, slack_2...)의 채널에만 전송 (기본값: 모든 활성 채널)
+        event_data: 메시지를 만든 이벤트 (집계 서버 채널이 레코드를 만들 때 사용)
+
+    Returns:
+        {채널 이름: 성공 여부}
+    """
     active_channels = get_active_channels()
 
     if not active_channels:
         print("No channels configured. Set environment variables:", file=sys.stderr)
         for name, config in CHANNELS.items():
             print(f"  - {config['env_var']}", file=sys.stderr)
+        return {}
+
+    if channels is not None:
+        active_channels = [channel for channel in active_channels if channel[0] in channels]
+
+    if isinstance(message, str):
+        message = Message.from_text(message)
+
+    # 채널 종류마다 한 번만 렌더링 (pack/render가 없는 채널은 mrkdwn 텍스트)
+    payloads = {}
+    with stats.stage("format"):
+        sizes = section_sizes(message)
+        if sizes:
+            stats.note("section_chars", sizes)
+        packing = {}
+        for name, _, _ in active_channels:
+            kind = channel_type(name)
+            if kind in payloads:
+                continue
+            config = _channel_config(name)
+            if config.get("pack"):
+                packed = config["pack"](message)
+                payloads[kind] = encode_posts(packed.posts)
+                if len(packed.posts) > 1 or packed.truncated or packed.oversized:
+                    packing[kind] = {"posts": len(packed.posts), "truncated_chars": packed.truncated,
+                                     "oversized": packed.oversized}
+                    print(f"[{kind}] {len(packed.posts)} post(s), sections over limit: "
+                          f"{', '.join(packed.oversized) or '-'}, truncated {packed.truncated} chars", file=sys.stderr)
+            elif config.get("render"):
+                payloads[kind] = config["render"](message, event_data)
+            else:
+                payloads[kind] = message.text()
+        if packing:
+            stats.note("packing", packing)
+    channel_messages = {name: payloads[channel_type(name)] for name, _, _ in active_channels}
+
+    jobs = [(name, name, url, sender, channel_messages[name], _channel_config(name).get("rate_limit"))
+            for name, url, sender in active_channels]
+    with stats.stage("send"):
+        delivered = _deliver_concurrently(jobs, deadline if deadline is not None else hook_deadline())
+
+    import outbox
+
+    results = {}
+    enable_outbox = outbox.is_outbox_enabled()
+    for name, url, _ in active_channels:
+        ok, failure = delivered[name]
+        results[name] = ok
+        if not ok and enable_outbox and _channel_config(name).get("durable"):
+            # 이어지는 글 중 일부만 올라갔으면 남은 글만 보관
+            payload = failure.pop("remaining", None) or channel_messages[name]
+            entry_id = outbox.enqueue(channel_type(name), name, url, payload, **failure)
+            if entry_id is not None:
+                state = "dead" if failure.get("permanent") else "queued for retry"
+                print(f"[{name}] {state} (outbox #{entry_id})", file=sys.stderr)
+
+    return results
+
+
+def flush_outbox(deadline: float, limit: Optional[int] = None) -> dict[int, bool]:
+    """
+    재시도 시각이 된 보관 메시지를 마감 시각까지 다시 전송
+
+    Args:
+        deadline: 마감 시각 (time.monotonic 기준)
+        limit: 보낼 최대 메시지 수 (기본값: 제한 없음)
+
+    Returns:
+        {메시지 ID: 성공 여부}
+    """
+    import outbox
+
+    results: dict[int, bool] = {}
+    if not outbox.is_outbox_enabled():
         return results
 
-    for name, env_value, sender in active_channels:
-        results[name] = sender(message, env_value)
-        status = "✓" if results[name] else "✗"
-        print(f"[{name}] {status}", file=sys.stderr)
+    while time.monotonic() < deadline:
+        if limit is not None and len(results) >= limit:
+            break
+        entries = outbox.claim_due() if limit is None else outbox.claim_due(limit - len(results))
+        if not entries:
+            break
+        jobs = []
+        for entry in entries:
+            config = CHANNELS.get(entry.channel)
+            if config is None:
+                outbox.mark_failed(entry, f"unknown channel: {entry.channel}", permanent=True)
+                results[entry.id] = False
+                continue
+            jobs.append((entry, f"outbox #{entry.id} {entry.label}", entry.target,
+                         config["sender"], entry.message, config.get("rate_limit")))
+
+        with stats.stage("outbox_flush"):
+            delivered = _deliver_concurrently(jobs, deadline)
+        for entry, (ok, failure) in delivered.items():
+            results[entry.id] = ok
+            if ok:
+                outbox.mark_sent(entry.id)
+            else:
+                status = outbox.mark_failed(entry, **failure)
+                if status == "dead":
+                    print(f"[outbox #{entry.id} {entry.label}] dead after {entry.attempts + 1} attempts",
+                          file=sys.stderr)
 
     return results
 
 
 def main():
+    # 단계별/채널별 시간 통계 리포트 (notifier.py --stats [--since 24h])
+    if sys.argv[1:2] == ["--stats"]:
+        sys.exit(stats.main(sys.argv[2:]))
+
     # 디버그 정보 출력
     print(f"[notifier.py] PWD: {os.getcwd()}", file=sys.stderr)
     print(f"[notifier.py] hook_event_name from stdin expected", file=sys.stderr)
@@ -777,29 +1437,67 @@ def main():
 
     try:
         event_data = json.load(sys.stdin)
+        stats.start_run(event_data.get('hook_event_name', 'unknown'), start=_HOOK_START)
         print(f"[notifier.py] Event: {event_data.get('hook_event_name', 'unknown')}", file=sys.stderr)
         print(f"[notifier.py] Keys: {list(event_data.keys())}", file=sys.stderr)
         if 'transcript_path' in event_data:
             print(f"[notifier.py] transcript_path: {event_data['transcript_path']}", file=sys.stderr)
         else:
             print(f"[notifier.py] transcript_path: NOT PROVIDED", file=sys.stderr)
-        message = build_message(event_data)
-        results = send_to_all_channels(message)
+
+        # 릴레이가 실행 중이면 이벤트를 넘기고 바로 종료 (없거나 응답이 없으면 아래에서 처리)
+        from relay import is_relay_enabled
+        if is_relay_enabled():
+            from relay import forward_event
+            from spool import event_record
+            if forward_event(event_record(event_data)):
+                stats.note("outcome", "relayed")
+                print("[notifier.py] Event handed to the notification relay", file=sys.stderr)
+                print(json.dumps({"ok": True}), flush=True)  # Stop hook 스키마 충족
+                sys.exit(0)
+
+        # 스풀 모드: 이벤트만 저장하고 바로 종료 (저장 실패시 직접 전송)
+        from spool import is_spool_enabled
+        if is_spool_enabled():
+            from spool import spool_event, ensure_daemon
+            if spool_event(event_data):
+                stats.note("outcome", "spooled")
+                ensure_daemon()
+                print("[notifier.py] Event spooled for the delivery daemon", file=sys.stderr)
+                print(json.dumps({"ok": True}), flush=True)  # Stop hook 스키마 충족
+                sys.exit(0)
+
+        message, fingerprints = build_new_message(event_data)
+        if message is None:
+            stats.note("outcome", "duplicate")
+            print("[notifier.py] Duplicate of a recent notification - skipping", file=sys.stderr)
+            print(json.dumps({"ok": True}), flush=True)  # Stop hook 스키마 충족
+            sys.exit(0)
+
+        results = send_to_all_channels(message, event_data=event_data)
+        if results:
+            dedupe.remember(*fingerprints)
+
+        # 보관함의 재시도 메시지를 조금만 전송 (훅을 오래 붙잡지 않도록)
+        flush_outbox(min(hook_deadline(), time.monotonic() + HOOK_OUTBOX_BUDGET), limit=HOOK_OUTBOX_ENTRIES)
 
         # 채널이 설정되지 않은 경우에도 성공으로 처리 (에러 방지)
         if not results:
             print("[notifier.py] No channels configured - skipping silently", file=sys.stderr)
-            print(json.dumps({"ok": True}))  # Stop hook 스키마 충족
+            print(json.dumps({"ok": True}), flush=True)  # Stop hook 스키마 충족
             sys.exit(0)  # 에러 없이 종료
 
         # 하나라도 성공하면 성공으로 처리
         success = any(results.values())
-        print(json.dumps({"ok": True}))  # Stop hook 스키마 충족 (알림 실패해도 종료 허용)
+        print(json.dumps({"ok": True}), flush=True)  # Stop hook 스키마 충족 (알림 실패해도 종료 허용)
         sys.exit(0 if success else 1)
 
     except json.JSONDecodeError:
         print("Invalid JSON input", file=sys.stderr)
         sys.exit(1)
+    finally:
+        # sys.exit()으로 끝나도 실행 기록은 남김
+        stats.finish_run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+전송 실패 메시지 보관함 (outbox)
+
+Slack/Discord 전송이 실패하면(429, 5xx, 네트워크 오류, 마감 초과) 렌더링된
+메시지를 채널별로 SQLite에 보관하고 지수 백오프 + 지터로 다시 보냅니다.
+서버가 Retry-After를 주면 그보다 먼저 보내지 않으며, OUTBOX_MAX_ATTEMPTS번
+실패하거나 다시 보내도 소용없는 오류(404 등)면 dead 상태로 남깁니다.
+
+재전송은 훅이 자기 메시지를 보낸 뒤 남은 시간 안에서, 그리고 스풀 데몬이
+실행 중이면 데몬 루프에서 수행합니다.
+
+경로: $NOTIFICATION_CACHE_DIR/outbox.sqlite3 (웹훅 URL이 들어 있으므로 권한 600)
+
+사용법:
+    python outbox.py list [--dead]        # 대기/dead 메시지 목록
+    python outbox.py replay [--dead] [ID ...]  # 즉시 다시 전송 (dead는 시도 횟수 초기화)
+    python outbox.py purge                # dead 메시지 삭제
+"""
+from __future__ import annotations
+import importlib.util
+import json
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from cache import get_cache_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# SQLite (일부 Python 빌드에는 없음 - 없으면 보관함 비활성화)
+# 보관함은 전송이 실패했을 때만 열리므로 모듈 자체는 처음 쓸 때 import
+SQLITE_AVAILABLE = importlib.util.find_spec('sqlite3') is not None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# 이 횟수만큼 실패하면 dead
+OUTBOX_MAX_ATTEMPTS = _env_int("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", 6)
+
+# 재시도 간격: BACKOFF_BASE * 2^(시도-1), 최대 BACKOFF_MAX (초)
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 1800.0
+
+# 재전송 중인 메시지를 다른 프로세스가 가져가지 않도록 잡아두는 시간 (초)
+CLAIM_LEASE = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    label TEXT NOT NULL,
+    target TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 1,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+
+class OutboxEntry(NamedTuple):
+    """보관된 메시지 하나"""
+    id: int
+    channel: str        # CHANNELS 키 (slack, discord)
+    label: str          # 표시 이름 (slack_2 등)
+    target: str         # 웹훅 URL
+    message: str
+    status: str         # pending / dead
+    attempts: int
+    next_attempt: float
+    last_error: Optional[str]
+    created_at: float
+
+
+def is_outbox_enabled() -> bool:
+    return SQLITE_AVAILABLE and os.environ.get("ENABLE_OUTBOX", "true").lower() == "true"
+
+
+def _outbox_path() -> str:
+    return os.path.join(get_cache_dir(), 'outbox.sqlite3')
+
+
+def _sqlite3():
+    """sqlite3 모듈 (처음 쓸 때 import)"""
+    import sqlite3
+    return sqlite3
+
+
+def _connect() -> sqlite3.Connection:
+    path = _outbox_path()
+    conn = _sqlite3().connect(path, timeout=5.0, isolation_level=None)
+    conn.executescript(_SCHEMA)
+    try:
+        os.chmod(path, 0o600)
+    except OSError:
+        pass
+    return conn
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더 (초 또는 HTTP 날짜) → 대기 초"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempts: int, retry_after: Optional[float] = None) -> float:
+    """attempts번 실패한 뒤 다음 시도까지 대기 시간 (지터 포함, Retry-After 이상)"""
+    import random
+
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    delay = random.uniform(delay / 2, delay)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def enqueue(channel: str, label: str, target: str, message: str,
+            error: str, retry_after: Optional[float] = None, permanent: bool = False) -> Optional[int]:
+    """
+    첫 전송에 실패한 메시지 보관
+
+    Returns:
+        메시지 ID 또는 None (저장 실패)
+    """
+    now = time.time()
+    status = 'dead' if permanent or OUTBOX_MAX_ATTEMPTS <= 1 else 'pending'
+    try:
+        conn = _connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO outbox (channel, label, target, message, status, attempts,"
+                " next_attempt, last_error, created_at) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)",
+                (channel, label, target, message, status,
+                 now + backoff_delay(1, retry_after), error, now),
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Write error: {e}", file=sys.stderr)
+        return None
+
+
+def claim_due(limit: int = 20, lease: float = CLAIM_LEASE) -> list[OutboxEntry]:
+    """재시도 시각이 된 메시지를 lease 동안 잡아두고 반환"""
+    # 보관함이 아직 없으면 (실패한 적 없음) 열지 않음
+    if not os.path.exists(_outbox_path()):
+        return []
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt <= ?"
+                " ORDER BY next_attempt LIMIT ?", (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET next_attempt = ? WHERE id = ?",
+                [(now + lease, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+            return [OutboxEntry(*row) for row in rows]
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Read error: {e}", file=sys.stderr)
+        return []
+
+
+def mark_sent(entry_id: int) -> None:
+    """재전송 성공 → 삭제"""
+    try:
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Write error: {e}", file=sys.stderr)
+
+
+def mark_failed(entry: OutboxEntry, error: str,
+                retry_after: Optional[float] = None, permanent: bool = False,
+                remaining: Optional[str] = None) -> str:
+    """
+    재전송 실패 기록 (다음 시도 예약 또는 dead)
+
+    Args:
+        remaining: 이어지는 글 중 일부만 보냈을 때 남은 글 (다음 시도에는 이것만 전송)
+
+    Returns:
+        새 상태 (pending / dead)
+    """
+    attempts = entry.attempts + 1
+    status = 'dead' if permanent or attempts >= OUTBOX_MAX_ATTEMPTS else 'pending'
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ?, message = ?"
+                " WHERE id = ?",
+                (status, attempts, time.time() + backoff_delay(attempts, retry_after), error,
+                 remaining or entry.message, entry.id),
+            )
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Write error: {e}", file=sys.stderr)
+    return status
+
+
+def list_entries(status: Optional[str] = None) -> list[OutboxEntry]:
+    """보관된 메시지 목록 (status 지정시 해당 상태만)"""
+    if not os.path.exists(_outbox_path()):
+        return []
+    try:
+        conn = _connect()
+        try:
+            if status:
+                rows = conn.execute("SELECT * FROM outbox WHERE status = ? ORDER BY id", (status,))
+            else:
+                rows = conn.execute("SELECT * FROM outbox ORDER BY id")
+            return [OutboxEntry(*row) for row in rows.fetchall()]
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Read error: {e}", file=sys.stderr)
+        return []
+
+
+def pending_count() -> int:
+    """재시도를 기다리는 메시지 수"""
+    return len(list_entries('pending'))
+
+
+def requeue(ids: Optional[list[int]] = None, status: str = 'pending') -> int:
+    """
+    메시지를 지금 바로 다시 보낼 수 있게 되돌림 (dead는 시도 횟수 초기화)
+
+    Returns:
+        되돌린 메시지 수
+    """
+    query = "UPDATE outbox SET status = 'pending', next_attempt = 0"
+    if status == 'dead':
+        query += ", attempts = 0"
+    query += " WHERE status = ?"
+    params: list = [status]
+    if ids:
+        query += f" AND id IN ({','.join('?' * len(ids))})"
+        params.extend(ids)
+    try:
+        conn = _connect()
+        try:
+            return conn.execute(query, params).rowcount
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Write error: {e}", file=sys.stderr)
+        return 0
+
+
+def purge_dead() -> int:
+    """dead 메시지 삭제"""
+    try:
+        conn = _connect()
+        try:
+            return conn.execute("DELETE FROM outbox WHERE status = 'dead'").rowcount
+        finally:
+            conn.close()
+    except _sqlite3().Error as e:
+        print(f"[Outbox] Write error: {e}", file=sys.stderr)
+        return 0
+
+
+def _redact(url: str) -> str:
+    """목록 출력용: 웹훅 토큰 부분 숨김"""
+    scheme, _, rest = url.partition('://')
+    host = rest.split('/', 1)[0]
+    return f"{scheme}://{host}/…" if host else '…'
+
+
+def _preview(message: str) -> str:
+    """목록에 표시할 메시지 첫 줄 (렌더링된 JSON이면 제목, 텍스트면 구분선 등을 건너뛴 첫 내용 줄)"""
+    if message.startswith(('{', '[')):
+        try:
+            payload = json.loads(message)
+            if isinstance(payload, list):
+                payload = payload[0]
+            embeds = payload.get('embeds') or [{}]
+            text = payload.get('text') or payload.get('title') or embeds[0].get('title') or ''
+            if text:
+                return str(text)
+        except (ValueError, AttributeError, IndexError):
+            pass
+    return next((line for line in message.split('\n') if any(ch.isalnum() for ch in line)), '')
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Notification outbox")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_list = sub.add_parser('list', help='List pending (or dead) messages')
+    p_list.add_argument('--dead', action='store_true', help='Show dead messages')
+    p_replay = sub.add_parser('replay', help='Send pending (or dead) messages now')
+    p_replay.add_argument('--dead', action='store_true', help='Replay dead messages')
+    p_replay.add_argument('ids', nargs='*', type=int, help='Message IDs (default: all)')
+    sub.add_parser('purge', help='Delete dead messages')
+    args = parser.parse_args(argv)
+
+    if not SQLITE_AVAILABLE:
+        print("[Outbox] sqlite3 is not available in this Python build", file=sys.stderr)
+        return 1
+
+    if args.command == 'list':
+        entries = list_entries('dead' if args.dead else 'pending')
+        for entry in entries:
+            first_line = _preview(entry.message)[:60]
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.next_attempt))
+            print(f"{entry.id:>5}  {entry.label:<10} {entry.status:<7} attempts={entry.attempts}"
+                  f"  next={when}  {_redact(entry.target)}")
+            print(f"       {first_line.strip()}")
+            if entry.last_error:
+                print(f"       error: {entry.last_error}")
+        print(f"{len(entries)} message(s)")
+        return 0
+
+    if args.command == 'replay':
+        count = requeue(args.ids, 'dead' if args.dead else 'pending')
+        print(f"Requeued {count} message(s)")
+        # 전송은 notifier의 채널 함수가 담당
+        import notifier
+        results = notifier.flush_outbox(time.monotonic() + notifier.SEND_TIMEOUT + notifier.DEADLINE_MARGIN)
+        print(f"Sent {sum(results.values())}/{len(results)}")
+        return 0 if all(results.values()) else 1
+
+    if args.command == 'purge':
+        print(f"Deleted {purge_dead()} dead message(s)")
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
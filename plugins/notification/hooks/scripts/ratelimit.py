@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+프로세스 간 공유 토큰 버킷 (웹훅 URL별 전송 속도 제한)
+
+동시에 실행되는 여러 세션의 notifier.py가 같은 웹훅으로 보내면 Slack(약 1건/초)과
+Discord(웹훅별 버킷) 제한을 넘겨 429가 납니다. 웹훅 URL마다 상태 파일 하나를
+두고 flock으로 잠근 채 토큰을 계산하므로, 모든 프로세스가 하나의 버킷을 나눠 씁니다.
+
+토큰이 없으면 다음 토큰이 생길 시각까지의 자리를 예약하고 그만큼 기다린 뒤
+보냅니다(몰린 요청을 고르게 분산). 기다릴 시간이 허용치보다 길면 예약하지 않고
+거절하며, 호출자는 그 메시지를 보관함(outbox)에 넣어 나중에 보냅니다.
+
+경로: $NOTIFICATION_CACHE_DIR/ratelimit/<URL 해시>.json
+
+사용법:
+    from ratelimit import reserve
+
+    granted, wait = reserve(url, rate=1.0, burst=3, max_wait=5.0)
+    if granted:
+        time.sleep(wait)
+        send(...)
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+
+from cache import get_cache_dir
+
+# 파일 잠금 (Unix만 - 없으면 제한 없이 통과)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+def is_rate_limit_enabled() -> bool:
+    return FCNTL_AVAILABLE and os.environ.get("ENABLE_RATE_LIMIT", "true").lower() == "true"
+
+
+def _bucket_path(key: str) -> str:
+    import hashlib
+
+    # 파일 이름에 웹훅 토큰이 남지 않도록 해시 사용
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(get_cache_dir('ratelimit'), f"{name}.json")
+
+
+def reserve(key: str, rate: float, burst: float, max_wait: float) -> tuple[bool, float]:
+    """
+    버킷에서 토큰 하나 예약
+
+    Args:
+        key: 버킷 키 (웹훅 URL)
+        rate: 초당 토큰 충전량
+        burst: 버킷 크기 (연속으로 바로 보낼 수 있는 수)
+        max_wait: 이보다 오래 기다려야 하면 예약하지 않음 (초)
+
+    Returns:
+        (예약 여부, 보내기 전 기다릴 시간 또는 거절시 필요한 대기 시간)
+    """
+    if not is_rate_limit_enabled() or rate <= 0:
+        return True, 0.0
+
+    try:
+        with open(_bucket_path(key), 'a+', encoding='utf-8') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or '{}')
+            except ValueError:
+                state = {}
+
+            now = time.time()
+            updated = min(float(state.get('updated', now)), now)
+            tokens = min(float(burst), float(state.get('tokens', burst)) + (now - updated) * rate)
+
+            # 토큰이 음수면 이미 예약된 자리가 있음: 그 뒤로 줄을 섬
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if wait > max_wait:
+                return False, wait
+
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({'tokens': tokens - 1, 'updated': now}))
+            return True, wait
+    except OSError as e:
+        print(f"[RateLimit] State file error: {e}", file=sys.stderr)
+        return True, 0.0
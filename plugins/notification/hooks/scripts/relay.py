@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Unix 소켓 알림 릴레이 (호스트당 하나)
+
+한 호스트에서 세션 수십 개가 돌면 훅마다 새 Python 인터프리터가 transcript를
+분석하고 메시지를 만들고 웹훅 연결을 엽니다. 릴레이는 계속 실행되는 asyncio
+프로세스로, 훅이 넘긴 이벤트를 받아 메시지 생성, 중복 방지, 속도 제한, 묶음,
+전송을 모두 맡습니다. 모든 세션이 한 프로세스의 keep-alive 연결, 환경 정보 캐시,
+import된 모듈을 함께 씁니다.
+
+훅은 소켓이 있으면 이벤트 레코드를 한 번에 써서 넘기고, 릴레이의 확인 응답을 받으면
+바로 종료합니다. 소켓이 없거나 응답이 없으면 지금처럼 스풀 또는 훅 프로세스에서
+직접 처리합니다.
+
+이벤트는 받은 순서대로 하나씩 처리하며(스풀 데몬과 같은 전송 코드), 묶음 창과
+보관함 재시도도 스풀 데몬과 같습니다. 받은 이벤트는 메모리에만 있으므로, 종료할 때
+(SIGTERM/SIGINT) 소켓을 먼저 닫고 남은 이벤트와 묶음을 모두 보낸 뒤 끝납니다.
+채널 설정(SLACK_WEBHOOK_URL 등)은 릴레이를 시작한 환경의 값을 씁니다.
+
+경로 ($NOTIFICATION_CACHE_DIR):
+  relay.sock  릴레이 소켓 (NOTIFICATION_RELAY_SOCKET으로 변경, 권한 600)
+  relay.lock  단일 실행 잠금 (flock)
+  relay.pid   실행 중인 릴레이 PID
+
+프로토콜: 이벤트 레코드(스풀 파일과 같은 형식) JSON 한 줄 → 응답 "ok\\n"
+
+설정:
+  ENABLE_RELAY: "false"면 훅이 릴레이를 찾지 않음 (기본값: true)
+  NOTIFICATION_RELAY_SOCKET: 소켓 경로
+
+사용법:
+    from relay import is_relay_enabled, forward_event
+
+    if is_relay_enabled() and forward_event(event_record(event_data)):
+        return
+
+    # 릴레이 실행 (tmux 창, systemd --user 서비스 등) / 상태 확인
+    python relay.py serve
+    python relay.py status
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+
+from cache import get_cache_dir, read_json, write_json_atomic
+
+# 파일 잠금 + Unix 소켓 (Unix만 - 없으면 릴레이를 쓰지 않음)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+# 훅이 릴레이의 확인 응답을 기다리는 시간 (초, 넘으면 직접 처리)
+RELAY_ACK_TIMEOUT = 1.0
+
+# 릴레이가 연결에서 이벤트 한 줄을 기다리는 시간 (초)
+RELAY_READ_TIMEOUT = 5.0
+
+# 이벤트 레코드 최대 크기 (바이트)
+MAX_RECORD_BYTES = 4 * 1024 * 1024
+
+# 이벤트가 없을 때 묶음 창을 확인하는 주기 (초)
+RELAY_POLL_INTERVAL = 0.2
+
+
+def is_relay_enabled() -> bool:
+    return FCNTL_AVAILABLE and os.environ.get("ENABLE_RELAY", "true").lower() == "true"
+
+
+def relay_socket_path() -> str:
+    return os.environ.get("NOTIFICATION_RELAY_SOCKET") or os.path.join(get_cache_dir(), 'relay.sock')
+
+
+# ============================================================
+# 훅 쪽: 이벤트 넘기기
+# ============================================================
+
+def forward_event(record: dict) -> bool:
+    """
+    릴레이에 이벤트 레코드 전달
+
+    Returns:
+        릴레이가 받았으면 True (소켓이 없거나 응답이 없으면 False - 직접 처리)
+    """
+    path = relay_socket_path()
+    if not os.path.exists(path):
+        return False
+
+    import socket
+
+    data = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(RELAY_ACK_TIMEOUT)
+            sock.connect(path)
+            sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+            return sock.recv(16).startswith(b"ok")
+    except OSError as e:
+        print(f"[Relay] Unavailable ({e}) - delivering in-process", file=sys.stderr)
+        return False
+
+
+def relay_running() -> bool:
+    """릴레이 잠금이 잡혀 있으면 실행 중"""
+    try:
+        with open(os.path.join(get_cache_dir(), 'relay.lock'), 'a') as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            return False
+    except OSError:
+        return False
+
+
+# ============================================================
+# 릴레이 쪽: 이벤트 받기 + 전송
+# ============================================================
+
+class Relay:
+    """소켓으로 받은 이벤트를 순서대로 전송하는 asyncio 서버"""
+
+    def __init__(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from digest import DigestBuffer
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # 메시지 생성은 os.environ(tmux)을 바꾸므로 전송 작업은 스레드 하나에서 차례로 실행
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='relay-delivery')
+        self.digests = DigestBuffer()
+        self.refs: dict[str, int] = {}
+        self.received = 0
+        self.stopping = asyncio.Event()
+
+    async def handle(self, reader, writer) -> None:
+        """연결 하나 = 이벤트 한 줄 (큐에 넣으면 바로 확인 응답)"""
+        import asyncio
+
+        reply = b"error\n"
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=RELAY_READ_TIMEOUT)
+            record = json.loads(line)
+            if isinstance(record, dict) and isinstance(record.get('event'), dict) and not self.stopping.is_set():
+                self.received += 1
+                self.queue.put_nowait((f"relay-{self.received}", record))
+                reply = b"ok\n"
+        except (asyncio.TimeoutError, ValueError, asyncio.LimitOverrunError) as e:
+            _log(f"[Relay] Rejected connection: {type(e).__name__}")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        try:
+            writer.write(reply)
+            await writer.drain()
+            writer.close()
+        except ConnectionError:
+            pass
+
+    def deliver(self, key: str, record: dict) -> None:
+        import spool
+        import stats
+
+        event_name = record['event'].get('hook_event_name', 'unknown')
+        stats.start_run(event_name, mode='relay')
+        stats.note('queued_ms', round((time.time() - record.get('spooled_at', time.time())) * 1000, 3))
+        try:
+            buffered = spool.deliver_event(record, self.digests, key)
+            if buffered:
+                self.refs[key] = buffered
+        except Exception as e:
+            _log(f"[Relay] Delivery error ({event_name}): {e}")
+        finally:
+            stats.finish_run()
+
+    def flush_digests(self, force: bool = False) -> None:
+        import spool
+
+        if self.digests:
+            spool.flush_digests(self.digests, self.refs, force, release=lambda key: None)
+
+    async def run_delivery(self) -> None:
+        """큐의 이벤트 전송 + 묶음 창/보관함 재시도 확인 (stopping이면 남은 이벤트까지 보내고 종료)"""
+        import asyncio
+        import spool
+
+        loop = asyncio.get_running_loop()
+        last_outbox_check = 0.0
+        while True:
+            try:
+                key, record = await asyncio.wait_for(self.queue.get(), timeout=RELAY_POLL_INTERVAL)
+                await loop.run_in_executor(self.executor, self.deliver, key, record)
+            except asyncio.TimeoutError:
+                if self.stopping.is_set():
+                    break
+
+            await loop.run_in_executor(self.executor, self.flush_digests)
+            if time.monotonic() - last_outbox_check >= spool.OUTBOX_POLL_INTERVAL:
+                last_outbox_check = time.monotonic()
+                try:
+                    await loop.run_in_executor(self.executor, spool.flush_outbox)
+                except Exception as e:
+                    _log(f"[Relay] Outbox error: {e}")
+
+        await loop.run_in_executor(self.executor, self.flush_digests, True)
+
+    async def serve(self, path: str) -> None:
+        import asyncio
+        import signal
+
+        server = await asyncio.start_unix_server(self.handle, path=path, limit=MAX_RECORD_BYTES)
+        os.chmod(path, 0o600)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+        _log(f"[Relay] Listening on {path} (pid {os.getpid()})")
+
+        delivery = asyncio.ensure_future(self.run_delivery())
+        await self.stopping.wait()
+
+        # 새 이벤트를 받지 않게 소켓부터 닫음 (훅은 바로 직접 처리로 넘어감)
+        server.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        _log(f"[Relay] Stopping - delivering {self.queue.qsize()} queued event(s)")
+        await delivery
+        self.executor.shutdown()
+
+
+def _log(message: str) -> None:
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+
+def serve() -> int:
+    """
+    릴레이 메인 (포그라운드 실행)
+
+    Returns:
+        종료 코드 (이미 다른 릴레이가 실행 중이면 0)
+    """
+    import asyncio
+
+    if not FCNTL_AVAILABLE:
+        print("[Relay] The relay requires Unix domain sockets", file=sys.stderr)
+        return 1
+
+    lock = open(os.path.join(get_cache_dir(), 'relay.lock'), 'a')
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        print("[Relay] Already running", file=sys.stderr)
+        return 0
+
+    path = relay_socket_path()
+    pid_path = os.path.join(get_cache_dir(), 'relay.pid')
+    try:
+        # 이전 릴레이가 비정상 종료하며 남긴 소켓 파일
+        if os.path.exists(path):
+            os.unlink(path)
+        write_json_atomic(pid_path, {'pid': os.getpid(), 'started_at': time.time(), 'socket': path})
+        asyncio.run(Relay().serve(path))
+        _log("[Relay] Stopped")
+        return 0
+    finally:
+        try:
+            os.unlink(pid_path)
+        except OSError:
+            pass
+        lock.close()
+        import transport
+        transport.close_all()
+
+
+def status() -> dict:
+    """릴레이 상태"""
+    info = read_json(os.path.join(get_cache_dir(), 'relay.pid')) or {}
+    return {
+        'running': relay_running() if FCNTL_AVAILABLE else False,
+        'pid': info.get('pid'),
+        'socket': relay_socket_path(),
+    }
+
+
+# CLI: 릴레이 실행 / 상태 확인
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'serve':
+        sys.exit(serve())
+    elif command == 'status':
+        print(json.dumps(status(), indent=2))
+    else:
+        print("Usage: python relay.py [serve|status]", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+이벤트 스풀 + 전송 데몬
+
+스풀 모드(ENABLE_SPOOL=true)에서 훅은 이벤트 JSON을 스풀 디렉토리에 원자적으로
+저장하고 바로 종료합니다. 메시지 생성과 네트워크 전송은 필요할 때 자동으로
+시작되는 전송 데몬이 맡으므로, 웹훅 지연이 Claude의 턴을 막지 않습니다.
+
+디렉토리 ($NOTIFICATION_CACHE_DIR/spool):
+  new/         훅이 저장한 이벤트 (파일 이름 = 시각 순서)
+  work/        데몬이 처리 중인 이벤트 (rename으로 가져가므로 한 번만 처리)
+  daemon.lock  데몬 단일 실행 잠금 (flock)
+  daemon.pid   실행 중인 데몬 PID
+  daemon.log   데몬 로그
+
+묶음 창이 설정된 채널의 Stop/SessionEnd는 digest.py의 버퍼에 모았다가
+묶음 메시지 하나로 보냅니다. 데몬은 보관함(outbox.py)의 재시도 메시지도 주기적으로 전송하며,
+DAEMON_IDLE_TIMEOUT 동안 새 이벤트가 없고 재시도할 메시지도 없으면 스스로
+종료하고, 다음 훅이 다시 시작합니다.
+
+사용법:
+    from spool import spool_event, ensure_daemon
+
+    if spool_event(event_data):
+        ensure_daemon()
+
+    # 데몬 직접 실행 / 상태 확인
+    python spool.py serve
+    python spool.py status
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import dedupe
+import stats
+from cache import get_cache_dir, read_json, write_json_atomic
+from digest import DIGEST_EVENTS, DigestBuffer, DigestItem, digest_window
+
+# 파일 잠금 (Unix만 - 없으면 스풀 모드를 쓰지 않고 직접 전송)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 새 이벤트 확인 주기 (초)
+SPOOL_POLL_INTERVAL = 0.2
+
+# 이 시간 동안 이벤트가 없으면 데몬 종료 (초, 보관함에 재시도 대기 메시지가 있으면 유지)
+DAEMON_IDLE_TIMEOUT = 600
+
+# 보관함(outbox) 재시도 확인 주기 (초)
+OUTBOX_POLL_INTERVAL = 5.0
+
+# 데몬 로그 최대 크기 (시작할 때 넘으면 비움)
+DAEMON_LOG_MAX_BYTES = 1024 * 1024
+
+# 훅 프로세스에서 함께 저장할 환경변수 (데몬은 다른 tmux 창에서 시작되었을 수 있음)
+EVENT_ENV_VARS = ('TMUX', 'TMUX_PANE')
+
+
+def is_spool_enabled() -> bool:
+    """ENABLE_SPOOL=true이고 이 플랫폼에서 지원하면 True"""
+    return FCNTL_AVAILABLE and os.environ.get("ENABLE_SPOOL", "false").lower() == "true"
+
+
+def _spool_dir(*parts: str) -> str:
+    return get_cache_dir('spool', *parts)
+
+
+# ============================================================
+# 훅 쪽: 이벤트 저장 + 데몬 시작
+# ============================================================
+
+def event_record(event_data: dict) -> dict:
+    """훅 프로세스 밖에서 처리할 이벤트 레코드 (스풀 파일, 릴레이 전송에 같은 형식 사용)"""
+    env = {name: os.environ[name] for name in EVENT_ENV_VARS if name in os.environ}
+    return {'spooled_at': time.time(), 'env': env, 'event': event_data}
+
+
+def spool_event(event_data: dict) -> Optional[str]:
+    """
+    이벤트를 스풀 디렉토리에 원자적으로 저장
+
+    Returns:
+        저장된 파일 경로 또는 None (실패)
+    """
+    name = f"{time.time_ns():020d}-{os.getpid()}-{os.urandom(4).hex()}.json"
+    path = os.path.join(_spool_dir('new'), name)
+    if not write_json_atomic(path, event_record(event_data)):
+        return None
+    return path
+
+
+def daemon_running() -> bool:
+    """데몬 잠금이 잡혀 있으면 실행 중"""
+    try:
+        with open(os.path.join(_spool_dir(), 'daemon.lock'), 'a') as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            return False
+    except OSError:
+        return False
+
+
+def ensure_daemon() -> bool:
+    """
+    전송 데몬이 없으면 백그라운드로 시작 (훅 프로세스와 분리된 세션)
+
+    동시에 여러 훅이 시작해도 잠금을 잡은 데몬 하나만 남습니다.
+    """
+    if daemon_running():
+        return True
+
+    import subprocess
+
+    log_path = os.path.join(_spool_dir(), 'daemon.log')
+    try:
+        if os.path.exists(log_path) and os.path.getsize(log_path) > DAEMON_LOG_MAX_BYTES:
+            os.truncate(log_path, 0)
+        with open(log_path, 'ab') as log:
+            subprocess.Popen(
+                [sys.executable, os.path.join(SCRIPT_DIR, 'spool.py'), 'serve'],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                cwd=SCRIPT_DIR,
+                start_new_session=True,
+                close_fds=True,
+            )
+        return True
+    except OSError as e:
+        print(f"[Spool] Failed to start delivery daemon: {e}", file=sys.stderr)
+        return False
+
+
+# ============================================================
+# 데몬 쪽: 이벤트 가져오기 + 전송
+# ============================================================
+
+def pending_events() -> list[str]:
+    """처리 대기 중인 이벤트 파일 (저장 순서)"""
+    directory = _spool_dir('new')
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names]
+
+
+def claim_event(path: str) -> Optional[str]:
+    """이벤트 파일을 work/로 옮겨 가져감 (다른 데몬이 먼저 가져갔으면 None)"""
+    work_path = os.path.join(_spool_dir('work'), os.path.basename(path))
+    try:
+        os.rename(path, work_path)
+    except FileNotFoundError:
+        return None
+    return work_path
+
+
+def _recover_claimed() -> None:
+    """이전 데몬이 처리 중에 종료된 이벤트를 new/로 되돌림"""
+    work_dir = _spool_dir('work')
+    for name in os.listdir(work_dir):
+        try:
+            os.rename(os.path.join(work_dir, name), os.path.join(_spool_dir('new'), name))
+        except OSError:
+            pass
+
+
+def _log(message: str) -> None:
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+
+@contextmanager
+def _event_environment(record: dict) -> Iterator[None]:
+    """메시지를 만드는 동안 이벤트를 보낸 훅의 환경변수(tmux 등) 적용"""
+    env = record.get('env', {})
+    saved = {name: os.environ.get(name) for name in EVENT_ENV_VARS}
+    for name in EVENT_ENV_VARS:
+        if name in env:
+            os.environ[name] = env[name]
+        else:
+            os.environ.pop(name, None)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _send_deadline() -> float:
+    import notifier
+
+    return time.monotonic() + notifier.SEND_TIMEOUT + notifier.DEADLINE_MARGIN
+
+
+def deliver_event(record: dict, digests: DigestBuffer, key: str) -> int:
+    """
+    스풀된 이벤트로 메시지를 만들어 전송 (묶음 창이 있는 채널은 버퍼에 추가)
+
+    Returns:
+        이 이벤트를 담은 묶음 버퍼 수 (0이면 처리 완료)
+    """
+    # 훅 경로에서는 불러오지 않도록 데몬에서만 import
+    import notifier
+
+    event_data = record.get('event', {})
+    event_name = event_data.get('hook_event_name', 'unknown')
+    active = [name for name, _, _ in notifier.get_active_channels()]
+
+    windows = {}
+    if event_name in DIGEST_EVENTS:
+        windows = {name: digest_window(notifier.channel_type(name)) for name in active}
+        windows = {name: window for name, window in windows.items() if window > 0}
+
+    with _event_environment(record):
+        # 섹션 마감은 데몬 시작이 아니라 이 이벤트 처리 시작부터 계산
+        message, fingerprints = notifier.build_new_message(event_data, notifier.render_deadline(time.monotonic()))
+        if message is None:
+            _log(f"[Spool] {event_name}: duplicate of a recent notification - skipped")
+            return 0
+        line = notifier.build_digest_line(event_data, record.get('spooled_at')) if windows else ''
+
+    waited = time.time() - record.get('spooled_at', time.time())
+    if active:
+        dedupe.remember(*fingerprints)
+    immediate = set(active) - set(windows)
+    if immediate or not active:
+        results = notifier.send_to_all_channels(message, deadline=_send_deadline(), channels=immediate,
+                                                event_data=event_data)
+        _log(f"[Spool] {event_name} (queued {waited:.2f}s): {results}")
+
+    kind = notifier.digest_kind(event_data)
+    for name, window in windows.items():
+        digests.add(name, DigestItem(message, line, kind, key), window)
+    if windows:
+        _log(f"[Spool] {event_name} (queued {waited:.2f}s): buffered for {sorted(windows)}")
+    return len(windows)
+
+
+def flush_digests(digests: DigestBuffer, refs: dict[str, int], force: bool = False,
+                  release: Optional[Callable[[str], None]] = None) -> None:
+    """
+    창이 끝났거나 가득 찬 묶음 전송 (한 건뿐이면 원래 메시지)
+
+    Args:
+        refs: 이벤트 키 → 아직 전송되지 않은 묶음 수
+        release: 이벤트를 담은 묶음이 모두 전송되면 키로 호출 (기본값: 스풀 파일 삭제)
+    """
+    import notifier
+
+    for channel, items in digests.pop_due(force):
+        if len(items) == 1:
+            message = items[0].message
+        else:
+            message = notifier.build_digest_message([item.line for item in items],
+                                                    [item.kind for item in items])
+        stats.start_run('digest', mode='daemon')
+        stats.note('digest_events', len(items))
+        try:
+            results = notifier.send_to_all_channels(message, deadline=_send_deadline(), channels={channel})
+            _log(f"[Spool] Digest of {len(items)} event(s): {results}")
+        except Exception as e:
+            _log(f"[Spool] Digest delivery error ({channel}): {e}")
+        finally:
+            stats.finish_run()
+
+        # 이벤트를 담은 묶음이 모두 전송되면 스풀 파일 삭제
+        for item in items:
+            refs[item.key] -= 1
+            if refs[item.key] <= 0:
+                del refs[item.key]
+                (release or _remove)(item.key)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _outbox_pending() -> bool:
+    import outbox
+
+    return outbox.is_outbox_enabled() and outbox.pending_count() > 0
+
+
+def flush_outbox() -> None:
+    """보관함에서 재시도 시각이 된 메시지 전송"""
+    import notifier
+
+    stats.start_run('outbox', mode='daemon')
+    results = {}
+    try:
+        results = notifier.flush_outbox(time.monotonic() + notifier.SEND_TIMEOUT + notifier.DEADLINE_MARGIN)
+    finally:
+        # 재시도할 메시지가 없던 주기는 기록하지 않음
+        if results:
+            stats.finish_run()
+        else:
+            stats.discard_run()
+    if results:
+        _log(f"[Spool] Outbox retries: {sum(results.values())}/{len(results)} sent")
+
+
+def serve(idle_timeout: float = DAEMON_IDLE_TIMEOUT, poll_interval: float = SPOOL_POLL_INTERVAL) -> int:
+    """
+    전송 데몬 메인 루프
+
+    Returns:
+        종료 코드 (이미 다른 데몬이 실행 중이면 0)
+    """
+    if not FCNTL_AVAILABLE:
+        print("[Spool] Delivery daemon requires fcntl (Unix only)", file=sys.stderr)
+        return 1
+
+    lock = open(os.path.join(_spool_dir(), 'daemon.lock'), 'a')
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return 0
+
+    pid_path = os.path.join(_spool_dir(), 'daemon.pid')
+    write_json_atomic(pid_path, {'pid': os.getpid(), 'started_at': time.time()})
+    _log(f"[Spool] Delivery daemon started (pid {os.getpid()})")
+
+    try:
+        _recover_claimed()
+        digests = DigestBuffer()
+        # 스풀 파일 → 아직 전송되지 않은 묶음 수
+        refs: dict[str, int] = {}
+        last_activity = time.monotonic()
+        last_outbox_check = 0.0
+        while True:
+            if digests:
+                flush_digests(digests, refs)
+
+            if time.monotonic() - last_outbox_check >= OUTBOX_POLL_INTERVAL:
+                last_outbox_check = time.monotonic()
+                try:
+                    flush_outbox()
+                except Exception as e:
+                    _log(f"[Spool] Outbox error: {e}")
+
+            paths = pending_events()
+            if not paths:
+                idle = time.monotonic() - last_activity > idle_timeout
+                if idle and not digests and not _outbox_pending():
+                    _log("[Spool] Idle - exiting")
+                    return 0
+                time.sleep(poll_interval)
+                continue
+
+            for path in paths:
+                work_path = claim_event(path)
+                if not work_path:
+                    continue
+                record = read_json(work_path)
+                buffered = 0
+                try:
+                    if isinstance(record, dict):
+                        stats.start_run(record.get('event', {}).get('hook_event_name', 'unknown'), mode='daemon')
+                        stats.note('queued_ms', round((time.time() - record.get('spooled_at', time.time())) * 1000, 3))
+                        buffered = deliver_event(record, digests, work_path)
+                except Exception as e:
+                    _log(f"[Spool] Delivery error ({os.path.basename(work_path)}): {e}")
+                finally:
+                    stats.finish_run()
+                # 묶음 버퍼에 들어간 이벤트는 묶음이 전송될 때 삭제 (데몬이 죽으면 다시 처리)
+                if buffered:
+                    refs[work_path] = buffered
+                else:
+                    _remove(work_path)
+            last_activity = time.monotonic()
+    finally:
+        try:
+            os.unlink(pid_path)
+        except OSError:
+            pass
+        lock.close()
+
+
+def status() -> dict:
+    """데몬 상태 + 대기 중인 이벤트 수"""
+    info = read_json(os.path.join(_spool_dir(), 'daemon.pid')) or {}
+    return {
+        'running': daemon_running() if FCNTL_AVAILABLE else False,
+        'pid': info.get('pid'),
+        'pending': len(pending_events()),
+        'spool_dir': _spool_dir(),
+    }
+
+
+# CLI: 데몬 실행 / 상태 확인
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'serve':
+        sys.exit(serve())
+    elif command == 'status':
+        print(json.dumps(status(), indent=2))
+    else:
+        print("Usage: python spool.py [serve|status]", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+훅 실행 단계별 시간 기록 + 통계 리포트
+
+훅이 한 번 실행될 때마다(스풀 데몬은 이벤트마다) 단계별 소요 시간을 JSONL 레코드
+한 줄로 남깁니다. 파일이 NOTIFICATION_STATS_MAX_BYTES를 넘으면 runs.jsonl.1로
+교체하고 새 파일에 이어 씁니다 (이전 파일 하나만 보관).
+
+경로: $NOTIFICATION_CACHE_DIR/stats/runs.jsonl
+
+레코드 예:
+    {"ts": 1760000000.0, "event": "Stop", "mode": "hook", "total_ms": 312.4,
+     "stages": {"resolve_transcript": 0.2, "scan:incremental": 11.8, "probe:machine": 40.1,
+                "render": 25.3, "send": 270.2},
+     "sends": [{"channel": "slack", "label": "slack_2", "ok": true, "status": 200,
+                "ms": 268.0, "wait_ms": 0.0, "reused": true}],
+     "section_chars": {"사용자 요청": 42, "완료된 작업": 3120},
+     "packing": {"discord": {"posts": 2, "truncated_chars": 0, "oversized": ["완료된 작업"]}},
+     "transcript_bytes": 1048576, "peak_rss_kb": 24512}
+
+사용법:
+    import stats
+
+    stats.start_run('Stop')
+    with stats.stage('render'):
+        ...
+    stats.finish_run()
+
+    # 단계별/채널별 p50, p95, p99
+    python3 notifier.py --stats --since 24h
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from cache import get_cache_dir
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# 로그 파일 최대 크기 (넘으면 .1로 교체)
+STATS_MAX_BYTES = _env_int("NOTIFICATION_STATS_MAX_BYTES", 2 * 1024 * 1024)
+
+# 리포트에 쓰는 백분위수
+PERCENTILES = (50, 95, 99)
+
+_lock = threading.Lock()
+_current: Optional[dict] = None
+
+# 스레드별로 묶인 실행 기록 (bind_run - 묶이지 않은 스레드는 _current에 기록)
+_thread = threading.local()
+
+
+def is_stats_enabled() -> bool:
+    return os.environ.get("ENABLE_HOOK_STATS", "true").lower() == "true"
+
+
+def _log_path() -> str:
+    return os.path.join(get_cache_dir('stats'), 'runs.jsonl')
+
+
+# ============================================================
+# 기록
+# ============================================================
+
+def start_run(event_name: str, mode: str = "hook", start: Optional[float] = None) -> None:
+    """
+    실행 기록 시작 (이전 기록은 버림)
+
+    Args:
+        event_name: 훅 이벤트 이름
+        mode: "hook"(훅 프로세스) 또는 "daemon"(스풀 데몬)
+        start: 시작 시각 (time.monotonic 기준, 기본값: 지금)
+    """
+    global _current
+    if not is_stats_enabled():
+        return
+    with _lock:
+        _current = {
+            "start": time.monotonic() if start is None else start,
+            "record": {"ts": time.time(), "event": event_name, "mode": mode, "stages": {}, "sends": []},
+        }
+
+
+def current_run() -> Optional[dict]:
+    """기록 중인 실행 (bind_run으로 작업 스레드에 넘길 값)"""
+    return _current
+
+
+def bind_run(run: Optional[dict]) -> None:
+    """
+    현재 스레드의 기록을 run에만 남김
+
+    마감을 넘겨 남은 작업 스레드가 이벤트가 끝난 뒤(스풀 데몬에서는 다음 이벤트 기록 중)에
+    단계 시간을 남기지 않도록, 스레드를 시작한 이벤트의 실행을 묶어 둡니다. run이 끝나면
+    이 스레드의 기록은 버립니다.
+    """
+    _thread.run = run
+
+
+def _target() -> Optional[dict]:
+    """이 스레드가 기록할 실행 (_lock 안에서 호출)"""
+    run = getattr(_thread, "run", _current)
+    return run if run is _current else None
+
+
+class stage:
+    """단계 소요 시간 측정 (같은 단계를 여러 번 지나면 합산, 기록 중이 아니면 아무것도 안 함)"""
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if _current is None:
+            return
+        elapsed = (time.perf_counter() - self.started) * 1000
+        with _lock:
+            run = _target()
+            if run is not None:
+                stages = run["record"]["stages"]
+                stages[self.name] = round(stages.get(self.name, 0.0) + elapsed, 3)
+
+
+def note(key: str, value: object) -> None:
+    """레코드에 값 추가 (transcript 크기, 생략된 섹션 등)"""
+    if _current is None:
+        return
+    with _lock:
+        run = _target()
+        if run is not None:
+            run["record"][key] = value
+
+
+def record_send(channel: str, label: str, ok: bool, status: Optional[int],
+                seconds: float, wait: float = 0.0, outbox_id: Optional[int] = None,
+                reused: Optional[bool] = None) -> None:
+    """
+    채널 전송 한 건 기록
+
+    Args:
+        channel: 채널 종류 (CHANNELS 키: slack, discord, desktop)
+        label: 표시 이름 (slack_2, outbox #3 slack 등)
+        ok: 성공 여부
+        status: HTTP 상태 코드 (HTTP 채널이 아니거나 응답 없이 실패하면 None)
+        seconds: 전송에 걸린 시간 (속도 제한 대기 제외)
+        wait: 속도 제한으로 기다린 시간
+        outbox_id: 보관함 재전송이면 메시지 ID
+        reused: keep-alive 연결을 재사용했는지 (False면 새 연결 + 핸드셰이크, HTTP 채널만)
+    """
+    if _current is None:
+        return
+    entry = {"channel": channel, "label": label, "ok": ok, "status": status,
+             "ms": round(seconds * 1000, 3), "wait_ms": round(wait * 1000, 3)}
+    if outbox_id is not None:
+        entry["outbox_id"] = outbox_id
+    if reused is not None:
+        entry["reused"] = reused
+    with _lock:
+        run = _target()
+        if run is not None:
+            run["record"]["sends"].append(entry)
+
+
+def discard_run() -> None:
+    """기록 중인 실행을 저장하지 않고 버림 (할 일이 없었던 데몬 주기 등)"""
+    global _current
+    with _lock:
+        _current = None
+
+
+def _peak_rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def finish_run() -> Optional[dict]:
+    """
+    실행 기록을 로그에 한 줄 추가 (기록 중이 아니면 아무것도 안 함)
+
+    Returns:
+        저장한 레코드 또는 None
+    """
+    global _current
+    with _lock:
+        current, _current = _current, None
+    if current is None:
+        return None
+
+    record = current["record"]
+    record["total_ms"] = round((time.monotonic() - current["start"]) * 1000, 3)
+    record["peak_rss_kb"] = _peak_rss_kb()
+
+    path = _log_path()
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > STATS_MAX_BYTES:
+            os.replace(path, path + '.1')
+        # O_APPEND로 한 번에 쓰므로 동시에 실행된 훅의 레코드가 섞이지 않음
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        print(f"[Stats] Write error ({path}): {e}", file=sys.stderr)
+    return record
+
+
+# ============================================================
+# 리포트
+# ============================================================
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    시간 범위 인자를 epoch 초로 변환
+
+    "30m", "24h", "7d" 같은 기간은 지금부터 그만큼 전, 그 외에는 ISO 날짜/시각
+    ("2026-01-31", "2026-01-31T09:00")으로 해석합니다.
+    """
+    from datetime import datetime
+
+    now = time.time() if now is None else now
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if value and value[-1] in units:
+        try:
+            return now - float(value[:-1]) * units[value[-1]]
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value).timestamp()
+
+
+def load_records(since: float = 0.0, until: Optional[float] = None,
+                 event: Optional[str] = None) -> list[dict]:
+    """로그(이전 파일 포함)에서 범위 안의 레코드 읽기"""
+    path = _log_path()
+    records = []
+    for name in (path + '.1', path):
+        try:
+            with open(name, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    ts = record.get('ts', 0)
+                    if ts < since or (until is not None and ts > until):
+                        continue
+                    if event and record.get('event') != event:
+                        continue
+                    records.append(record)
+        except FileNotFoundError:
+            continue
+    return records
+
+
+def _percentile(values: list[float], p: float) -> float:
+    """최근접 순위 백분위수 (values는 정렬된 상태)"""
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def _row(name: str, values: list[float], extra: str = "") -> str:
+    values = sorted(values)
+    cells = "".join(f"{_percentile(values, p):>10.1f}" for p in PERCENTILES)
+    return f"  {name:<24}{len(values):>7}{cells}  {extra}".rstrip()
+
+
+def _header(title: str, extra: str = "") -> str:
+    cells = "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    return f"{title:<26}{'count':>7}{cells}  {extra}".rstrip()
+
+
+def format_report(records: list[dict]) -> str:
+    """단계별, 채널별 p50/p95/p99 리포트 (시간 단위: ms)"""
+    from datetime import datetime
+
+    if not records:
+        return "No hook runs recorded in this range."
+
+    first = datetime.fromtimestamp(min(r.get('ts', 0) for r in records)).strftime("%Y-%m-%d %H:%M")
+    last = datetime.fromtimestamp(max(r.get('ts', 0) for r in records)).strftime("%Y-%m-%d %H:%M")
+    events: dict[str, int] = {}
+    for record in records:
+        key = f"{record.get('event', '?')}/{record.get('mode', 'hook')}"
+        events[key] = events.get(key, 0) + 1
+    lines = [
+        f"{len(records)} runs from {first} to {last} "
+        f"({', '.join(f'{k} {v}' for k, v in sorted(events.items()))})",
+        "",
+        _header("stage (ms)"),
+    ]
+
+    lines.append(_row("total", [r['total_ms'] for r in records if 'total_ms' in r]))
+    stages: dict[str, list[float]] = {}
+    for record in records:
+        for name, ms in record.get('stages', {}).items():
+            stages.setdefault(name, []).append(ms)
+    for name in sorted(stages):
+        lines.append(_row(name, stages[name]))
+
+    channels: dict[str, list[dict]] = {}
+    for record in records:
+        for send in record.get('sends', []):
+            key = send.get('channel', '?') + (" (outbox)" if 'outbox_id' in send else "")
+            channels.setdefault(key, []).append(send)
+    if channels:
+        lines += ["", _header("channel (ms)", "ok    statuses")]
+        for name in sorted(channels):
+            sends = channels[name]
+            ok = sum(1 for send in sends if send.get('ok'))
+            statuses: dict[str, int] = {}
+            for send in sends:
+                status = str(send.get('status') or '-')
+                statuses[status] = statuses.get(status, 0) + 1
+            status_text = ", ".join(f"{code}×{count}" for code, count in sorted(statuses.items()))
+            lines.append(_row(name, [send.get('ms', 0.0) for send in sends],
+                              f"{ok * 100 / len(sends):5.1f}%  {status_text}"))
+            waits = [send['wait_ms'] for send in sends if send.get('wait_ms')]
+            if waits:
+                lines.append(_row("  rate limit wait", waits))
+            reused = [send['reused'] for send in sends if 'reused' in send]
+            if reused:
+                # 새 연결마다 DNS + TCP + TLS 핸드셰이크
+                lines.append(f"    connections: {reused.count(False)} new (handshakes), {reused.count(True)} reused")
+
+    sizes = [r['transcript_bytes'] / 1024 for r in records if r.get('transcript_bytes') is not None]
+    rss = [r['peak_rss_kb'] / 1024 for r in records if r.get('peak_rss_kb') is not None]
+    if sizes or rss:
+        lines += ["", _header("resources")]
+        if sizes:
+            lines.append(_row("transcript (KiB)", sizes))
+        if rss:
+            lines.append(_row("peak RSS (MiB)", rss))
+
+    # 섹션별 본문 크기 + 채널 한도 때문에 나누거나 잘라낸 메시지 (어떤 섹션이 한도를 넘기는지)
+    sections: dict[str, list[float]] = {}
+    for record in records:
+        for name, chars in (record.get('section_chars') or {}).items():
+            sections.setdefault(name, []).append(chars)
+    if sections:
+        lines += ["", _header("section size (chars)")]
+        for name in sorted(sections):
+            lines.append(_row(name, sections[name]))
+
+    packing: dict[str, dict] = {}
+    for record in records:
+        for channel, info in (record.get('packing') or {}).items():
+            total = packing.setdefault(channel, {'messages': 0, 'split': 0, 'posts': 0, 'truncated': 0,
+                                                 'truncated_chars': 0, 'oversized': {}})
+            total['messages'] += 1
+            if info.get('posts', 1) > 1:
+                total['split'] += 1
+                total['posts'] += info['posts']
+            if info.get('truncated_chars'):
+                total['truncated'] += 1
+                total['truncated_chars'] += info['truncated_chars']
+            for name in info.get('oversized', []):
+                total['oversized'][name] = total['oversized'].get(name, 0) + 1
+    if packing:
+        lines += ["", "over channel limits:"]
+        for channel in sorted(packing):
+            total = packing[channel]
+            oversized = ", ".join(f"{name}×{count}" for name, count in sorted(total['oversized'].items()))
+            lines.append(f"  {channel:<10} {total['messages']} messages: {total['split']} split "
+                         f"({total['posts']} posts), {total['truncated']} truncated "
+                         f"({total['truncated_chars']} chars dropped); sections: {oversized or '-'}")
+
+    skipped: dict[str, int] = {}
+    for record in records:
+        for name in record.get('skipped_sections', []):
+            skipped[name] = skipped.get(name, 0) + 1
+    if skipped:
+        lines += ["", "skipped sections: " + ", ".join(f"{k} {v}" for k, v in sorted(skipped.items()))]
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="notifier.py --stats",
+        description="Per-stage and per-channel latency percentiles of recorded hook runs",
+    )
+    parser.add_argument("--since", default="7d",
+                        help="start of range: duration ago (30m, 24h, 7d) or ISO date (default: 7d)")
+    parser.add_argument("--until", help="end of range, same format (default: now)")
+    parser.add_argument("--event", help="only this hook event (Stop, Notification, SessionEnd)")
+    parser.add_argument("--json", action="store_true", help="print matching records as JSONL")
+    args = parser.parse_args(argv)
+
+    try:
+        since = parse_time(args.since)
+        until = parse_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"invalid time: {e}")
+
+    records = load_records(since, until, args.event)
+    if args.json:
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+    else:
+        print(format_report(records))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,50 +8,16 @@ Claude Code Stop 훅에서 transcript를 분석하여:
 
 사용법:
     from summarizer import extract_session_summary, build_summary_message, suggest_next_workflows
+
+    # 현재 턴만 요약
+    from summarizer import extract_turn_summary
 """
 from __future__ import annotations
 import json
 import os
 from typing import Optional
-from collections import Counter
-
-
-def _process_tool_use(
-    tool_name: str,
-    tool_input: dict,
-    summary: dict,
-    seen_tools: set,
-    seen_modified: set,
-    seen_read: set
-) -> None:
-    """도구 사용 정보를 summary에 기록하는 헬퍼 함수"""
-    summary['tool_counts'][tool_name] += 1
-    summary['total_tool_calls'] += 1
-    if tool_name not in seen_tools:
-        summary['tools_used'].append(tool_name)
-        seen_tools.add(tool_name)
-
-    # Bash 명령어 추출
-    if tool_name == 'Bash':
-        cmd = tool_input.get('command')
-        if cmd:
-            # 간단하게 첫 100자만
-            cmd_short = cmd[:100] + '...' if len(cmd) > 100 else cmd
-            summary['commands_executed'].append(cmd_short)
-
-    # 수정된 파일 추출 (Write, Edit)
-    elif tool_name in ('Write', 'Edit'):
-        file_path = tool_input.get('file_path')
-        if file_path and file_path not in seen_modified:
-            summary['files_modified'].append(file_path)
-            seen_modified.add(file_path)
-
-    # 읽은 파일 추출 (Read)
-    elif tool_name == 'Read':
-        file_path = tool_input.get('file_path')
-        if file_path and file_path not in seen_read:
-            summary['files_read'].append(file_path)
-            seen_read.add(file_path)
+
+from transcript import scan_transcript, scan_transcript_turn, build_transcript_path
 
 
 def extract_session_summary(transcript_path: str) -> dict:
@@ -69,107 +35,26 @@ def extract_session_summary(transcript_path: str) -> dict:
             'total_tool_calls': 15,
             'files_modified': ['/path/to/file1', '/path/to/file2'],
             'files_read': ['/path/to/file3'],
-            'commands_executed': ['npm install', 'npm run build'],
-            'errors_encountered': ['Error: ...'],
+            'commands_executed': ['npm install', 'npm run build'],   # 처음/마지막 일부만
+            'commands_count': 2,
+            'errors_encountered': ['Error: ...'],                    # 처음/마지막 일부만
+            'errors_count': 1,
         }
     """
-    summary = {
-        'user_request': None,
-        'tools_used': [],
-        'tool_counts': Counter(),
-        'total_tool_calls': 0,
-        'files_modified': [],
-        'files_read': [],
-        'commands_executed': [],
-        'errors_encountered': [],
-    }
-
-    if not transcript_path or not os.path.exists(transcript_path):
-        return summary
-
-    try:
-        seen_tools = set()
-        seen_modified = set()
-        seen_read = set()
-
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-
-                try:
-                    obj = json.loads(line)
-                    obj_type = obj.get('type')
-
-                    # 사용자 요청 추출 (마지막 것)
-                    if obj_type == 'user':
-                        msg = obj.get('message', {})
-                        content = msg.get('content') if isinstance(msg, dict) else None
-                        if isinstance(content, str):
-                            text = content.strip()
-                            # 시스템 메시지 제외
-                            if text and not text.startswith('<') and not text.startswith('# /'):
-                                # ❯ 기호 뒤 사용자 입력 추출
-                                if '❯' in text:
-                                    after_prompt = text.split('❯', 1)[1]
-                                    user_input = after_prompt.split('\n')[0].strip()
-                                    if user_input:
-                                        text = user_input
-                                summary['user_request'] = text
-
-                    # 도구 사용 추적 - 새로운 transcript 형식 지원
-                    # transcript에서 tool_use는 message.content 배열 안에 있음
-                    elif obj_type == 'tool_use':
-                        # 새 형식: message.content[].type == 'tool_use'
-                        msg = obj.get('message', {})
-                        content = msg.get('content', [])
-                        if isinstance(content, list):
-                            for item in content:
-                                if isinstance(item, dict) and item.get('type') == 'tool_use':
-                                    tool_name = item.get('name')
-                                    tool_input = item.get('input', {})
-                                    if tool_name:
-                                        _process_tool_use(
-                                            tool_name, tool_input, summary,
-                                            seen_tools, seen_modified, seen_read
-                                        )
-
-                    # assistant 메시지 안의 tool_use도 처리
-                    elif obj_type == 'assistant':
-                        msg = obj.get('message', {})
-                        content = msg.get('content', [])
-                        if isinstance(content, list):
-                            for item in content:
-                                if isinstance(item, dict) and item.get('type') == 'tool_use':
-                                    tool_name = item.get('name')
-                                    tool_input = item.get('input', {})
-                                    if tool_name:
-                                        _process_tool_use(
-                                            tool_name, tool_input, summary,
-                                            seen_tools, seen_modified, seen_read
-                                        )
-
-                    # 에러 추적
-                    elif obj_type == 'tool_result':
-                        msg = obj.get('message', {})
-                        content = msg.get('content', [])
-                        if isinstance(content, list):
-                            for item in content:
-                                if isinstance(item, dict) and item.get('is_error'):
-                                    error = str(item.get('content', ''))[:200]
-                                    if error:
-                                        summary['errors_encountered'].append(error)
-
-                except json.JSONDecodeError:
-                    continue
-
-        # Counter를 일반 dict로 변환
-        summary['tool_counts'] = dict(summary['tool_counts'])
-        return summary
-
-    except (FileNotFoundError, PermissionError, IOError):
-        return summary
+    return scan_transcript(transcript_path)['summary']
+
+
+def extract_turn_summary(transcript_path: str) -> dict:
+    """
+    현재 턴(마지막 사용자 요청 이후)의 작업 요약 정보 추출
+
+    파일 끝에서 마지막 사용자 요청까지만 읽으므로 세션이 길어져도
+    작업량은 현재 턴 길이에 비례합니다.
+
+    Returns:
+        extract_session_summary()와 같은 형식
+    """
+    return scan_transcript_turn(transcript_path)['summary']
 
 
 def build_summary_message(summary: dict, max_files: int = 5, max_commands: int = 5) -> str:
@@ -216,12 +101,12 @@ def build_summary_message(summary: dict, max_files: int = 5, max_commands: int =
             if cmd_type not in seen_cmd_types:
                 cmd_summary.append(f"`{cmd_type}`")
                 seen_cmd_types.add(cmd_type)
-        extra = len(summary['commands_executed']) - len(cmd_summary)
-        lines.append(f"- *실행한 명령어*: {', '.join(cmd_summary)} ({len(summary['commands_executed'])}개)")
+        count = summary.get('commands_count', len(summary['commands_executed']))
+        lines.append(f"- *실행한 명령어*: {', '.join(cmd_summary)} ({count}개)")
 
     # 에러가 있었다면
     if summary['errors_encountered']:
-        lines.append(f"- *발생한 에러*: {len(summary['errors_encountered'])}건")
+        lines.append(f"- *발생한 에러*: {summary.get('errors_count', len(summary['errors_encountered']))}건")
 
     return '\n'.join(lines)
 
@@ -239,6 +124,7 @@ def suggest_next_workflows(summary: dict, available_skills: Optional[list] = Non
     """
     suggestions = []
     tools_used = set(summary.get('tools_used', []))
+    # 처음/마지막 명령어만 보관되므로 세션 시작과 최근 작업 기준 (SUMMARY_LIST_HEAD/TAIL)
     commands = ' '.join(summary.get('commands_executed', []))
     files_modified = summary.get('files_modified', [])
 
@@ -298,32 +184,34 @@ def suggest_next_workflows(summary: dict, available_skills: Optional[list] = Non
     return '\n'.join(lines)
 
 
-def generate_stop_summary(event_data: dict) -> tuple[str, str]:
+def generate_stop_summary(
+    event_data: dict,
+    scan: Optional[dict] = None,
+    turn_only: bool = False
+) -> tuple[str, str]:
     """
     Stop 이벤트 데이터로부터 요약 메시지와 workflow 제안 생성
 
     Args:
         event_data: Stop 훅으로 전달된 이벤트 데이터
+        scan: scan_transcript()의 반환값 (주어지면 transcript를 다시 읽지 않음)
+        turn_only: True면 현재 턴만 요약 (scan이 없을 때만 사용)
 
     Returns:
         (summary_message, workflow_suggestions) 튜플
     """
-    transcript_path = event_data.get('transcript_path')
-
-    # transcript_path가 없으면 cwd + session_id로 구성 (폴백)
-    if not transcript_path:
-        cwd = event_data.get('cwd', '')
-        session_id = event_data.get('session_id', '')
-        if cwd and session_id:
-            project_path = cwd.replace('/', '-')
-            if not project_path.startswith('-'):
-                project_path = '-' + project_path
-            home = os.path.expanduser('~')
-            transcript_path = os.path.join(
-                home, '.claude', 'projects', project_path, f'{session_id}.jsonl'
+    if scan is None:
+        transcript_path = event_data.get('transcript_path')
+
+        # transcript_path가 없으면 cwd + session_id로 구성 (폴백)
+        if not transcript_path:
+            transcript_path = build_transcript_path(
+                event_data.get('cwd', ''), event_data.get('session_id', '')
             )
 
-    summary = extract_session_summary(transcript_path)
+        scan = scan_transcript_turn(transcript_path) if turn_only else scan_transcript(transcript_path)
+
+    summary = scan['summary']
     summary_msg = build_summary_message(summary)
     workflow_msg = suggest_next_workflows(summary)
 
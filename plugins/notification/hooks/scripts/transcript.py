@@ -0,0 +1,1061 @@
+#!/usr/bin/env python3
+"""
+Transcript 스캔 엔진
+
+Claude Code transcript(JSONL)를 한 번만 읽어서 Stop/Notification 훅의
+모든 섹션 빌더가 공유하는 스캔 결과를 생성합니다:
+1. 마지막 사용자 메시지 또는 커맨드
+2. 미답변 AskUserQuestion
+3. 도구 사용 통계 (summarizer 형식)
+4. assistant text 응답 목록
+5. 발생한 에러 목록
+
+사용법:
+    from transcript import scan_transcript
+
+    scan = scan_transcript(transcript_path)
+    scan['last_user_message']   # (message, is_command) 또는 None
+    scan['question']            # 미답변 질문 데이터 또는 None
+    scan['summary']             # extract_session_summary() 형식
+    scan['assistant_texts']     # assistant text 응답 목록 (원래 순서)
+    scan['errors']              # 에러 목록 (처음/마지막 일부, 전체 수는 summary['errors_count'])
+
+    # 최신 레코드만 필요한 경우 (Notification): 파일 끝에서부터 역방향 스캔
+    tail = scan_transcript_tail(transcript_path)
+    tail['last_user_message'], tail['question']
+
+    # 현재 턴(마지막 사용자 요청 이후)만 요약
+    turn = scan_transcript_turn(transcript_path)
+    turn['summary']
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import sys
+import hashlib
+from typing import Optional, Iterator, BinaryIO, Callable, NamedTuple, Union
+
+from cache import get_cache_dir, safe_filename, read_json, write_json_atomic, prune_stale_files
+from jsonstream import StreamReader
+
+# 빠른 JSON 백엔드 (설치된 경우에만, NOTIFICATION_JSON_BACKEND=json이면 표준 라이브러리 사용)
+try:
+    if os.environ.get('NOTIFICATION_JSON_BACKEND', 'auto').lower() == 'json':
+        raise ImportError
+    import orjson
+    _fast_loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    _fast_loads = None
+    JSON_BACKEND = 'json'
+
+
+# ============================================================
+# 사용자 메시지 판별 규칙
+# ============================================================
+
+# 시스템 메시지 패턴 (사용자 요청으로 표시하지 않을 메시지)
+SYSTEM_MESSAGE_PATTERNS: list[str] = [
+    'This session is being continued',
+    'Context compaction',
+    'Session resumed',
+    '<system-reminder>',
+    '<command-name>',
+]
+
+_COMMAND_PATTERN = re.compile(r'<command-name>(/[^<]+)</command-name>')
+
+
+def is_system_message(text: str) -> bool:
+    """시스템 메시지 여부 판단"""
+    if not text:
+        return True
+    # 기존 필터: XML 태그나 슬래시 명령어
+    if text.startswith('<') or text.startswith('/') or text.startswith('# /'):
+        return True
+    # 새 필터: 특정 패턴으로 시작하는 시스템 메시지
+    for pattern in SYSTEM_MESSAGE_PATTERNS:
+        if text.startswith(pattern):
+            return True
+    return False
+
+
+def extract_command_from_content(content: str) -> Optional[str]:
+    """<command-name>/명령어</command-name> 패턴에서 커맨드 추출"""
+    match = _COMMAND_PATTERN.search(content)
+    return match.group(1) if match else None
+
+
+def _extract_prompt_input(text: str) -> str:
+    """
+    "❯" 기호 뒤의 사용자 입력 추출
+
+    형식: "\\n❯ 안녕\\n\\n● 안녕하세요..." → "안녕"
+    """
+    if '❯' in text:
+        after_prompt = text.split('❯', 1)[1]  # ❯ 이후
+        # 첫 줄만 추출 (● 이전 또는 줄바꿈 이전)
+        user_input = after_prompt.split('\n')[0].strip()
+        if user_input:
+            return user_input
+    return text
+
+
+def classify_user_text(content: str) -> Optional[tuple[str, bool]]:
+    """
+    user 레코드의 문자열 content를 사용자 메시지로 해석
+
+    Returns:
+        (message, is_command) 튜플 또는 None (시스템 메시지)
+    """
+    text = content.strip()
+
+    # 1. 커맨드 감지 (우선)
+    cmd = extract_command_from_content(text)
+    if cmd:
+        return (cmd, True)
+
+    # 2. "❯" 기호 뒤의 사용자 입력 추출
+    text = _extract_prompt_input(text)
+
+    # 3. 필터링: 시스템 메시지 제외
+    if is_system_message(text):
+        return None
+    return (text, False)
+
+
+def _summary_user_request(content: str) -> Optional[str]:
+    """작업 요약용 사용자 요청 추출 (summarizer 기존 규칙)"""
+    text = content.strip()
+    # 시스템 메시지 제외
+    if not text or text.startswith('<') or text.startswith('# /'):
+        return None
+    return _extract_prompt_input(text)
+
+
+# ============================================================
+# Transcript 경로
+# ============================================================
+
+def build_transcript_path(cwd: str, session_id: str) -> Optional[str]:
+    """
+    cwd와 session_id로 transcript 파일 경로 구성 (존재 여부 미확인)
+
+    경로 형식: ~/.claude/projects/{project-path}/{session-id}.jsonl
+    project-path: cwd의 /를 -로 변환 (예: /home/user/dev → -home-user-dev)
+    """
+    if not cwd or not session_id:
+        return None
+
+    # /home/user/dev/marketplace → -home-user-dev-marketplace
+    project_path = cwd.replace('/', '-')
+    if not project_path.startswith('-'):
+        project_path = '-' + project_path
+
+    home = os.path.expanduser('~')
+    return os.path.join(home, '.claude', 'projects', project_path, f'{session_id}.jsonl')
+
+
+def resolve_transcript_path(transcript_path: Optional[str], cwd: str, session_id: str) -> Optional[str]:
+    """
+    실제 존재하는 transcript 경로 반환
+
+    이벤트에서 직접 제공된 transcript_path를 우선 사용하고,
+    없으면 cwd + session_id로 구성한 경로로 폴백합니다.
+    """
+    if transcript_path and os.path.exists(transcript_path):
+        return transcript_path
+    fallback = build_transcript_path(cwd, session_id)
+    return fallback if fallback and os.path.exists(fallback) else None
+
+
+# ============================================================
+# JSON 디코딩 + 바이트 수준 프리필터
+# ============================================================
+
+# 바이트 패턴은 JSON 구조에서만 매칭됩니다: 문자열 값 안의 따옴표는
+# \" 로 이스케이프되므로 '"type":"user"' 같은 패턴이 나타나지 않습니다.
+_RECORD_TYPE_RE = re.compile(rb'"type"\s*:\s*"(?:user|assistant|tool_use|tool_result)"')
+_USER_TYPE_RE = re.compile(rb'"type"\s*:\s*"user"')
+_ASSISTANT_TYPE_RE = re.compile(rb'"type"\s*:\s*"assistant"')
+_TOOL_RESULT_RE = re.compile(rb'"type"\s*:\s*"tool_result"')
+_IS_ERROR_RE = re.compile(rb'"is_error"\s*:\s*true')
+_TOOL_USE_ID_RE = re.compile(rb'"tool_use_id"\s*:\s*"([^"\\]+)"')
+_TEXT_BLOCK_RE = re.compile(rb'"type"\s*:\s*"text"')
+
+# 프리필터 사용 여부 (벤치마크에서 비교용으로 끌 수 있음)
+PREFILTER_ENABLED = True
+
+# 스캔 통계 (벤치마크용): 읽은 줄 수 / 실제로 디코딩한 줄 수 / 스트리밍 파싱한 긴 줄 수
+SCAN_STATS = {'lines': 0, 'decoded': 0, 'streamed': 0}
+
+# 이 크기를 넘는 줄은 통째로 읽지 않고 스트리밍 파서로 처리 (메모리 사용량 고정)
+STREAM_LINE_THRESHOLD = 1024 * 1024
+
+# 스트리밍 파싱시 문자열 값에서 보관할 최대 바이트
+# (Write content, Read 결과 등 큰 값은 앞부분만 남기고 건너뜀)
+STREAM_MAX_STRING = 64 * 1024
+
+
+def load_json_line(line: bytes):
+    """
+    transcript 한 줄 디코딩 (orjson이 있으면 사용)
+
+    Raises:
+        ValueError: 유효하지 않은 JSON
+    """
+    SCAN_STATS['decoded'] += 1
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(line)
+        except ValueError:
+            # orjson이 거부하는 입력(64비트 초과 정수 등)은 표준 라이브러리로 재시도
+            pass
+    return json.loads(line)
+
+
+def read_long_line(f: BinaryIO, start: int) -> tuple[Optional[object], int, bool]:
+    """
+    start에서 시작하는 긴 줄을 스트리밍 파싱 (긴 문자열 값은 앞부분만 보관)
+
+    Returns:
+        (레코드 또는 None, 다음 줄의 offset, 줄바꿈으로 끝났는지 여부)
+    """
+    SCAN_STATS['streamed'] += 1
+    f.seek(start)
+    reader = StreamReader(f.read, max_string=STREAM_MAX_STRING)
+    try:
+        obj = reader.parse_value()
+    except ValueError:
+        # 손상된 줄: 처음부터 줄 끝만 찾음 (파서가 다음 줄까지 읽었을 수 있음)
+        obj = None
+        f.seek(start)
+        reader = StreamReader(f.read)
+    complete = reader.skip_past(b'\n')
+    return obj, start + reader.consumed, complete
+
+
+def _is_scan_candidate(line: bytes, state: dict) -> bool:
+    """
+    전체 스캔에서 디코딩이 필요한 줄인지 바이트 수준에서 판단
+
+    - user/assistant/tool_use/tool_result 레코드가 아니면 건너뜀
+    - tool_result를 담은 줄은 에러가 있거나 미답변 질문에 대한 답일 때만 디코딩
+      (대부분의 큰 tool_result 페이로드는 디코딩하지 않음)
+    """
+    if not PREFILTER_ENABLED:
+        return True
+    if not _RECORD_TYPE_RE.search(line):
+        return False
+    if _TOOL_RESULT_RE.search(line):
+        if _IS_ERROR_RE.search(line):
+            return True
+        return any(qid.encode() in line for qid in state['open_question_ids'] if qid)
+    return True
+
+
+# ============================================================
+# 스캔 상태 (레코드 단위 누적)
+# ============================================================
+
+# 실행한 명령어/에러 목록은 처음 HEAD개 + 마지막 TAIL개만 보관 (전체 수는 *_count)
+# 스캔 상태는 Stop마다 커서로 읽고 다시 저장하므로 세션이 길어져도 크기가 일정해야 함
+SUMMARY_LIST_HEAD = 10
+SUMMARY_LIST_TAIL = 40
+
+
+def _append_capped(summary: dict, key: str, count_key: str, value: str) -> None:
+    """summary[key] 목록에 추가하고 summary[count_key]를 늘림 (넘치면 가운데를 버림)"""
+    items = summary[key]
+    items.append(value)
+    if len(items) > SUMMARY_LIST_HEAD + SUMMARY_LIST_TAIL:
+        del items[SUMMARY_LIST_HEAD]
+    summary[count_key] += 1
+
+
+def _process_tool_use(
+    tool_name: str,
+    tool_input: dict,
+    summary: dict,
+    seen_tools: set,
+    seen_modified: set,
+    seen_read: set
+) -> None:
+    """도구 사용 정보를 summary에 기록하는 헬퍼 함수"""
+    summary['tool_counts'][tool_name] = summary['tool_counts'].get(tool_name, 0) + 1
+    summary['total_tool_calls'] += 1
+    if tool_name not in seen_tools:
+        summary['tools_used'].append(tool_name)
+        seen_tools.add(tool_name)
+
+    # Bash 명령어 추출
+    if tool_name == 'Bash':
+        cmd = tool_input.get('command')
+        if cmd:
+            # 간단하게 첫 100자만
+            cmd_short = cmd[:100] + '...' if len(cmd) > 100 else cmd
+            _append_capped(summary, 'commands_executed', 'commands_count', cmd_short)
+
+    # 수정된 파일 추출 (Write, Edit)
+    elif tool_name in ('Write', 'Edit'):
+        file_path = tool_input.get('file_path')
+        if file_path and file_path not in seen_modified:
+            summary['files_modified'].append(file_path)
+            seen_modified.add(file_path)
+
+    # 읽은 파일 추출 (Read)
+    elif tool_name == 'Read':
+        file_path = tool_input.get('file_path')
+        if file_path and file_path not in seen_read:
+            summary['files_read'].append(file_path)
+            seen_read.add(file_path)
+
+
+def new_scan_state() -> dict:
+    """
+    빈 스캔 상태 생성
+
+    상태는 JSON으로 직렬화할 수 있는 값만 담습니다 (증분 커서로 저장).
+    seen_* 집합은 load_scan_state()에서 목록으로부터 다시 만듭니다.
+    """
+    return {
+        'last_user_message': None,
+        'last_question': None,
+        'last_question_id': None,
+        # 아직 tool_result가 없는 AskUserQuestion ID
+        'open_question_ids': [],
+        'assistant_texts': [],
+        # text_classifier 사용시: 종류별 가장 최근 텍스트 {kind: [seq, text]}
+        'marked_texts': {},
+        'text_seq': 0,
+        'summary': {
+            'user_request': None,
+            'tools_used': [],
+            'tool_counts': {},
+            'total_tool_calls': 0,
+            'files_modified': [],
+            'files_read': [],
+            # 처음/마지막 일부만 (SUMMARY_LIST_HEAD/TAIL), 전체 수는 *_count
+            'commands_executed': [],
+            'commands_count': 0,
+            'errors_encountered': [],
+            'errors_count': 0,
+        },
+        'seen_tools': set(),
+        'seen_modified': set(),
+        'seen_read': set(),
+    }
+
+
+def dump_scan_state(state: dict) -> dict:
+    """스캔 상태를 JSON 저장용 dict로 변환 (seen_* 집합 제외)"""
+    return {key: value for key, value in state.items() if not key.startswith('seen_')}
+
+
+def load_scan_state(data: dict) -> dict:
+    """dump_scan_state()로 저장한 dict에서 스캔 상태 복원"""
+    state = new_scan_state()
+    state.update({key: value for key, value in data.items() if key in state})
+    summary = new_scan_state()['summary']
+    summary.update(state['summary'])
+    state['summary'] = summary
+    if state['last_user_message']:
+        state['last_user_message'] = tuple(state['last_user_message'])
+    state['seen_tools'] = set(summary['tools_used'])
+    state['seen_modified'] = set(summary['files_modified'])
+    state['seen_read'] = set(summary['files_read'])
+    return state
+
+
+def _consume_tool_uses(state: dict, content: list) -> None:
+    """message.content 배열 안의 tool_use 블록을 통계에 반영"""
+    for item in content:
+        if isinstance(item, dict) and item.get('type') == 'tool_use':
+            tool_name = item.get('name')
+            tool_input = item.get('input', {})
+            if tool_name:
+                _process_tool_use(
+                    tool_name, tool_input, state['summary'],
+                    state['seen_tools'], state['seen_modified'], state['seen_read']
+                )
+
+
+def _consume_assistant_text(state: dict, text: str, text_classifier: Optional[Callable]) -> None:
+    """
+    assistant text 응답 기록
+
+    text_classifier가 없으면 모든 텍스트를 보관하고,
+    있으면 분류된 종류별로 가장 최근 텍스트만 보관합니다 (메모리/커서 크기 고정).
+    """
+    if text_classifier is None:
+        state['assistant_texts'].append(text)
+        return
+
+    state['text_seq'] += 1
+    for kind in text_classifier(text):
+        state['marked_texts'][kind] = [state['text_seq'], text]
+
+
+def consume_record(state: dict, obj: dict, text_classifier: Optional[Callable] = None) -> None:
+    """
+    transcript 레코드 하나를 스캔 상태에 반영
+
+    모든 섹션 빌더가 필요로 하는 정보를 한 번에 누적합니다.
+
+    Args:
+        state: new_scan_state()로 만든 스캔 상태
+        obj: JSON 디코딩된 transcript 레코드
+        text_classifier: assistant text → 종류 목록 (선택, 예: ['completion'])
+    """
+    obj_type = obj.get('type')
+    msg = obj.get('message', {})
+    if not isinstance(msg, dict):
+        msg = {}
+    content = msg.get('content')
+
+    if obj_type == 'user':
+        # content가 문자열인 경우 (실제 사용자 입력)
+        if isinstance(content, str):
+            result = classify_user_text(content)
+            if result:
+                state['last_user_message'] = result
+            request = _summary_user_request(content)
+            if request:
+                state['summary']['user_request'] = request
+
+        # content가 배열인 경우 (tool_result) - 답변된 질문 ID 제거
+        elif isinstance(content, list) and state['open_question_ids']:
+            for block in content:
+                if isinstance(block, dict) and block.get('type') == 'tool_result':
+                    tool_use_id = block.get('tool_use_id')
+                    if tool_use_id in state['open_question_ids']:
+                        state['open_question_ids'].remove(tool_use_id)
+
+    elif obj_type == 'assistant':
+        if isinstance(content, list):
+            _consume_tool_uses(state, content)
+            for block in content:
+                if not isinstance(block, dict):
+                    continue
+                block_type = block.get('type')
+                if block_type == 'text':
+                    text = block.get('text', '')
+                    if text:
+                        _consume_assistant_text(state, text, text_classifier)
+                # AskUserQuestion tool_use (마지막 질문 추적)
+                elif block_type == 'tool_use' and block.get('name') == 'AskUserQuestion':
+                    input_data = block.get('input', {})
+                    if 'questions' in input_data:
+                        state['last_question'] = input_data
+                        state['last_question_id'] = block.get('id')
+                        if block.get('id'):
+                            state['open_question_ids'].append(block.get('id'))
+
+    # 도구 사용 추적 - transcript에서 tool_use는 message.content 배열 안에 있음
+    elif obj_type == 'tool_use':
+        if isinstance(content, list):
+            _consume_tool_uses(state, content)
+
+    # 에러 추적
+    elif obj_type == 'tool_result':
+        if isinstance(content, list):
+            for item in content:
+                if isinstance(item, dict) and item.get('is_error'):
+                    error = str(item.get('content', ''))[:200]
+                    if error:
+                        _append_capped(state['summary'], 'errors_encountered', 'errors_count', error)
+
+
+def finalize_scan(state: dict) -> dict:
+    """스캔 상태를 섹션 빌더가 공유하는 결과로 변환"""
+    summary = dict(state['summary'])
+    summary['tool_counts'] = dict(summary['tool_counts'])
+
+    # 마지막 질문이 이미 답변되었으면 None
+    question = state['last_question']
+    question_id = state['last_question_id']
+    if question_id and question_id not in state['open_question_ids']:
+        print(f"[Transcript] AskUserQuestion {question_id} already answered - skipping", file=sys.stderr)
+        question = None
+
+    # 분류된 텍스트는 원래 순서대로 (같은 텍스트가 여러 종류면 한 번만)
+    assistant_texts = list(state['assistant_texts'])
+    marked = sorted({seq: text for seq, text in state['marked_texts'].values()}.items())
+    assistant_texts.extend(text for _, text in marked)
+
+    return {
+        'last_user_message': state['last_user_message'],
+        'question': question,
+        'summary': summary,
+        'assistant_texts': assistant_texts,
+        'errors': summary['errors_encountered'],
+    }
+
+
+# ============================================================
+# 스캔 실행
+# ============================================================
+
+def _scan_lines(
+    state: dict,
+    f: BinaryIO,
+    offset: int = 0,
+    complete_only: bool = False,
+    text_classifier: Optional[Callable] = None
+) -> int:
+    """
+    offset부터 줄 단위로 레코드를 스캔 상태에 반영
+
+    Args:
+        complete_only: True면 줄바꿈으로 끝나지 않은 마지막 줄(기록 중)은 건너뜀
+
+    Returns:
+        스캔을 마친 다음 바이트 offset
+    """
+    f.seek(offset)
+    while True:
+        line = f.readline(STREAM_LINE_THRESHOLD)
+        if not line:
+            break
+
+        if len(line) >= STREAM_LINE_THRESHOLD and not line.endswith(b'\n'):
+            # 긴 줄: 줄 전체를 메모리에 올리지 않고 스트리밍 파싱
+            obj, next_offset, complete = read_long_line(f, offset)
+            if complete_only and not complete:
+                break
+            offset = next_offset
+            f.seek(offset)
+            SCAN_STATS['lines'] += 1
+            if isinstance(obj, dict):
+                consume_record(state, obj, text_classifier)
+            continue
+
+        if complete_only and not line.endswith(b'\n'):
+            break
+        offset += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        SCAN_STATS['lines'] += 1
+        if not _is_scan_candidate(line, state):
+            continue
+        try:
+            obj = load_json_line(line)
+        except ValueError:
+            continue
+        if isinstance(obj, dict):
+            consume_record(state, obj, text_classifier)
+    return offset
+
+
+def scan_transcript(transcript_path: Optional[str], text_classifier: Optional[Callable] = None) -> dict:
+    """
+    Transcript JSONL 파일을 한 번만 읽어 공유 스캔 결과 생성
+
+    Args:
+        transcript_path: transcript 파일 절대 경로
+        text_classifier: assistant text → 종류 목록. 주어지면 종류별 최신
+                         텍스트만 보관합니다 (없으면 모든 텍스트 보관)
+
+    Returns:
+        {
+            'last_user_message': ('마지막 사용자 메시지', False) 또는 None,
+            'question': {'questions': [...]} 또는 None,
+            'summary': {...extract_session_summary() 형식...},
+            'assistant_texts': ['...', ...],
+            'errors': ['Error: ...'],
+        }
+    """
+    state = new_scan_state()
+
+    if not transcript_path or not os.path.exists(transcript_path):
+        return finalize_scan(state)
+
+    try:
+        with open(transcript_path, 'rb') as f:
+            _scan_lines(state, f, text_classifier=text_classifier)
+    except (FileNotFoundError, PermissionError, IOError) as e:
+        print(f"[Transcript] Read error: {e}", file=sys.stderr)
+
+    return finalize_scan(state)
+
+
+# ============================================================
+# 역방향 tail 스캔 (파일 끝에서부터)
+# ============================================================
+
+# 역방향 읽기 청크 크기
+TAIL_CHUNK_SIZE = 64 * 1024
+
+
+class LongLine(NamedTuple):
+    """메모리에 올리지 않은 긴 줄의 위치 [start, end) (줄바꿈 제외)"""
+    start: int
+    end: int
+
+
+def iter_lines_reversed(
+    f: BinaryIO,
+    chunk_size: int = TAIL_CHUNK_SIZE,
+    max_line: Optional[int] = None
+) -> Iterator[tuple[int, Union[bytes, LongLine]]]:
+    """
+    바이너리 파일을 끝에서부터 고정 크기 청크로 역순으로 읽어 줄 단위로 반환
+
+    읽는 양은 파일 크기가 아니라 파일 끝에서 멈춘 지점까지의 거리에 비례합니다.
+
+    Args:
+        max_line: 이 크기를 넘는 줄은 이어붙이지 않고 LongLine(start, end)로 반환
+                  (chunk_size 이상이어야 함)
+
+    Yields:
+        (줄 시작 offset, 줄 내용 또는 LongLine)
+    """
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    # 현재 줄의 뒷부분 조각들 (읽은 역순으로 쌓임) - 긴 줄도 한 번만 이어붙임
+    pieces: list[bytes] = []
+    pieces_len = 0
+    # 현재 줄의 끝 offset (max_line을 넘으면 조각을 버리고 위치만 기억)
+    line_end = pos
+    oversized = False
+
+    while pos > 0:
+        read_size = min(chunk_size, pos)
+        pos -= read_size
+        f.seek(pos)
+        chunk = f.read(read_size)
+
+        parts = chunk.split(b'\n')
+        head = parts[-1]
+        if not oversized:
+            pieces.append(head)
+            pieces_len += len(head)
+            if max_line is not None and pieces_len > max_line:
+                pieces = []
+                oversized = True
+
+        if len(parts) == 1:
+            continue
+
+        # 청크의 마지막 조각 + 이전에 쌓인 조각 = 완성된 줄
+        line_start = pos + len(chunk) - len(head)
+        if oversized:
+            yield line_start, LongLine(line_start, line_end)
+        else:
+            yield line_start, b''.join(reversed(pieces))
+
+        # 청크 안의 완성된 줄들 (각 줄 뒤의 줄바꿈 1바이트를 건너뛰며 역순으로)
+        line_start -= 1
+        for line in reversed(parts[1:-1]):
+            line_start -= len(line)
+            yield line_start, line
+            line_start -= 1
+
+        pieces = [parts[0]]
+        pieces_len = len(parts[0])
+        line_end = pos + len(parts[0])
+        oversized = False
+
+    if oversized:
+        yield 0, LongLine(0, line_end)
+    elif pieces:
+        yield 0, b''.join(reversed(pieces))
+
+
+def scan_transcript_tail(transcript_path: Optional[str]) -> dict:
+    """
+    마지막 사용자 메시지와 미답변 질문 탐색
+
+    오프셋 인덱스(transcript_index)가 켜져 있으면 인덱스로 해당 레코드만 읽고,
+    꺼져 있거나 인덱스를 열 수 없으면 파일 끝에서부터 역방향으로 읽습니다.
+    두 방법의 결과는 같습니다.
+
+    Args:
+        transcript_path: transcript 파일 절대 경로
+
+    Returns:
+        {
+            'last_user_message': ('마지막 사용자 메시지', False) 또는 None,
+            'question': {'questions': [...]} 또는 None,
+        }
+    """
+    if not transcript_path or not os.path.exists(transcript_path):
+        return {'last_user_message': None, 'question': None}
+
+    from transcript_index import TranscriptIndex, is_index_enabled
+
+    if is_index_enabled():
+        try:
+            with TranscriptIndex(transcript_path) as index:
+                return index.tail()
+        except (OSError, ValueError) as e:
+            print(f"[Transcript] Index unavailable, reading backwards: {e}", file=sys.stderr)
+    return _scan_tail_reversed(transcript_path)
+
+
+def _scan_tail_reversed(transcript_path: Optional[str]) -> dict:
+    """
+    파일 끝에서부터 역방향으로 마지막 사용자 메시지와 미답변 질문 탐색
+
+    - 첫 번째로 만나는 사용자 메시지(또는 커맨드)에서 멈춤
+    - 첫 번째로 만나는 AskUserQuestion tool_use에서 질문 탐색 종료
+      (그 뒤에 나온 tool_result로 답변 여부 판단)
+    - 마지막 사용자 메시지 이전의 질문은 이미 지나간 질문으로 간주
+
+    Returns:
+        scan_transcript_tail()과 같은 형식의 결과
+    """
+    result = {'last_user_message': None, 'question': None}
+
+    if not transcript_path or not os.path.exists(transcript_path):
+        return result
+
+    answered_ids: set[str] = set()
+    question_done = False
+
+    try:
+        with open(transcript_path, 'rb') as f:
+            for _, line in iter_lines_reversed(f, max_line=STREAM_LINE_THRESHOLD):
+                if isinstance(line, LongLine):
+                    # 긴 줄: 프리필터 없이 스트리밍 파싱 (긴 문자열은 앞부분만)
+                    SCAN_STATS['lines'] += 1
+                    obj, _, _ = read_long_line(f, line.start)
+                    line = None
+                else:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    SCAN_STATS['lines'] += 1
+
+                if line is not None and PREFILTER_ENABLED:
+                    # tool_result 줄: 디코딩 없이 답변된 질문 ID만 수집
+                    if _TOOL_RESULT_RE.search(line):
+                        if not question_done:
+                            answered_ids.update(m.decode() for m in _TOOL_USE_ID_RE.findall(line))
+                        continue
+                    # 사용자 메시지 후보 또는 (질문 탐색 중) AskUserQuestion이 있는 assistant 줄만 디코딩
+                    is_user = _USER_TYPE_RE.search(line)
+                    is_question = (not question_done and b'AskUserQuestion' in line
+                                   and _ASSISTANT_TYPE_RE.search(line))
+                    if not is_user and not is_question:
+                        continue
+
+                if line is not None:
+                    try:
+                        obj = load_json_line(line)
+                    except ValueError:
+                        continue
+                if not isinstance(obj, dict):
+                    continue
+
+                obj_type = obj.get('type')
+                msg = obj.get('message', {})
+                content = msg.get('content') if isinstance(msg, dict) else None
+
+                if obj_type == 'user':
+                    if isinstance(content, str):
+                        user_message = classify_user_text(content)
+                        if user_message:
+                            result['last_user_message'] = user_message
+                            # 사용자 요청 이전의 질문은 탐색하지 않음
+                            break
+
+                    # tool_result (답변된 질문 ID) - 질문보다 뒤에 기록됨
+                    elif isinstance(content, list):
+                        for block in content:
+                            if isinstance(block, dict) and block.get('type') == 'tool_result':
+                                tool_use_id = block.get('tool_use_id')
+                                if tool_use_id:
+                                    answered_ids.add(tool_use_id)
+
+                elif obj_type == 'assistant' and not question_done and isinstance(content, list):
+                    for block in reversed(content):
+                        if (isinstance(block, dict) and block.get('type') == 'tool_use'
+                                and block.get('name') == 'AskUserQuestion'):
+                            input_data = block.get('input', {})
+                            if 'questions' not in input_data:
+                                continue
+                            question_done = True
+                            question_id = block.get('id')
+                            if question_id and question_id in answered_ids:
+                                print(f"[Transcript] AskUserQuestion {question_id} already answered - skipping", file=sys.stderr)
+                            else:
+                                result['question'] = input_data
+                            break
+
+    except (FileNotFoundError, PermissionError, IOError) as e:
+        print(f"[Transcript] Read error (tail): {e}", file=sys.stderr)
+
+    return result
+
+
+def find_turn_start(f: BinaryIO) -> int:
+    """
+    파일 끝에서부터 역방향으로 마지막 사용자 요청(시스템 메시지 제외)의 offset 탐색
+
+    사용자 요청이 없으면 0 (전체가 하나의 턴)
+    """
+    return _find_last_prompt(f)[0]
+
+
+def find_turn_id(transcript_path: Optional[str]) -> Optional[str]:
+    """
+    현재 턴(마지막 사용자 요청)의 식별자 - 레코드 uuid, 없으면 offset
+
+    같은 요청을 다시 입력해도 턴마다 다른 값이므로, 내용이 같은 알림이
+    재진입한 같은 턴인지 새 턴인지 구분하는 데 씁니다.
+
+    Returns:
+        식별자 또는 None (사용자 요청이 없거나 읽을 수 없음)
+    """
+    if not transcript_path:
+        return None
+    try:
+        with open(transcript_path, 'rb') as f:
+            offset, obj = _find_last_prompt(f)
+    except OSError:
+        return None
+    if obj is None:
+        return None
+    uuid = obj.get('uuid')
+    return uuid if isinstance(uuid, str) and uuid else f"offset:{offset}"
+
+
+def _find_last_prompt(f: BinaryIO) -> tuple[int, Optional[dict]]:
+    """마지막 사용자 요청의 (offset, 레코드) - 없으면 (0, None)"""
+    for offset, line in iter_lines_reversed(f, max_line=STREAM_LINE_THRESHOLD):
+        if isinstance(line, LongLine):
+            obj, _, _ = read_long_line(f, line.start)
+        else:
+            line = line.strip()
+            # 사용자 메시지 후보만 디코딩 (tool_result 줄은 건너뜀)
+            if not line or not _USER_TYPE_RE.search(line) or _TOOL_RESULT_RE.search(line):
+                continue
+            try:
+                obj = load_json_line(line)
+            except ValueError:
+                continue
+
+        if not isinstance(obj, dict) or obj.get('type') != 'user':
+            continue
+        msg = obj.get('message', {})
+        content = msg.get('content') if isinstance(msg, dict) else None
+        if isinstance(content, str) and classify_user_text(content):
+            return offset, obj
+    return 0, None
+
+
+def scan_transcript_turn(
+    transcript_path: Optional[str],
+    text_classifier: Optional[Callable] = None
+) -> dict:
+    """
+    현재 턴(마지막 사용자 요청 이후)만 스캔
+
+    파일 끝에서 마지막 사용자 요청까지 역방향으로 찾은 뒤 그 구간만
+    정방향으로 스캔하므로, 작업량은 세션 길이가 아니라 턴 길이에 비례합니다.
+
+    Returns:
+        scan_transcript()와 같은 형식의 결과 (현재 턴 범위)
+    """
+    state = new_scan_state()
+
+    if not transcript_path or not os.path.exists(transcript_path):
+        return finalize_scan(state)
+
+    try:
+        with open(transcript_path, 'rb') as f:
+            _scan_lines(state, f, find_turn_start(f), text_classifier=text_classifier)
+    except (FileNotFoundError, PermissionError, IOError) as e:
+        print(f"[Transcript] Read error (turn): {e}", file=sys.stderr)
+
+    return finalize_scan(state)
+
+
+def find_latest_marked_texts(
+    transcript_path: Optional[str],
+    text_classifier: Callable,
+    kinds: tuple[str, ...]
+) -> dict[str, str]:
+    """
+    파일 끝에서부터 역방향으로 종류별 가장 최근 assistant text 탐색
+
+    모든 종류를 찾으면 바로 멈추고 종류당 텍스트 하나만 보관하므로,
+    메모리 사용량은 세션 길이와 관계없이 일정합니다.
+
+    Args:
+        transcript_path: transcript 파일 절대 경로
+        text_classifier: assistant text → 종류 목록 (예: ['completion', 'usage'])
+        kinds: 찾을 종류 목록
+
+    Returns:
+        {종류: 가장 최근 텍스트} (찾지 못한 종류는 없음)
+    """
+    found: dict[str, str] = {}
+
+    if not transcript_path or not os.path.exists(transcript_path):
+        return found
+
+    try:
+        with open(transcript_path, 'rb') as f:
+            for _, line in iter_lines_reversed(f, max_line=STREAM_LINE_THRESHOLD):
+                if isinstance(line, LongLine):
+                    obj, _, _ = read_long_line(f, line.start)
+                else:
+                    # text 블록이 있는 assistant 줄만 디코딩
+                    if not _ASSISTANT_TYPE_RE.search(line) or not _TEXT_BLOCK_RE.search(line):
+                        continue
+                    try:
+                        obj = load_json_line(line)
+                    except ValueError:
+                        continue
+
+                if not isinstance(obj, dict) or obj.get('type') != 'assistant':
+                    continue
+                msg = obj.get('message', {})
+                content = msg.get('content') if isinstance(msg, dict) else None
+                if not isinstance(content, list):
+                    continue
+
+                for block in reversed(content):
+                    if not isinstance(block, dict) or block.get('type') != 'text' or not block.get('text'):
+                        continue
+                    for kind in text_classifier(block['text']):
+                        if kind in kinds and kind not in found:
+                            found[kind] = block['text']
+
+                if len(found) == len(kinds):
+                    break
+    except (FileNotFoundError, PermissionError, IOError) as e:
+        print(f"[Transcript] Read error (texts): {e}", file=sys.stderr)
+
+    return found
+
+
+# ============================================================
+# 증분 커서 (세션별로 마지막 스캔 위치 + 누적 결과 저장)
+# ============================================================
+
+CURSOR_VERSION = 2
+
+# 커서 무결성 확인용: offset 직전 바이트 수
+CURSOR_SIGNATURE_BYTES = 256
+
+# 이 기간 동안 갱신되지 않은 커서 파일은 정리
+CURSOR_MAX_AGE = 7 * 24 * 3600
+
+
+def _cursor_path(session_id: str) -> str:
+    return os.path.join(get_cache_dir('cursors'), f"{safe_filename(session_id)}.json")
+
+
+def _read_signature(f: BinaryIO, offset: int) -> str:
+    """offset 직전 바이트의 해시 (파일이 재작성되었는지 확인)"""
+    start = max(0, offset - CURSOR_SIGNATURE_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def _prune_stale_cursors() -> None:
+    """오래된 커서 파일 정리 (새 세션의 첫 커서를 만들 때만)"""
+    prune_stale_files(get_cache_dir('cursors'), CURSOR_MAX_AGE)
+
+
+def _load_cursor(session_id: str, transcript_path: str, stat: os.stat_result, f: BinaryIO) -> Optional[dict]:
+    """
+    저장된 커서를 읽고 유효성 검사
+
+    다음의 경우 커서를 버리고 처음부터 스캔합니다:
+    - 다른 transcript 파일이거나 inode가 바뀐 경우 (재작성, 압축 후 교체)
+    - 파일이 커서 위치보다 작아진 경우 (잘림)
+    - 커서 위치 직전 바이트가 달라진 경우 (같은 파일을 덮어씀)
+    """
+    cursor = read_json(_cursor_path(session_id))
+    if not isinstance(cursor, dict) or cursor.get('version') != CURSOR_VERSION:
+        return None
+
+    offset = cursor.get('offset', 0)
+    if (cursor.get('transcript_path') != transcript_path
+            or cursor.get('inode') != stat.st_ino
+            or not isinstance(offset, int)
+            or stat.st_size < offset
+            or _read_signature(f, offset) != cursor.get('signature')):
+        print(f"[Transcript] Cursor invalidated for session: {session_id}", file=sys.stderr)
+        return None
+
+    return cursor
+
+
+def scan_transcript_incremental(
+    transcript_path: Optional[str],
+    session_id: str,
+    text_classifier: Optional[Callable] = None
+) -> dict:
+    """
+    세션 커서를 이용해 마지막 실행 이후 추가된 바이트만 스캔
+
+    커서에는 파일 offset, inode/크기와 누적 결과(도구 통계, 수정 파일, 에러,
+    마지막 사용자 요청, 미답변 질문 ID)가 저장됩니다. Stop 훅은 매 턴마다
+    호출되므로 전체 재파싱 대신 증분 스캔으로 누적 비용을 선형으로 유지합니다.
+
+    Args:
+        transcript_path: transcript 파일 절대 경로
+        session_id: 커서 키로 사용할 세션 ID
+        text_classifier: assistant text → 종류 목록. 커서에는 종류별 최신
+                         텍스트만 저장합니다 (없으면 모든 텍스트 저장)
+
+    Returns:
+        scan_transcript()와 같은 형식의 결과
+    """
+    if not transcript_path or not os.path.exists(transcript_path):
+        return finalize_scan(new_scan_state())
+    if not session_id:
+        return scan_transcript(transcript_path)
+
+    try:
+        with open(transcript_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            cursor = _load_cursor(session_id, transcript_path, stat, f)
+
+            if cursor:
+                state = load_scan_state(cursor.get('state', {}))
+                offset = cursor['offset']
+            else:
+                _prune_stale_cursors()
+                state = new_scan_state()
+                offset = 0
+
+            offset = _scan_lines(state, f, offset, complete_only=True, text_classifier=text_classifier)
+
+            write_json_atomic(_cursor_path(session_id), {
+                'version': CURSOR_VERSION,
+                'transcript_path': transcript_path,
+                'inode': stat.st_ino,
+                'size': stat.st_size,
+                'offset': offset,
+                'signature': _read_signature(f, offset),
+                'state': dump_scan_state(state),
+            })
+    except (FileNotFoundError, PermissionError, IOError) as e:
+        print(f"[Transcript] Read error (incremental): {e}", file=sys.stderr)
+        return scan_transcript(transcript_path)
+
+    return finalize_scan(state)
+
+
+# CLI로 직접 실행시 테스트
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        scan = scan_transcript(sys.argv[1])
+        print(json.dumps({
+            'last_user_message': scan['last_user_message'],
+            'question': scan['question'],
+            'summary': scan['summary'],
+            'assistant_texts': len(scan['assistant_texts']),
+            'errors': scan['summary']['errors_count'],
+        }, ensure_ascii=False, indent=2))
+    else:
+        print("Usage: python transcript.py <transcript_path>", file=sys.stderr)
+        sys.exit(1)
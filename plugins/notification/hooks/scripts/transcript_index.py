@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Transcript 오프셋 인덱스 (mmap + 사이드카 .idx)
+
+transcript를 mmap으로 열고, user/assistant/tool_use/tool_result 레코드의
+바이트 위치를 캐시 디렉토리의 .idx 파일에 기록합니다.
+인덱스는 마지막으로 인덱싱한 위치부터 추가된 줄만 처리해 이어붙이므로,
+훅은 전체 스캔 없이 "마지막 N개의 assistant text"나 "tool_use_id X의 레코드"로
+바로 이동할 수 있습니다.
+
+Notification의 마지막 사용자 메시지/미답변 질문 조회(transcript.scan_transcript_tail)가
+이 인덱스를 씁니다: 사용자 요청 항목과 AskUserQuestion 항목만 디코딩하고, 답변 여부는
+tool_result 항목의 키로 확인하므로 턴이 길어도 읽는 양은 새로 추가된 줄뿐입니다.
+인덱스는 증분 커서와 같은 기준(inode, 인덱싱한 위치보다 작아진 파일, 위치 직전
+CURSOR_SIGNATURE_BYTES의 해시)으로 무효화되어 처음부터 다시 만들어집니다.
+
+.idx 형식 (리틀 엔디언):
+    헤더: magic, version, inode, 인덱싱한 바이트 수, 직전 256바이트 sha1, 항목 수
+    항목: offset(u64), length(u32), kind(u8), flags(u8), key(8바이트, tool_use_id 해시)
+
+설정:
+    ENABLE_TRANSCRIPT_INDEX: "false"면 인덱스 없이 역방향으로 읽음 (기본값: true)
+
+사용법:
+    from transcript_index import TranscriptIndex
+
+    with TranscriptIndex(transcript_path) as index:
+        index.tail()
+        index.last_assistant_texts(5)
+        index.find_tool_use('toolu_...')
+        index.has_tool_result('toolu_...')
+"""
+from __future__ import annotations
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from typing import Iterator, NamedTuple, Optional
+
+from cache import get_cache_dir, safe_filename, prune_stale_files
+from transcript import (
+    CURSOR_MAX_AGE,
+    CURSOR_SIGNATURE_BYTES,
+    classify_user_text,
+    load_json_line,
+    read_long_line,
+    STREAM_LINE_THRESHOLD,
+    _RECORD_TYPE_RE,
+    _TOOL_RESULT_RE,
+    _IS_ERROR_RE,
+    _TOOL_USE_ID_RE,
+)
+
+# 파일 잠금 (Unix만, 없으면 잠금 없이 동작)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+INDEX_MAGIC = b'CNIX'
+INDEX_VERSION = 2
+
+# 이 기간 동안 갱신되지 않은 인덱스 파일은 정리 (커서와 같음)
+INDEX_MAX_AGE = CURSOR_MAX_AGE
+
+_HEADER = struct.Struct('<4sHQQ20sI')
+_ENTRY = struct.Struct('<QIBB8s')
+
+# 레코드 종류
+KIND_USER = 1
+KIND_ASSISTANT = 2
+KIND_TOOL_USE = 3
+KIND_TOOL_RESULT = 4
+
+# 플래그
+FLAG_PROMPT = 0x01     # user: content가 문자열 (사용자 입력)
+FLAG_TEXT = 0x02       # assistant: text 블록 포함
+FLAG_QUESTION = 0x04   # tool_use: AskUserQuestion (ID가 없어도 항목을 만듦)
+FLAG_ERROR = 0x08      # tool_result: is_error
+
+_NO_KEY = bytes(8)
+
+
+def is_index_enabled() -> bool:
+    return os.environ.get("ENABLE_TRANSCRIPT_INDEX", "true").lower() == "true"
+
+
+class IndexEntry(NamedTuple):
+    """인덱스 항목 하나 (레코드 위치 + 종류)"""
+    offset: int
+    length: int
+    kind: int
+    flags: int
+    key: bytes
+
+
+def tool_use_key(tool_use_id: str | bytes) -> bytes:
+    """tool_use_id → 8바이트 인덱스 키"""
+    if isinstance(tool_use_id, str):
+        tool_use_id = tool_use_id.encode()
+    return hashlib.blake2b(tool_use_id, digest_size=8).digest()
+
+
+def index_path(transcript_path: str) -> str:
+    """transcript에 대응하는 .idx 파일 경로"""
+    digest = hashlib.sha1(os.path.abspath(transcript_path).encode()).hexdigest()[:12]
+    name = safe_filename(os.path.splitext(os.path.basename(transcript_path))[0])
+    return os.path.join(get_cache_dir('index'), f"{name}-{digest}.idx")
+
+
+def _signature(data, offset: int) -> bytes:
+    """offset 직전 바이트의 해시 (transcript가 재작성되었는지 확인 - 커서의 서명과 같은 값)"""
+    if data is None:
+        return hashlib.sha1(b'').digest()
+    return hashlib.sha1(data[max(0, offset - CURSOR_SIGNATURE_BYTES):offset]).digest()
+
+
+# ============================================================
+# 인덱싱 (줄 → 항목)
+# ============================================================
+
+def _decode_record(data: mmap.mmap, start: int, end: int) -> Optional[dict]:
+    """mmap의 [start, end) 줄 디코딩 (긴 줄은 스트리밍 파싱)"""
+    if end - start > STREAM_LINE_THRESHOLD:
+        obj, _, _ = read_long_line(data, start)
+    else:
+        try:
+            obj = load_json_line(data[start:end])
+        except ValueError:
+            return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _index_record(data: mmap.mmap, start: int, end: int) -> list[IndexEntry]:
+    """transcript 한 줄에 대한 인덱스 항목 생성"""
+    length = end - start
+    if not _RECORD_TYPE_RE.search(data, start, end):
+        return []
+
+    # tool_result는 디코딩 없이 바이트 패턴으로 ID만 수집 (큰 결과 페이로드)
+    if _TOOL_RESULT_RE.search(data, start, end):
+        flags = FLAG_ERROR if _IS_ERROR_RE.search(data, start, end) else 0
+        keys = [tool_use_key(m.group(1)) for m in _TOOL_USE_ID_RE.finditer(data, start, end)]
+        return [IndexEntry(start, length, KIND_TOOL_RESULT, flags, key) for key in keys or [_NO_KEY]]
+
+    obj = _decode_record(data, start, end)
+    if obj is None:
+        return []
+
+    obj_type = obj.get('type')
+    msg = obj.get('message', {})
+    content = msg.get('content') if isinstance(msg, dict) else None
+
+    if obj_type == 'user':
+        flags = FLAG_PROMPT if isinstance(content, str) else 0
+        return [IndexEntry(start, length, KIND_USER, flags, _NO_KEY)]
+
+    entries = []
+    blocks = [block for block in content if isinstance(block, dict)] if isinstance(content, list) else []
+
+    if obj_type == 'assistant':
+        has_text = any(block.get('type') == 'text' and block.get('text') for block in blocks)
+        entries.append(IndexEntry(start, length, KIND_ASSISTANT, FLAG_TEXT if has_text else 0, _NO_KEY))
+
+    if obj_type in ('assistant', 'tool_use'):
+        for block in blocks:
+            if block.get('type') != 'tool_use':
+                continue
+            question = block.get('name') == 'AskUserQuestion'
+            if block.get('id') or question:
+                key = tool_use_key(block['id']) if block.get('id') else _NO_KEY
+                entries.append(IndexEntry(start, length, KIND_TOOL_USE, FLAG_QUESTION if question else 0, key))
+
+    return entries
+
+
+def _index_lines(data: Optional[mmap.mmap], start: int) -> tuple[list[IndexEntry], int]:
+    """
+    start부터 완성된 줄(줄바꿈으로 끝남)만 인덱싱
+
+    Returns:
+        (새 항목 목록, 인덱싱을 마친 다음 바이트 offset)
+    """
+    entries: list[IndexEntry] = []
+    if data is None:
+        return entries, start
+
+    pos = start
+    size = len(data)
+    while pos < size:
+        newline = data.find(b'\n', pos)
+        if newline < 0:
+            # 기록 중인 마지막 줄은 다음 실행에서 인덱싱
+            break
+        if newline > pos:
+            entries.extend(_index_record(data, pos, newline))
+        pos = newline + 1
+    return entries, pos
+
+
+# ============================================================
+# 인덱스 파일 (.idx)
+# ============================================================
+
+def _read_index(idx, stat: os.stat_result, data: Optional[mmap.mmap]) -> Optional[tuple[int, list[IndexEntry]]]:
+    """
+    저장된 인덱스를 읽고 유효성 검사
+
+    다음의 경우 인덱스를 버리고 처음부터 만듭니다:
+    - inode가 바뀐 경우 (재작성, 압축 후 교체)
+    - 파일이 인덱싱한 위치보다 작아진 경우 (잘림)
+    - 인덱싱한 위치 직전 바이트가 달라진 경우 (같은 파일을 덮어씀)
+
+    Returns:
+        (인덱싱한 바이트 수, 항목 목록) 또는 None
+    """
+    idx.seek(0)
+    header = idx.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+
+    magic, version, inode, indexed_size, signature, count = _HEADER.unpack(header)
+    if (magic != INDEX_MAGIC or version != INDEX_VERSION
+            or inode != stat.st_ino
+            or indexed_size > stat.st_size
+            or _signature(data, indexed_size) != signature):
+        return None
+
+    # 헤더 갱신 전에 중단된 경우 헤더의 항목 수 뒤에 남은 바이트는 무시
+    raw = idx.read(count * _ENTRY.size)
+    if len(raw) < count * _ENTRY.size:
+        return None
+    return indexed_size, [IndexEntry(*fields) for fields in _ENTRY.iter_unpack(raw)]
+
+
+def _update_index(path: str, stat: os.stat_result, data: Optional[mmap.mmap]) -> tuple[list[IndexEntry], int]:
+    """
+    인덱스 파일을 transcript의 마지막 완성된 줄까지 갱신
+
+    Returns:
+        (전체 항목, 인덱싱한 바이트 수)
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+b') as idx:
+        # 동시에 실행된 훅이 같은 인덱스에 항목을 이어붙이지 않도록 잠금
+        if FCNTL_AVAILABLE:
+            fcntl.flock(idx.fileno(), fcntl.LOCK_EX)
+
+        loaded = _read_index(idx, stat, data)
+        if loaded is None:
+            print(f"[TranscriptIndex] Building index: {path}", file=sys.stderr)
+            prune_stale_files(os.path.dirname(path), INDEX_MAX_AGE)
+            indexed_size, entries = 0, []
+        else:
+            indexed_size, entries = loaded
+
+        new_entries, new_size = _index_lines(data, indexed_size)
+        if loaded is not None and new_size == indexed_size:
+            return entries, indexed_size
+
+        # 항목을 먼저 쓰고 헤더를 마지막에 갱신 (중간에 중단되어도 헤더 기준으로 복구)
+        if loaded is None:
+            idx.truncate(0)
+            idx.seek(0)
+            idx.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, 0, bytes(20), 0))
+        else:
+            idx.truncate(_HEADER.size + len(entries) * _ENTRY.size)
+            idx.seek(0, os.SEEK_END)
+        idx.write(b''.join(_ENTRY.pack(*entry) for entry in new_entries))
+        entries.extend(new_entries)
+
+        idx.seek(0)
+        idx.write(_HEADER.pack(
+            INDEX_MAGIC, INDEX_VERSION, stat.st_ino, new_size,
+            _signature(data, new_size), len(entries),
+        ))
+        return entries, new_size
+
+
+# ============================================================
+# 인덱스 리더
+# ============================================================
+
+class TranscriptIndex:
+    """
+    mmap으로 연 transcript + 레코드 오프셋 인덱스
+
+    생성시 인덱스를 transcript 끝까지 갱신합니다 (추가된 줄만 처리).
+    기록 중인 마지막 줄은 파일에 저장하지 않고 메모리에서만 인덱싱하며,
+    인덱스 파일을 쓸 수 없으면 전체를 메모리에서만 인덱싱합니다.
+
+    Args:
+        transcript_path: transcript 파일 절대 경로
+
+    Raises:
+        OSError: transcript를 열 수 없는 경우
+    """
+
+    def __init__(self, transcript_path: str):
+        self.transcript_path = transcript_path
+        self._file = open(transcript_path, 'rb')
+        self._data: Optional[mmap.mmap] = None
+        try:
+            stat = os.fstat(self._file.fileno())
+            if stat.st_size:
+                self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                self.entries, indexed_size = _update_index(index_path(transcript_path), stat, self._data)
+            except OSError as e:
+                print(f"[TranscriptIndex] Index write error: {e}", file=sys.stderr)
+                self.entries, indexed_size = _index_lines(self._data, 0)
+            if self._data is not None and indexed_size < len(self._data):
+                self.entries.extend(_index_record(self._data, indexed_size, len(self._data)))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        self._file.close()
+
+    def __enter__(self) -> TranscriptIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(self, entry: IndexEntry) -> Optional[dict]:
+        """항목이 가리키는 레코드 디코딩"""
+        if self._data is None:
+            return None
+        return _decode_record(self._data, entry.offset, entry.offset + entry.length)
+
+    def iter_entries(self, kind: int, flags: int = 0, reverse: bool = True) -> Iterator[IndexEntry]:
+        """kind가 같고 flags를 모두 가진 항목 (기본: 최신 순)"""
+        entries = reversed(self.entries) if reverse else iter(self.entries)
+        for entry in entries:
+            if entry.kind == kind and entry.flags & flags == flags:
+                yield entry
+
+    def last_assistant_texts(self, n: Optional[int] = None) -> list[str]:
+        """
+        마지막 n개의 assistant text 응답 (원래 순서, n이 None이면 전체)
+
+        text 블록이 있는 레코드만 최신 순으로 디코딩합니다.
+        """
+        texts: list[str] = []
+        for entry in self.iter_entries(KIND_ASSISTANT, FLAG_TEXT):
+            if n is not None and len(texts) >= n:
+                break
+            obj = self.record(entry)
+            content = obj.get('message', {}).get('content') if obj else None
+            if not isinstance(content, list):
+                continue
+            for block in reversed(content):
+                if isinstance(block, dict) and block.get('type') == 'text' and block.get('text'):
+                    texts.append(block['text'])
+        if n is not None:
+            texts = texts[:n]
+        return list(reversed(texts))
+
+    def last_user_message(self) -> Optional[tuple[str, bool]]:
+        """마지막 사용자 메시지 또는 커맨드 (시스템 메시지 제외)"""
+        return self._last_prompt()[1]
+
+    def _last_prompt(self) -> tuple[int, Optional[tuple[str, bool]]]:
+        """마지막 사용자 메시지의 (offset, (메시지, 커맨드 여부)) - 없으면 (-1, None)"""
+        for entry in self.iter_entries(KIND_USER, FLAG_PROMPT):
+            obj = self.record(entry)
+            msg = obj.get('message', {}) if obj else None
+            content = msg.get('content') if isinstance(msg, dict) else None
+            if isinstance(content, str):
+                result = classify_user_text(content)
+                if result:
+                    return entry.offset, result
+        return -1, None
+
+    def pending_question(self, after: int = -1) -> Optional[dict]:
+        """
+        after 이후 가장 최근 AskUserQuestion의 입력 (그 뒤에 tool_result가 있으면 None)
+
+        질문 항목만 최신 순으로 디코딩하고, 답변 여부는 tool_result 항목의 키로 확인합니다.
+        """
+        checked = set()
+        for entry in self.iter_entries(KIND_TOOL_USE, FLAG_QUESTION):
+            if entry.offset <= after:
+                break
+            if entry.offset in checked:
+                continue
+            checked.add(entry.offset)
+            obj = self.record(entry)
+            if not obj or obj.get('type') != 'assistant':
+                continue
+            msg = obj.get('message', {})
+            content = msg.get('content') if isinstance(msg, dict) else None
+            for block in reversed(content) if isinstance(content, list) else []:
+                if (not isinstance(block, dict) or block.get('type') != 'tool_use'
+                        or block.get('name') != 'AskUserQuestion'):
+                    continue
+                input_data = block.get('input', {})
+                if 'questions' not in input_data:
+                    continue
+                question_id = block.get('id')
+                if question_id and self.has_tool_result(question_id, after=entry.offset):
+                    print(f"[Transcript] AskUserQuestion {question_id} already answered - skipping", file=sys.stderr)
+                    return None
+                return input_data
+        return None
+
+    def tail(self) -> dict:
+        """transcript.scan_transcript_tail()과 같은 결과 (마지막 사용자 메시지, 미답변 질문)"""
+        offset, user_message = self._last_prompt()
+        return {'last_user_message': user_message, 'question': self.pending_question(offset)}
+
+    def find_tool_use(self, tool_use_id: str) -> Optional[dict]:
+        """tool_use_id에 해당하는 tool_use 블록"""
+        key = tool_use_key(tool_use_id)
+        for entry in self.entries:
+            if entry.kind != KIND_TOOL_USE or entry.key != key:
+                continue
+            obj = self.record(entry)
+            content = obj.get('message', {}).get('content') if obj else None
+            for block in content if isinstance(content, list) else []:
+                if isinstance(block, dict) and block.get('type') == 'tool_use' and block.get('id') == tool_use_id:
+                    return block
+        return None
+
+    def has_tool_result(self, tool_use_id: str, after: int = -1) -> bool:
+        """tool_use_id에 대한 tool_result가 (offset after 뒤에) 기록되었는지 여부"""
+        key = tool_use_key(tool_use_id)
+        return any(entry.kind == KIND_TOOL_RESULT and entry.key == key and entry.offset > after
+                   for entry in self.entries)
+
+
+# CLI로 직접 실행시 테스트
+if __name__ == '__main__':
+    import json
+
+    if len(sys.argv) < 2:
+        print("Usage: python transcript_index.py <transcript_path> [tool_use_id]", file=sys.stderr)
+        sys.exit(1)
+
+    with TranscriptIndex(sys.argv[1]) as index:
+        if len(sys.argv) > 2:
+            print(json.dumps({
+                'tool_use': index.find_tool_use(sys.argv[2]),
+                'has_result': index.has_tool_result(sys.argv[2]),
+            }, ensure_ascii=False, indent=2))
+        else:
+            counts: dict[int, int] = {}
+            for entry in index.entries:
+                counts[entry.kind] = counts.get(entry.kind, 0) + 1
+            print(json.dumps({
+                'index': index_path(sys.argv[1]),
+                'entries': len(index.entries),
+                'user': counts.get(KIND_USER, 0),
+                'assistant': counts.get(KIND_ASSISTANT, 0),
+                'tool_use': counts.get(KIND_TOOL_USE, 0),
+                'tool_result': counts.get(KIND_TOOL_RESULT, 0),
+                'last_user_message': index.last_user_message(),
+                'last_assistant_texts': [text[:80] for text in index.last_assistant_texts(3)],
+            }, ensure_ascii=False, indent=2))
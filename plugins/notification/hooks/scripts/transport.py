@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+웹훅 전송 계층 (호스트별 keep-alive 연결)
+
+urllib.request.urlopen은 요청마다 DNS 조회, TCP 연결, TLS 핸드셰이크를 새로 합니다.
+여러 웹훅 URL이 같은 호스트(hooks.slack.com, discord.com)를 가리키면 한 번 전송할
+때마다 같은 핸드셰이크를 URL 수만큼 반복하고, 스풀 데몬은 이벤트마다 반복합니다.
+
+호스트(스킴, 호스트, 포트)마다 쉬고 있는 연결을 POOL_MAX_PER_HOST개까지 열어 두고 재사용합니다:
+- 요청은 쉬고 있는 연결을 가져다 쓰고, 없으면 새로 연결 (다른 요청을 기다리지 않음 -
+  같은 호스트의 URL 여러 개도 동시에 전송되고, 느린 웹훅 하나가 나머지를 막지 않음)
+- 재사용한 연결이 끊겨 있으면(서버가 닫은 keep-alive 등) 남은 시간 안에서 새로 연결해 한 번 재시도
+- POOL_IDLE_TIMEOUT 동안 쓰지 않은 연결은 닫고 새로 연결
+- 프록시 환경변수(HTTPS_PROXY 등)가 있으면 urllib로 전송 (프록시 규칙을 그대로 따름)
+
+counters()의 handshakes(새 연결 수)와 requests를 비교하면 줄어든 왕복을 확인할
+수 있습니다 (python bench.py transport).
+
+설정:
+  ENABLE_HTTP_KEEPALIVE: "false"면 요청마다 새 연결 (기본값: true)
+
+사용법:
+    import transport
+
+    response = transport.post_json(url, payload, timeout=5.0)
+    response.status, response.reused
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+
+# 이 시간 동안 쓰지 않은 연결은 재사용하지 않음 (초, 서버의 keep-alive 유지 시간보다 짧게)
+POOL_IDLE_TIMEOUT = 30.0
+
+# 호스트마다 열어 두는 쉬는 연결 수 (동시에 보내는 같은 호스트 URL 수만큼이면 충분)
+POOL_MAX_PER_HOST = 4
+
+# 재사용한 연결로 요청을 보내는 중에 이 예외가 나면 서버가 이미 닫은 연결로 보고 새로 연결해 재시도
+# (응답을 읽다가 난 오류는 서버가 요청을 받았을 수 있으므로 재시도하지 않음)
+_STALE_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+_PROXY_VARS = ('https_proxy', 'HTTPS_PROXY', 'http_proxy', 'HTTP_PROXY', 'all_proxy', 'ALL_PROXY')
+
+
+class Response(NamedTuple):
+    """웹훅 응답 (본문은 모두 읽은 상태)"""
+    status: int
+    headers: object     # http.client.HTTPMessage (get()으로 헤더 조회)
+    body: bytes
+    reused: bool        # 열려 있던 연결을 재사용했는지
+
+
+class HTTPStatusError(Exception):
+    """4xx/5xx 응답 (urllib.error.HTTPError처럼 code, headers 제공)"""
+
+    def __init__(self, url: str, code: int, reason: str, headers: object, body: bytes = b'',
+                 reused: bool = False):
+        super().__init__(f"HTTP Error {code}: {reason}")
+        self.url = url
+        self.code = code
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.reused = reused
+
+
+# 호스트 → 쉬고 있는 (연결, 마지막 사용 시각) 목록 (마지막에 쓴 연결이 끝)
+_pool: dict[tuple[str, str, int], list[tuple[object, float]]] = {}
+_pool_lock = threading.Lock()
+_counters = {'requests': 0, 'handshakes': 0, 'reused': 0, 'reconnects': 0}
+_counters_lock = threading.Lock()
+
+
+def is_keepalive_enabled() -> bool:
+    return os.environ.get("ENABLE_HTTP_KEEPALIVE", "true").lower() == "true"
+
+
+def _count(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def counters() -> dict[str, int]:
+    """누적 전송 수 (requests), 새 연결 수 (handshakes), 재사용 수 (reused), 끊긴 연결 재시도 수 (reconnects)"""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _uses_proxy() -> bool:
+    return any(os.environ.get(name) for name in _PROXY_VARS)
+
+
+def _connect(scheme: str, host: str, port: int, timeout: float):
+    import http.client
+
+    _count('handshakes')
+    if scheme == 'https':
+        import ssl
+        return http.client.HTTPSConnection(host, port, timeout=timeout, context=ssl.create_default_context())
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+
+def _send(conn, path: str, body: bytes, headers: dict, timeout: float) -> None:
+    """요청을 끝까지 보냄"""
+    if conn.sock is None:
+        conn.connect()
+    conn.sock.settimeout(timeout)
+    conn.request('POST', path, body=body, headers=headers)
+
+
+def _read_response(conn):
+    """응답 본문까지 읽음 (다음 요청에 연결을 쓰려면 본문을 모두 읽어야 함)"""
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def _request(conn, path: str, body: bytes, headers: dict, timeout: float):
+    """요청을 보내고 응답 본문까지 읽음"""
+    _send(conn, path, body, headers, timeout)
+    return _read_response(conn)
+
+
+def _checkout(key: tuple[str, str, int]):
+    """쉬고 있는 연결 하나를 꺼냄 (없으면 None, 오래 쉰 연결은 닫음)"""
+    stale = []
+    conn = None
+    with _pool_lock:
+        idle = _pool.get(key, [])
+        now = time.monotonic()
+        while idle:
+            candidate, last_used = idle.pop()
+            if now - last_used <= POOL_IDLE_TIMEOUT:
+                conn = candidate
+                break
+            stale.append(candidate)
+    for candidate in stale:
+        candidate.close()
+    return conn
+
+
+def _checkin(key: tuple[str, str, int], conn) -> None:
+    """다 쓴 연결을 돌려놓음 (자리가 없으면 닫음)"""
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < POOL_MAX_PER_HOST:
+            idle.append((conn, time.monotonic()))
+            return
+    conn.close()
+
+
+def _post_urllib(url: str, body: bytes, headers: dict, timeout: float) -> Response:
+    """프록시 환경 등에서 쓰는 일회용 urllib 전송"""
+    import urllib.error
+    import urllib.request
+
+    _count('requests')
+    _count('handshakes')
+    req = urllib.request.Request(url, data=body, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return Response(resp.status, resp.headers, resp.read(), False)
+    except urllib.error.HTTPError as e:
+        raise HTTPStatusError(url, e.code, str(e.reason), e.headers) from None
+
+
+def post(url: str, body: bytes, headers: Optional[dict] = None, timeout: float = 10.0) -> Response:
+    """
+    URL로 POST (호스트별 keep-alive 연결 재사용)
+
+    Args:
+        url: http(s) URL
+        body: 요청 본문
+        headers: 요청 헤더
+        timeout: 연결, 응답 각각의 타임아웃 (초, 끊긴 연결 재시도는 남은 시간 안에서)
+
+    Returns:
+        Response (2xx/3xx)
+
+    Raises:
+        HTTPStatusError: 4xx/5xx 응답
+        OSError: 연결/전송 실패 (socket.timeout 포함)
+    """
+    from urllib.parse import urlsplit
+
+    headers = dict(headers or {})
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError(f"unsupported URL: {scheme}://...")
+    if _uses_proxy():
+        return _post_urllib(url, body, headers, timeout)
+
+    port = parts.port or (443 if scheme == 'https' else 80)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+
+    _count('requests')
+    if not is_keepalive_enabled():
+        headers['Connection'] = 'close'
+        conn = _connect(scheme, parts.hostname, port, timeout)
+        try:
+            resp, data = _request(conn, path, body, headers, timeout)
+        finally:
+            conn.close()
+        return _response(url, resp, data, reused=False)
+
+    key = (scheme, parts.hostname.lower(), port)
+    deadline = time.monotonic() + timeout
+    conn = _checkout(key)
+    reused = conn is not None
+    if conn is None:
+        conn = _connect(scheme, parts.hostname, port, timeout)
+    try:
+        try:
+            _send(conn, path, body, headers, timeout)
+        except _STALE_ERRORS:
+            conn.close()
+            remaining = deadline - time.monotonic()
+            if not reused or remaining <= 0:
+                raise
+            # keep-alive 연결이 서버에서 이미 닫혀 요청이 나가지 못함:
+            # 남은 시간 안에서 새 연결로 한 번만 재시도
+            _count('reconnects')
+            reused = False
+            conn = _connect(scheme, parts.hostname, port, remaining)
+            _send(conn, path, body, headers, remaining)
+        # 요청을 다 보낸 뒤 응답 읽기가 실패하면 재시도하지 않고 올림 (아웃박스가 백오프로 다시 보냄)
+        resp, data = _read_response(conn)
+    except Exception:
+        conn.close()
+        raise
+
+    if reused:
+        _count('reused')
+    if resp.will_close:
+        conn.close()
+    else:
+        _checkin(key, conn)
+    return _response(url, resp, data, reused)
+
+
+def post_json(url: str, payload: object, timeout: float = 10.0) -> Response:
+    """JSON 본문으로 POST"""
+    body = json.dumps(payload).encode('utf-8')
+    return post(url, body, {'Content-Type': 'application/json'}, timeout)
+
+
+def _response(url: str, resp, data: bytes, reused: bool) -> Response:
+    if resp.status >= 400:
+        raise HTTPStatusError(url, resp.status, resp.reason, resp.headers, data, reused)
+    return Response(resp.status, resp.headers, data, reused)
+
+
+def close_all() -> None:
+    """쉬고 있는 연결을 모두 닫음 (사용 중인 연결은 요청이 끝나면 다시 풀에 들어감)"""
+    with _pool_lock:
+        idle = [conn for conns in _pool.values() for conn, _ in conns]
+        _pool.clear()
+    for conn in idle:
+        conn.close()
@@ -0,0 +1,22 @@
+"""
+알림 훅 스크립트 테스트 공통 설정
+
+hooks/scripts의 모듈을 import할 수 있게 경로를 추가하고, 테스트마다 캐시 디렉토리
+(커서, 중복 방지 저장소 등)를 임시 디렉토리로 바꿉니다.
+
+실행:
+    python -m pytest -q plugins/notification/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'hooks', 'scripts'))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('NOTIFICATION_CACHE_DIR', str(path))
+    return path
@@ -0,0 +1,209 @@
+"""message.py Slack/Discord 한도 맞춤 (split_text, pack_slack, pack_discord) 테스트"""
+import random
+
+import pytest
+
+import message as m
+from message import Field, Message, Section, pack_discord, pack_slack, split_text
+
+
+def slack_errors(posts: list[dict]) -> list[str]:
+    """Slack 한도를 넘거나 비어 있는 부분 (Slack API가 400으로 거부)"""
+    errors = []
+    for post in posts:
+        blocks = post.get('blocks')
+        if blocks is None:
+            if not post['text'].strip() or len(post['text']) > m.SLACK_TEXT_FIELD_LIMIT:
+                errors.append(f"text: {len(post['text'])} chars")
+            continue
+        if len(blocks) > m.SLACK_MAX_BLOCKS:
+            errors.append(f"blocks: {len(blocks)}")
+        for block in blocks:
+            if block['type'] == 'header' and len(block['text']['text']) > m.SLACK_HEADER_LIMIT:
+                errors.append(f"header: {len(block['text']['text'])} chars")
+            if block['type'] == 'section' and 'text' in block:
+                text = block['text']['text']
+                if not text.strip() or len(text) > m.SLACK_TEXT_LIMIT:
+                    errors.append(f"section text: {len(text)} chars")
+            if len(block.get('fields', ())) > m.SLACK_FIELDS_PER_BLOCK:
+                errors.append(f"fields per block: {len(block['fields'])}")
+            for field in block.get('fields', ()):
+                if not field['text'].strip() or len(field['text']) > m.SLACK_FIELD_LIMIT:
+                    errors.append(f"field: {len(field['text'])} chars")
+    return errors
+
+
+def discord_errors(posts: list[dict]) -> list[str]:
+    """Discord 한도를 넘거나 비어 있는 부분 (Discord API가 400으로 거부)"""
+    errors = []
+    for post in posts:
+        assert len(post['embeds']) == 1
+        embed = post['embeds'][0]
+        if len(embed['title']) > m.DISCORD_TITLE_LIMIT:
+            errors.append(f"title: {len(embed['title'])} chars")
+        if 'description' in embed:
+            description = embed['description']
+            if not description.strip() or len(description) > m.DISCORD_DESCRIPTION_LIMIT:
+                errors.append(f"description: {len(description)} chars")
+        if len(embed.get('fields', ())) > m.DISCORD_MAX_FIELDS:
+            errors.append(f"fields: {len(embed['fields'])}")
+        for field in embed.get('fields', ()):
+            if not field['name'].strip() or len(field['name']) > m.DISCORD_FIELD_NAME_LIMIT:
+                errors.append(f"field name: {len(field['name'])} chars")
+            if not field['value'].strip() or len(field['value']) > m.DISCORD_FIELD_VALUE_LIMIT:
+                errors.append(f"field value: {len(field['value'])} chars")
+        if m._embed_size(embed) > m.DISCORD_EMBED_LIMIT:
+            errors.append(f"embed: {m._embed_size(embed)} chars")
+    return errors
+
+
+def assert_within_limits(message: Message, posts_limit: int) -> tuple[m.Packed, m.Packed]:
+    slack, discord = pack_slack(message), pack_discord(message)
+    assert slack_errors(slack.posts) == []
+    assert discord_errors(discord.posts) == []
+    assert 1 <= len(slack.posts) <= posts_limit
+    assert 1 <= len(discord.posts) <= posts_limit
+    return slack, discord
+
+
+def lines(count: int, width: int = 80, prefix: str = 'line') -> str:
+    return '\n'.join(f"{prefix} {i} ".ljust(width, 'x') for i in range(count))
+
+
+# ============================================================
+# split_text
+# ============================================================
+
+def test_split_text_short_text_is_one_chunk():
+    assert split_text('hello\nworld', 100) == ['hello\nworld']
+
+
+def test_split_text_keeps_every_line_within_limit():
+    text = lines(200)
+    chunks = split_text(text, 1000)
+    assert all(0 < len(chunk) <= 1000 for chunk in chunks)
+    assert '\n'.join(chunks) == text
+
+
+def test_split_text_cuts_lines_longer_than_limit():
+    text = 'a' * 2500 + '\nshort'
+    chunks = split_text(text, 1000)
+    assert chunks == ['a' * 1000, 'a' * 1000, 'a' * 500 + '\nshort']
+
+
+@pytest.mark.parametrize('limit', [m.DISCORD_FIELD_VALUE_LIMIT, m.SLACK_TEXT_LIMIT, m.DISCORD_DESCRIPTION_LIMIT])
+def test_split_text_has_no_empty_chunks_after_a_full_chunk(limit):
+    # 한도를 정확히 채운 조각 뒤의 빈 줄이 빈 조각이 되면 안 됨
+    chunks = split_text('a' * limit + '\n\n' + 'b' * limit, limit)
+    assert chunks == ['a' * limit, 'b' * limit]
+
+
+def test_split_text_drops_blank_lines_at_chunk_boundaries():
+    chunks = split_text('\n'.join(['a' * 10, '', '', '', 'b' * 10]), 10)
+    assert chunks == ['a' * 10, 'b' * 10]
+    assert all(chunk.strip() for chunk in chunks)
+
+
+# ============================================================
+# 한도 + 최대 글 수
+# ============================================================
+
+@pytest.fixture
+def posts_limit(monkeypatch):
+    def set_limit(value: int) -> int:
+        monkeypatch.setenv('NOTIFICATION_MAX_POSTS', str(value))
+        return value
+    return set_limit
+
+
+def test_small_message_is_one_post(posts_limit):
+    message = Message(title='작업 완료', icon='✅', timestamp=1.0,
+                      fields=(Field('머신', 'host'),), sections=(Section('사용자 요청', 'hi', style='quote'),))
+    slack, discord = assert_within_limits(message, posts_limit(3))
+    assert len(slack.posts) == len(discord.posts) == 1
+    assert slack.truncated == discord.truncated == 0
+    assert slack.oversized == discord.oversized == []
+
+
+@pytest.mark.parametrize('max_posts', [1, 2, 3, 10])
+def test_oversized_sections_are_split_into_at_most_max_posts(posts_limit, max_posts):
+    message = Message(title='작업 완료', icon='✅', sections=(
+        Section('완료된 작업', lines(6000), icon='🎯'),
+        Section(None, lines(300, prefix='digest')),
+        Section('사용 방법', lines(400), icon='📖'),
+    ))
+    slack, discord = assert_within_limits(message, posts_limit(max_posts))
+    assert '완료된 작업' in slack.oversized and '완료된 작업' in discord.oversized
+    if max_posts < 10:
+        # 나머지는 잘라내고 마지막 글에 생략 안내
+        assert len(slack.posts) == len(discord.posts) == max_posts
+        assert slack.truncated > 0 and discord.truncated > 0
+        assert '생략' in slack.posts[-1]['blocks'][-1]['elements'][0]['text']
+        assert '생략' in discord.posts[-1]['embeds'][0]['footer']['text']
+
+
+def test_split_posts_are_numbered(posts_limit):
+    # Slack은 글 하나에 블록 50개(약 150,000자)까지라 그보다 길게
+    message = Message(title='작업 완료', sections=(Section('완료된 작업', lines(2500)),))
+    slack, discord = assert_within_limits(message, posts_limit(10))
+    count = len(discord.posts)
+    assert count > 1 and len(slack.posts) > 1
+    assert [post['embeds'][0]['title'] for post in discord.posts] == [f"작업 완료 ({n}/{count})" for n in range(1, count + 1)]
+    assert slack.posts[1]['blocks'][0]['type'] == 'context'
+
+
+def test_everything_is_kept_when_max_posts_is_enough(posts_limit):
+    body = lines(300)
+    message = Message(title='작업 완료', sections=(Section('완료된 작업', body),))
+    slack, discord = assert_within_limits(message, posts_limit(10))
+    assert slack.truncated == discord.truncated == 0
+    values = [field['value'] for post in discord.posts for field in post['embeds'][0]['fields']]
+    assert '\n'.join(values) == body
+
+
+def test_long_fields_and_titles_are_clipped(posts_limit):
+    message = Message(title='T' * 400, timestamp=1.0,
+                      fields=tuple(Field(f"label {n}" * 40, 'v' * 3000) for n in range(30)))
+    assert_within_limits(message, posts_limit(3))
+
+
+@pytest.mark.parametrize('size', [100, 5000, 50000, 200000])
+def test_plain_text_message_within_limits(posts_limit, size):
+    text = '✅ 작업 완료\n' + lines(size // 80)
+    slack, discord = assert_within_limits(Message.from_text(text), posts_limit(3))
+    if size > m.SLACK_TEXT_FIELD_LIMIT * 3:
+        assert slack.truncated > 0
+
+
+def test_max_posts_setting(monkeypatch):
+    monkeypatch.delenv('NOTIFICATION_MAX_POSTS', raising=False)
+    assert m.max_posts() == m.DEFAULT_MAX_POSTS
+    monkeypatch.setenv('NOTIFICATION_MAX_POSTS', '0')
+    assert m.max_posts() == 1
+    monkeypatch.setenv('NOTIFICATION_MAX_POSTS', 'many')
+    assert m.max_posts() == m.DEFAULT_MAX_POSTS
+
+
+def random_body(rng: random.Random, size: int) -> str:
+    parts = []
+    while sum(map(len, parts)) < size:
+        parts.append(rng.choice((
+            '', '', '- item ' + 'x' * rng.randint(0, 120), '```', 'y' * rng.randint(900, 5000),
+            '## heading', 'text ' * rng.randint(1, 40),
+        )))
+    return '\n'.join(parts)
+
+
+def test_random_messages_stay_within_limits(posts_limit):
+    rng = random.Random(0)
+    for _ in range(100):
+        max_posts = posts_limit(rng.choice((1, 3, 10)))
+        sections = tuple(
+            Section(rng.choice((None, '완료된 작업', '사용자 요청')), random_body(rng, rng.choice((10, 1500, 9000, 30000))),
+                    icon='🎯', style=rng.choice(('text', 'quote', 'code', 'question')))
+            for _ in range(rng.randint(0, 6))
+        )
+        fields = tuple(Field(f"f{n}", 'v' * rng.choice((3, 50, 3000))) for n in range(rng.randint(0, 30)))
+        assert_within_limits(Message(title='T' * rng.choice((10, 300)), icon='✅', timestamp=1.0,
+                                     fields=fields, sections=sections), max_posts)
+        assert_within_limits(Message.from_text(random_body(rng, rng.choice((100, 50000)))), max_posts)
@@ -0,0 +1,206 @@
+"""transcript.py 증분 스캔 커서와 요약 목록 상한 테스트"""
+import json
+import os
+
+import transcript
+from transcript import SUMMARY_LIST_HEAD, SUMMARY_LIST_TAIL, scan_transcript, scan_transcript_incremental
+
+SESSION = 'session-1'
+
+
+def user(text: str) -> dict:
+    return {'type': 'user', 'message': {'role': 'user', 'content': text}}
+
+
+def bash(command: str, tool_id: str) -> dict:
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+        {'type': 'tool_use', 'id': tool_id, 'name': 'Bash', 'input': {'command': command}},
+    ]}}
+
+
+def edit(file_path: str, tool_id: str) -> dict:
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+        {'type': 'tool_use', 'id': tool_id, 'name': 'Edit', 'input': {'file_path': file_path}},
+    ]}}
+
+
+def error(text: str) -> dict:
+    return {'type': 'tool_result', 'message': {'content': [{'is_error': True, 'content': text}]}}
+
+
+def assistant_text(text: str) -> dict:
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [{'type': 'text', 'text': text}]}}
+
+
+def turn(n: int) -> list[dict]:
+    return [
+        user(f'request {n}'),
+        bash(f'make step-{n}', f'bash-{n}'),
+        edit(f'/src/file_{n % 3}.py', f'edit-{n}'),
+        error(f'failure {n}'),
+        assistant_text(f'done {n}'),
+    ]
+
+
+def encode(records: list[dict]) -> bytes:
+    return b''.join(json.dumps(record).encode('utf-8') + b'\n' for record in records)
+
+
+def write(path, records: list[dict], mode: str = 'wb') -> None:
+    with open(path, mode) as f:
+        f.write(encode(records))
+
+
+# ============================================================
+# 증분 스캔 = 전체 스캔
+# ============================================================
+
+def test_append_then_rescan_matches_full_scan(tmp_path):
+    path = str(tmp_path / 'transcript.jsonl')
+    write(path, turn(1) + turn(2))
+    scan_transcript_incremental(path, SESSION)
+
+    write(path, turn(3) + turn(4), mode='ab')
+    assert scan_transcript_incremental(path, SESSION) == scan_transcript(path)
+
+
+def test_partial_last_line_is_scanned_after_it_completes(tmp_path):
+    path = str(tmp_path / 'transcript.jsonl')
+    tail = encode([user('request 2')])
+    with open(path, 'wb') as f:
+        f.write(encode(turn(1)) + tail[:10])
+    first = scan_transcript_incremental(path, SESSION)
+    assert first['last_user_message'][0] == 'request 1'
+
+    with open(path, 'ab') as f:
+        f.write(tail[10:])
+    assert scan_transcript_incremental(path, SESSION) == scan_transcript(path)
+
+
+def test_rescan_without_changes_keeps_result(tmp_path):
+    path = str(tmp_path / 'transcript.jsonl')
+    write(path, turn(1))
+    first = scan_transcript_incremental(path, SESSION)
+    assert scan_transcript_incremental(path, SESSION) == first
+
+
+# ============================================================
+# 커서 초기화
+# ============================================================
+
+def test_truncated_file_resets_cursor(tmp_path, capsys):
+    path = str(tmp_path / 'transcript.jsonl')
+    write(path, turn(1) + turn(2) + turn(3))
+    scan_transcript_incremental(path, SESSION)
+
+    write(path, turn(7))
+    result = scan_transcript_incremental(path, SESSION)
+    assert result == scan_transcript(path)
+    assert result['summary']['commands_executed'] == ['make step-7']
+    assert 'Cursor invalidated' in capsys.readouterr().err
+
+
+def test_replaced_file_resets_cursor(tmp_path, capsys):
+    path = str(tmp_path / 'transcript.jsonl')
+    write(path, turn(1))
+    scan_transcript_incremental(path, SESSION)
+
+    # 같은 경로에 새 파일 (압축 후 교체처럼 inode가 바뀜, 크기는 더 큼)
+    replacement = str(tmp_path / 'replacement.jsonl')
+    write(replacement, turn(8) + turn(9))
+    os.replace(replacement, path)
+
+    result = scan_transcript_incremental(path, SESSION)
+    assert result == scan_transcript(path)
+    assert result['summary']['commands_executed'] == ['make step-8', 'make step-9']
+    assert 'Cursor invalidated' in capsys.readouterr().err
+
+
+def test_overwritten_file_resets_cursor(tmp_path, capsys):
+    path = str(tmp_path / 'transcript.jsonl')
+    write(path, turn(1))
+    scan_transcript_incremental(path, SESSION)
+
+    # 같은 inode를 같은 길이의 다른 내용으로 덮어쓰고 이어 씀 (커서 위치 직전 바이트가 달라짐)
+    with open(path, 'r+b') as f:
+        f.write(encode(turn(5)))
+    write(path, turn(6), mode='ab')
+
+    result = scan_transcript_incremental(path, SESSION)
+    assert result == scan_transcript(path)
+    assert result['summary']['commands_executed'] == ['make step-5', 'make step-6']
+    assert 'Cursor invalidated' in capsys.readouterr().err
+
+
+def test_cursor_from_older_version_is_ignored(tmp_path, cache_dir):
+    path = str(tmp_path / 'transcript.jsonl')
+    write(path, turn(1))
+    scan_transcript_incremental(path, SESSION)
+
+    cursor_path = transcript._cursor_path(SESSION)
+    with open(cursor_path) as f:
+        cursor = json.load(f)
+    cursor['version'] = transcript.CURSOR_VERSION - 1
+    cursor['state']['summary']['commands_executed'] = ['stale']
+    with open(cursor_path, 'w') as f:
+        json.dump(cursor, f)
+
+    assert scan_transcript_incremental(path, SESSION) == scan_transcript(path)
+
+
+# ============================================================
+# 명령어/에러 목록 상한
+# ============================================================
+
+LIMIT = SUMMARY_LIST_HEAD + SUMMARY_LIST_TAIL
+
+
+def test_append_capped_keeps_head_and_tail():
+    summary = {'items': [], 'items_count': 0}
+    for i in range(LIMIT + 25):
+        transcript._append_capped(summary, 'items', 'items_count', str(i))
+
+    assert summary['items_count'] == LIMIT + 25
+    assert len(summary['items']) == LIMIT
+    assert summary['items'][:SUMMARY_LIST_HEAD] == [str(i) for i in range(SUMMARY_LIST_HEAD)]
+    assert summary['items'][SUMMARY_LIST_HEAD:] == [str(i) for i in range(25 + SUMMARY_LIST_HEAD, LIMIT + 25)]
+
+
+def test_append_capped_below_limit_keeps_everything():
+    summary = {'items': [], 'items_count': 0}
+    for i in range(LIMIT):
+        transcript._append_capped(summary, 'items', 'items_count', str(i))
+    assert summary['items'] == [str(i) for i in range(LIMIT)]
+    assert summary['items_count'] == LIMIT
+
+
+def test_scan_caps_commands_and_errors(tmp_path):
+    path = str(tmp_path / 'transcript.jsonl')
+    total = LIMIT * 2
+    write(path, [record for n in range(total) for record in turn(n)])
+
+    summary = scan_transcript(path)['summary']
+    assert summary['commands_count'] == total
+    assert summary['errors_count'] == total
+    assert len(summary['commands_executed']) == LIMIT
+    assert len(summary['errors_encountered']) == LIMIT
+    assert summary['commands_executed'][0] == 'make step-0'
+    assert summary['commands_executed'][-1] == f'make step-{total - 1}'
+    assert summary['errors_encountered'][SUMMARY_LIST_HEAD] == f'failure {total - SUMMARY_LIST_TAIL}'
+
+
+def test_incremental_caps_match_full_scan_and_bound_cursor(tmp_path):
+    path = str(tmp_path / 'transcript.jsonl')
+    total = LIMIT * 3
+    for start in range(0, total, 7):
+        write(path, [record for n in range(start, min(start + 7, total)) for record in turn(n)], mode='ab')
+        scan_transcript_incremental(path, SESSION)
+
+    result = scan_transcript_incremental(path, SESSION)
+    assert result == scan_transcript(path)
+    assert result['summary']['commands_count'] == total
+
+    with open(transcript._cursor_path(SESSION)) as f:
+        summary = json.load(f)['state']['summary']
+    assert len(summary['commands_executed']) == LIMIT
+    assert len(summary['errors_encountered']) == LIMIT
@@ -0,0 +1,187 @@
+"""transcript_index.py 오프셋 인덱스 테스트 (역방향 탐색과 같은 결과, 커서와 같은 무효화)"""
+import json
+import os
+import random
+
+import pytest
+
+import transcript
+import transcript_index
+from transcript_index import TranscriptIndex
+
+
+def user(text: str) -> dict:
+    return {'type': 'user', 'message': {'role': 'user', 'content': text}}
+
+
+def question(tool_id, text: str = 'Which one?', record_type: str = 'assistant') -> dict:
+    block = {'type': 'tool_use', 'name': 'AskUserQuestion',
+             'input': {'questions': [{'question': text, 'header': 'Pick', 'options': []}]}}
+    if tool_id:
+        block['id'] = tool_id
+    return {'type': record_type, 'message': {'role': 'assistant', 'content': [block]}}
+
+
+def answer(tool_id: str) -> dict:
+    return {'type': 'user', 'message': {'role': 'user', 'content': [
+        {'type': 'tool_result', 'tool_use_id': tool_id, 'content': 'A'},
+    ]}}
+
+
+def bash(tool_id: str) -> dict:
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+        {'type': 'tool_use', 'id': tool_id, 'name': 'Bash', 'input': {'command': 'ls'}},
+    ]}}
+
+
+def result(tool_id: str, size: int = 10) -> dict:
+    return {'type': 'user', 'message': {'role': 'user', 'content': [
+        {'type': 'tool_result', 'tool_use_id': tool_id, 'content': 'x' * size},
+    ]}}
+
+
+def text(value: str) -> dict:
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [{'type': 'text', 'text': value}]}}
+
+
+def encode(records: list[dict]) -> bytes:
+    return b''.join(json.dumps(record).encode('utf-8') + b'\n' for record in records)
+
+
+def write(path, records: list[dict], mode: str = 'wb') -> None:
+    with open(path, mode) as f:
+        f.write(encode(records))
+
+
+def tail(path: str) -> dict:
+    with TranscriptIndex(path) as index:
+        return index.tail()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'transcript.jsonl')
+
+
+# ============================================================
+# 역방향 탐색과 같은 결과
+# ============================================================
+
+def test_unanswered_question_after_last_request(path):
+    write(path, [user('first'), question('q1'), answer('q1'), user('second'), bash('b1'), question('q2')])
+    assert tail(path) == transcript._scan_tail_reversed(path)
+    assert tail(path)['question']['questions'][0]['question'] == 'Which one?'
+    assert tail(path)['last_user_message'] == ('second', False)
+
+
+def test_answered_question_is_skipped(path):
+    write(path, [user('request'), question('q1', 'older'), question('q2'), answer('q2')])
+    assert tail(path) == transcript._scan_tail_reversed(path) == {
+        'last_user_message': ('request', False), 'question': None}
+
+
+def test_question_before_last_request_is_ignored(path):
+    write(path, [user('request'), question('q1'), user('next request')])
+    assert tail(path) == transcript._scan_tail_reversed(path)
+    assert tail(path)['question'] is None
+
+
+def test_question_without_id_and_system_messages(path):
+    write(path, [user('request'), question(None), user('<system-reminder>ignored</system-reminder>')])
+    assert tail(path) == transcript._scan_tail_reversed(path)
+    assert tail(path)['question'] is not None
+
+
+def test_random_transcripts_match_reversed_scan(path):
+    rng = random.Random(0)
+    makers = [
+        lambda n: user(f'request {n}'),
+        lambda n: user('<command-name>/commit</command-name>'),
+        lambda n: user('<local-command-stdout>noise</local-command-stdout>'),
+        lambda n: question(f'q{n}'),
+        lambda n: question(f'q{n}', record_type='tool_use'),
+        lambda n: question(None),
+        lambda n: answer(f'q{rng.randrange(max(1, n))}'),
+        lambda n: bash(f'b{n}'),
+        lambda n: result(f'b{n}', rng.choice((10, 5000))),
+        lambda n: text(f'done {n}'),
+    ]
+    for _ in range(40):
+        records = [rng.choice(makers)(n) for n in range(rng.randint(0, 40))]
+        data = encode(records)
+        # 조금씩 이어 쓰며 (기록 중인 마지막 줄 포함) 매번 비교
+        open(path, 'wb').close()
+        for cut in sorted(rng.sample(range(len(data) + 1), min(6, len(data) + 1))) + [len(data)]:
+            with open(path, 'ab') as f:
+                f.write(data[os.path.getsize(path):cut])
+            assert tail(path) == transcript._scan_tail_reversed(path)
+        os.unlink(transcript_index.index_path(path))
+
+
+def test_scan_transcript_tail_uses_index(path, monkeypatch):
+    write(path, [user('request'), question('q1')])
+    transcript.scan_transcript_tail(path)
+    assert os.path.exists(transcript_index.index_path(path))
+
+    monkeypatch.setenv('ENABLE_TRANSCRIPT_INDEX', 'false')
+    os.unlink(transcript_index.index_path(path))
+    assert transcript.scan_transcript_tail(path) == transcript._scan_tail_reversed(path)
+    assert not os.path.exists(transcript_index.index_path(path))
+
+
+# ============================================================
+# 인덱스 갱신 / 무효화 (증분 커서와 같은 기준)
+# ============================================================
+
+def test_append_extends_index_without_rebuild(path, capsys):
+    write(path, [user('first'), bash('b1'), result('b1')])
+    tail(path)
+    assert 'Building index' in capsys.readouterr().err
+
+    write(path, [user('second'), question('q1')], mode='ab')
+    assert tail(path) == transcript._scan_tail_reversed(path)
+    assert 'Building index' not in capsys.readouterr().err
+
+
+def test_truncated_file_rebuilds_index(path, capsys):
+    write(path, [user('first'), question('q1'), user('second'), user('third')])
+    tail(path)
+    capsys.readouterr()
+
+    write(path, [user('new'), question('q9')])
+    assert tail(path) == transcript._scan_tail_reversed(path)
+    assert tail(path)['last_user_message'] == ('new', False)
+    assert 'Building index' in capsys.readouterr().err
+
+
+def test_replaced_file_rebuilds_index(path, tmp_path, capsys):
+    write(path, [user('first')])
+    tail(path)
+    capsys.readouterr()
+
+    replacement = str(tmp_path / 'replacement.jsonl')
+    write(replacement, [user('replaced'), question('q1'), bash('b1')])
+    os.replace(replacement, path)
+    assert tail(path)['last_user_message'] == ('replaced', False)
+    assert 'Building index' in capsys.readouterr().err
+
+
+def test_overwritten_file_rebuilds_index(path, capsys):
+    write(path, [user('aaaa'), question('q1')])
+    tail(path)
+    capsys.readouterr()
+
+    # 같은 inode, 같은 길이의 다른 내용 + 이어 쓰기 (인덱싱한 위치 직전 바이트가 달라짐)
+    with open(path, 'r+b') as f:
+        f.write(encode([user('bbbb'), question('q2')]))
+    write(path, [answer('q2')], mode='ab')
+    assert tail(path) == transcript._scan_tail_reversed(path) == {
+        'last_user_message': ('bbbb', False), 'question': None}
+    assert 'Building index' in capsys.readouterr().err
+
+
+def test_unwritable_index_falls_back_to_memory(path, monkeypatch, capsys):
+    write(path, [user('request'), question('q1')])
+    monkeypatch.setattr(transcript_index, 'index_path', lambda _: os.path.join(path, 'not-a-dir.idx'))
+    assert tail(path) == transcript._scan_tail_reversed(path)
+    assert 'Index write error' in capsys.readouterr().err